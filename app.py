@@ -1,17 +1,35 @@
-import streamlit as st
-import requests
-import kubernetes as k8s
 import time
-import threading
-import json
+# 起動時間計測のため、重いインポートより前に開始時刻を記録
+script_started_at = time.perf_counter()
+
+import streamlit as st
+import copy
 import os
-import ctypes
 from datetime import datetime
 import streamlit_authenticator as stauth
 
 import yaml
 from yaml.loader import SafeLoader
 
+from release_monitor import monitor
+from release_monitor.config_store import merge_config
+from release_monitor.k8s_events import EventWatchManager
+from release_monitor.lazy_import import lazy_import
+from release_monitor.leader_election import StandaloneElector
+from release_monitor.monitor import get_github_releases
+from release_monitor.pod_logs import PodLogMultiplexer
+from release_monitor.polling import DEFAULT_WINDOW_INTERVAL, PRIORITY_MULTIPLIERS, CronSchedule, PollingPolicy
+from release_monitor.profiling import PROFILING_ENABLED, RerunProfiler, is_profiling_admin
+from release_monitor.registry import format_image_reference, parse_image_reference
+from release_monitor.release_cache import K8S_STATUS, LATEST, ReleaseCache
+from release_monitor.release_index import ReleaseIndex
+from release_monitor.release_state import load_release_state, remove_target_releases, save_target_releases
+from release_monitor.startup import DEFAULT_STARTUP_BUDGET, StartupTimer, staggered_delays
+from release_monitor.targets import export_targets, filter_targets, merge_targets, new_target, parse_targets, validate_targets
+
+# kubernetes クライアントは大きいため、初めて使用する時点でインポートする
+k8s = lazy_import("kubernetes")
+
 st.set_page_config(
     page_title="Git Release Monitor & K8s Manager",
     page_icon="🚀",
@@ -33,6 +51,7 @@ authenticator = stauth.Authenticate(
 
 # 認証処理
 authenticator.login()
+auth_finished_at = time.perf_counter()
 
 
 if st.session_state["authentication_status"] is None:
@@ -41,863 +60,1179 @@ elif not st.session_state["authentication_status"]:
     st.error('ユーザー名/パスワードが間違っています')
 elif st.session_state["authentication_status"]:
 
-    # セッション状態の初期化
-    if 'monitoring_threads' not in st.session_state:
-        st.session_state.monitoring_threads = {}
-    if 'is_monitoring' not in st.session_state:
-        st.session_state.is_monitoring = {}
-    if 'logs' not in st.session_state:
-        st.session_state.logs = []
-    if 'latest_releases' not in st.session_state:
-        st.session_state.latest_releases = {}
-    if 'release_histories' not in st.session_state:
-        st.session_state.release_histories = {}
-    if 'config' not in st.session_state:
-        st.session_state.config = {
-            'targets': [
-                {
-                    'id': 'target1',
-                    'name': 'Default Target',
-                    'github_repo': '',
-                    'github_token': '',
-                    'k8s_namespace': 'default',
-                    'k8s_deployment': '',
-                    'polling_interval': 60,
-                    'is_active': False,
-                    'latest_release': None,  # Add latest_release field to store the last detected release
-                }
-            ]
-        }
-    if 'selected_target_index' not in st.session_state:
-        st.session_state.selected_target_index = 0
-    if 'next_target_id' not in st.session_state:
-        st.session_state.next_target_id = 2  # target1はデフォルトで使用済み
-
-    # ログ追加関数
-    def add_log(message):
-        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        st.session_state.logs.append(f"[{timestamp}] {message}")
-        if len(st.session_state.logs) > 100:  # 最大100件までログを保持
-            st.session_state.logs.pop(0)
-
-    # Githubリリース取得関数
-    def get_github_releases(repo, token=None):
-        headers = {}
-        if token:
-            headers["Authorization"] = f"token {token}"
-        
-        url = f"https://api.github.com/repos/{repo}/releases"
-        try:
-            response = requests.get(url, headers=headers)
-            response.raise_for_status()
-            return response.json()
-        except requests.exceptions.RequestException as e:
-            return []
-
-    # Kubernetes設定ロード関数
-    def load_k8s_config():
-        try:
-            # kubeconfig からの設定ロード試行
-            k8s.config.load_kube_config()
-            add_log("Loaded Kubernetes config from kubeconfig file")
-        except Exception:
-            try:
-                # クラスター内実行時の設定ロード試行
-                k8s.config.load_incluster_config()
-                add_log("Loaded in-cluster Kubernetes config")
-            except Exception as e:
-                add_log(f"Failed to load Kubernetes config: {e}")
-                return False
-        return True
-
-    # Kubernetesデプロイメントのリスタート関数
-    def restart_k8s_deployment(namespace, deployment_name):
-        try:
-            apps_v1 = k8s.client.AppsV1Api()
-            now = datetime.utcnow().isoformat()
-            patch = {
-                "spec": {
-                    "template": {
-                        "metadata": {
-                            "annotations": {
-                                "kubectl.kubernetes.io/restartedAt": now
-                            }
-                        }
-                    }
-                }
+    # 再実行ごとのプロファイリング（PROFILING_ENABLED=true かつ管理者のセッションのみ計測）
+    if 'profiler' not in st.session_state:
+        st.session_state.profiler = RerunProfiler()
+    profiler = st.session_state.profiler
+    profiler.enabled = PROFILING_ENABLED and is_profiling_admin(
+        st.session_state.get('username'), st.session_state.get('roles')
+    )
+    profiler.start_rerun(script_started_at)
+    profiler.record("auth", auth_finished_at - script_started_at)
+
+    try:
+        # セッション状態の初期化
+        if 'logs' not in st.session_state:
+            st.session_state.logs = []
+        if 'config' not in st.session_state:
+            st.session_state.config = {
+                'targets': [new_target('target1', 'Default Target')]
             }
+        if 'selected_target_index' not in st.session_state:
+            st.session_state.selected_target_index = 0
+        if 'next_target_id' not in st.session_state:
+            st.session_state.next_target_id = 2  # target1はデフォルトで使用済み
 
-            # 実行
-            apps_v1.patch_namespaced_deployment(
-                name=deployment_name,
-                namespace=namespace,
-                body=patch
-            )
-            # add_log(f"Successfully restarted deployment {deployment_name} in namespace {namespace}")
-            return True
-        except Exception:
-            # add_log(f"Error restarting deployment: {e}")
-            return False
-
-    # Kubernetesデプロイメントのステータス取得関数
-    def get_deployment_status(namespace, deployment_name):
-        try:
-            if not load_k8s_config():
-                return None
+        # ログ追加関数
+        def add_log(message):
+            timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+            st.session_state.logs.append(f"[{timestamp}] {message}")
+            if len(st.session_state.logs) > 100:  # 最大100件までログを保持
+                st.session_state.logs.pop(0)
+
+        # Kubernetes設定ロード関数（ログはダッシュボードに出力）
+        def load_k8s_config():
+            return monitor.load_k8s_config(add_log)
+
+        # Kubernetesデプロイメントのステータス取得関数
+        @profiler.timed("k8s.deployment_status")
+        def get_deployment_status(namespace, deployment_name):
+            try:
+                if not load_k8s_config():
+                    return None
                 
-            apps_v1 = k8s.client.AppsV1Api()
-            core_v1 = k8s.client.CoreV1Api()
+                apps_v1 = k8s.client.AppsV1Api()
+                core_v1 = k8s.client.CoreV1Api()
             
-            # デプロイメント情報の取得
-            deployment = apps_v1.read_namespaced_deployment(
-                name=deployment_name,
-                namespace=namespace
-            )
+                # デプロイメント情報の取得
+                deployment = apps_v1.read_namespaced_deployment(
+                    name=deployment_name,
+                    namespace=namespace
+                )
             
-            # ポッド一覧取得
-            pods = core_v1.list_namespaced_pod(
-                namespace=namespace,
-                label_selector=",".join([f"{k}={v}" for k, v in deployment.spec.selector.match_labels.items()])
-            )
+                # ポッド一覧取得
+                pods = core_v1.list_namespaced_pod(
+                    namespace=namespace,
+                    label_selector=",".join([f"{k}={v}" for k, v in deployment.spec.selector.match_labels.items()])
+                )
             
-            # コンテナイメージ情報の取得
-            containers = deployment.spec.template.spec.containers
-            images = [{"name": container.name, "image": container.image} for container in containers]
+                # コンテナイメージ情報の取得
+                containers = deployment.spec.template.spec.containers
+                images = [{"name": container.name, "image": container.image} for container in containers]
             
-            # デプロイメント詳細情報
-            status_info = {
-                "name": deployment.metadata.name,
-                "namespace": deployment.metadata.namespace,
-                "created_at": deployment.metadata.creation_timestamp,
-                "replicas": {
-                    "desired": deployment.spec.replicas,
-                    "current": deployment.status.replicas if deployment.status.replicas else 0,
-                    "ready": deployment.status.ready_replicas if deployment.status.ready_replicas else 0,
-                    "available": deployment.status.available_replicas if deployment.status.available_replicas else 0,
-                    "unavailable": deployment.status.unavailable_replicas if deployment.status.unavailable_replicas else 0
-                },
-                "images": images,
-                "strategy": deployment.spec.strategy.type,
-                "updated_at": deployment.status.conditions[-1].last_update_time if deployment.status.conditions else None,
-                "pods": []
-            }
+                # デプロイメント詳細情報
+                status_info = {
+                    "name": deployment.metadata.name,
+                    "namespace": deployment.metadata.namespace,
+                    "created_at": deployment.metadata.creation_timestamp,
+                    "replicas": {
+                        "desired": deployment.spec.replicas,
+                        "current": deployment.status.replicas if deployment.status.replicas else 0,
+                        "ready": deployment.status.ready_replicas if deployment.status.ready_replicas else 0,
+                        "available": deployment.status.available_replicas if deployment.status.available_replicas else 0,
+                        "unavailable": deployment.status.unavailable_replicas if deployment.status.unavailable_replicas else 0
+                    },
+                    "images": images,
+                    "strategy": deployment.spec.strategy.type,
+                    "updated_at": deployment.status.conditions[-1].last_update_time if deployment.status.conditions else None,
+                    "pods": []
+                }
             
-            # ポッド詳細情報の取得
-            for pod in pods.items:
-                pod_containers = []
-                for container in pod.status.container_statuses if pod.status.container_statuses else []:
-                    container_info = {
-                        "name": container.name,
-                        "ready": container.ready,
-                        "restarts": container.restart_count,
-                        "image": container.image,
-                        "image_id": container.image_id
-                    }
-                    pod_containers.append(container_info)
+                # ポッド詳細情報の取得
+                for pod in pods.items:
+                    pod_containers = []
+                    for container in pod.status.container_statuses if pod.status.container_statuses else []:
+                        container_info = {
+                            "name": container.name,
+                            "ready": container.ready,
+                            "restarts": container.restart_count,
+                            "image": container.image,
+                            "image_id": container.image_id
+                        }
+                        pod_containers.append(container_info)
                 
-                pod_info = {
-                    "name": pod.metadata.name,
-                    "phase": pod.status.phase,
-                    "ip": pod.status.pod_ip,
-                    "node": pod.spec.node_name,
-                    "start_time": pod.status.start_time,
-                    "containers": pod_containers
-                }
-                status_info["pods"].append(pod_info)
+                    pod_info = {
+                        "name": pod.metadata.name,
+                        "phase": pod.status.phase,
+                        "ip": pod.status.pod_ip,
+                        "node": pod.spec.node_name,
+                        "start_time": pod.status.start_time,
+                        "containers": pod_containers
+                    }
+                    status_info["pods"].append(pod_info)
             
-            return status_info
+                return status_info
             
-        except Exception as e:
-            add_log(f"Error getting deployment status: {e}")
-            return None
-
-    # モニタリングスレッド関数
-    def monitoring_thread(target_id, target_name, repo, token, namespace, deployment, interval, monitoring_state):
-        # add_log(f"[{target_name}] Starting monitoring for {repo}, checking every {interval} seconds")
-        
-        # 設定からlast_release_tagを取得する（存在する場合）
-        last_release_tag = None
-        # スレッド間で共有状態から初期値を設定
-        if f"{target_id}_stored_release_tag" in monitoring_state:
-            last_release_tag = monitoring_state[f"{target_id}_stored_release_tag"]
-            print(last_release_tag)
-        while target_id in monitoring_state and monitoring_state[target_id]:
-            try:
-                releases = get_github_releases(repo, token)
-                if releases:
-                    latest_release = releases[0]
-                    print(last_release_tag, latest_release['tag_name'])
-                    
-                    # スレッド間の共有変数で最新のリリース情報を共有
-                    monitoring_state[f"{target_id}_latest_release"] = latest_release
-                    monitoring_state[f"{target_id}_releases"] = releases
-                    
-                    # 前回チェック時から新しいリリースが出たら再起動
-                    if last_release_tag is None:
-                        # 初回実行時
-                        print(f"[{target_name}] Initial release detected: {latest_release['tag_name']}")
-                        monitoring_state[f"{target_id}_new_release"] = True
-                    elif latest_release['tag_name'] != last_release_tag:
-                        # 新しいリリースが検出された
-                        print(f"[{target_name}] New release detected: {latest_release['tag_name']}")
-                        
-                        # Kubernetesデプロイメントを再起動
-                        restart_result = restart_k8s_deployment(namespace, deployment)
-                        if restart_result:
-                            print(f"[{target_name}] Automatically restarted deployment for new release {latest_release['tag_name']}")
-                            last_release_tag = latest_release['tag_name']
-                            monitoring_state[f"{target_id}_stored_release_tag"] = last_release_tag
-                        else:
-                            print(f"[{target_name}] Failed to restart deployment for new release {latest_release['tag_name']}")
-                        
-                        monitoring_state[f"{target_id}_new_release"] = True
-                    else:
-                        # 変更なし
-                        print(f"[{target_name}] No new releases detected")
-                    
-                    # 最新のリリースタグを記録
-                    last_release_tag = latest_release['tag_name']
-                    print(last_release_tag, latest_release['tag_name'])
-                    monitoring_state[f"{target_id}_stored_release_tag"] = last_release_tag
-                else:
-                    print(f"[{target_name}] No releases found or error getting releases")
             except Exception as e:
-                print(f"[{target_name}] Error in monitoring thread: {e}")
-            
-            # 指定された間隔で待機
-            time.sleep(interval)
-
-    # セッションとスレッド間の共有状態を管理するディクショナリ（スレッドセーフ）
-    shared_monitoring_state = {}
-
-    # モニタリング開始関数
-    def start_monitoring(target_index):
-        target = st.session_state.config['targets'][target_index]
-        target_id = target['id']
-
-        if target_id in st.session_state.is_monitoring and st.session_state.is_monitoring[target_id]:
-            add_log(f"[{target['name']}] Monitoring is already running")
-            return
-        
-        if not target['github_repo'] or not target['k8s_deployment']:
-            st.error(f"GitHub repository and Kubernetes deployment must be set for {target['name']}")
-            return
-        
-        # スレッド間で共有するモニタリング状態を初期化
-        st.session_state.is_monitoring[target_id] = True
-        shared_monitoring_state[target_id] = True
-        
-        # 設定にアクティブフラグを更新
-        st.session_state.config['targets'][target_index]['is_active'] = True
-        
-        # 前回のリリースタグがあれば共有状態に設定
-        if target['latest_release'] and 'tag_name' in target['latest_release']:
-            shared_monitoring_state[f"{target_id}_stored_release_tag"] = target['latest_release']['tag_name']
-        
-        # 変更をconfig.jsonに保存
-        save_config()
-
-        add_log(f"[{target['name']}] Starting monitoring for {target['github_repo']}, checking every {target['polling_interval']} seconds")
-
-        # すでに同じIDのスレッドが存在する場合はスキップ
-        if target_id in st.session_state.monitoring_threads:
-            add_log(f"[{target['name']}] Monitoring thread already exists")
-            return
-        
-        thread = threading.Thread(
-            target=monitoring_thread,
-            args=(
-                target_id,
-                target['name'],
-                target['github_repo'],
-                target['github_token'],
-                target['k8s_namespace'],
-                target['k8s_deployment'],
-                target['polling_interval'],
-                shared_monitoring_state
+                add_log(f"Error getting deployment status: {e}")
+                return None
+
+        # 監視の実行場所
+        # embedded: このプロセス内でモニタリングスレッドを実行する（デフォルト）
+        # external: ヘッドレスモニター（python -m release_monitor monitor）が実行し、ダッシュボードは状態の表示のみ行う
+        monitor_mode = os.environ.get('MONITOR_MODE', 'embedded').lower()
+
+        # モニタリングサービスの初期化（プロセス内で1回だけ作成し、全セッションで共有）
+        # リリース情報とステータスはセッションごとに持たず、メモリ予算付きの共有キャッシュに保持する
+        # 組み込みモードのサービスは python -m release_monitor dashboard が起動時に作成済み（未作成ならここで作成）
+        @st.cache_resource
+        def get_monitor_service():
+            if monitor_mode == 'external':
+                if os.environ.get('LEADER_ELECTION_ENABLED', 'false').lower() == 'true':
+                    load_k8s_config()
+                return monitor.MonitorService(
+                    StandaloneElector(), monitor.create_state_store(), add_log, ReleaseCache(), monitor.create_config_store()
+                )
+            return monitor.get_background_service()
+
+        monitor_service = get_monitor_service()
+        elector = monitor_service.elector
+        state_store = monitor_service.state_store
+        shared_monitoring_state = monitor_service.monitoring_state
+        release_cache = monitor_service.release_cache
+
+        # ターゲットのモニタリングが実行中か判定する関数
+        def is_monitoring(target):
+            if monitor_mode == 'external':
+                return bool(target['is_active'])
+            return monitor_service.is_running(target['id'])
+
+        # ポッドログのストリーミング（プロセス内で共有し、少数のワーカースレッドで多重化）
+        @st.cache_resource
+        def get_pod_log_multiplexer():
+            load_k8s_config()
+            return PodLogMultiplexer(
+                workers=int(os.environ.get('POD_LOG_WORKERS', '2')),
+                max_streams=int(os.environ.get('POD_LOG_MAX_STREAMS', '100')),
+                max_lines=int(os.environ.get('POD_LOG_MAX_LINES', '500')),
+                tail_lines=int(os.environ.get('POD_LOG_TAIL_LINES', '100'))
             )
-        )
-        thread.daemon = True
-        thread.start()
-        st.session_state.monitoring_threads[target_id] = thread
-
-    # モニタリング停止関数
-    def stop_monitoring(target_index):
-        target = st.session_state.config['targets'][target_index]
-        target_id = target['id']
-        
-        if target_id not in st.session_state.is_monitoring or not st.session_state.is_monitoring[target_id]:
-            add_log(f"[{target['name']}] Monitoring is not running")
-            return
-        
-        # Streamlitのセッションステートと共有変数の両方を更新
-        st.session_state.is_monitoring[target_id] = False
-        if target_id in shared_monitoring_state:
-            shared_monitoring_state[target_id] = False
-            
-        st.session_state.config['targets'][target_index]['is_active'] = False
 
-        # 変更をconfig.jsonに保存
-        save_config()
+        # ログストリームを表示しているセッションの識別子
+        def get_log_viewer_id():
+            if 'log_viewer_id' not in st.session_state:
+                st.session_state.log_viewer_id = os.urandom(8).hex()
+            return st.session_state.log_viewer_id
 
-        add_log(f"[{target['name']}] Stopping monitoring")
-        # スレッドを強制終了する
-        if target_id in st.session_state.monitoring_threads:
-            thread = st.session_state.monitoring_threads[target_id]
-            
+        # 前回の実行から選択が外れたポッド/コンテナのストリームを、このセッションについて解放する関数
+        # 他のセッションが表示していないストリームは閉じられ、POD_LOG_MAX_STREAMS の枠が空く
+        def release_deselected_logs(target_id, namespace, selections):
+            key = f"log_following_{target_id}"
+            previous_namespace, previous_selections = st.session_state.get(key, (namespace, []))
+            deselected = set(previous_selections)
+            if previous_namespace == namespace:
+                deselected -= set(selections)
+            if deselected:
+                multiplexer = get_pod_log_multiplexer()
+                for selection in deselected:
+                    pod_name, container_name = selection.split("/", 1)
+                    multiplexer.release(previous_namespace, pod_name, container_name, get_log_viewer_id())
+            st.session_state[key] = (namespace, list(selections))
+
+        # ログパネルの描画関数（フラグメントとして定期的に再描画し、スクリプト全体は再実行しない）
+        @st.fragment(run_every=2)
+        def render_pod_logs(namespace, selections):
+            multiplexer = get_pod_log_multiplexer()
+            viewer = get_log_viewer_id()
+            for selection in selections:
+                pod_name, container_name = selection.split("/", 1)
+                stream = multiplexer.get(namespace, pod_name, container_name)
+                if stream is None:
+                    try:
+                        stream = multiplexer.follow(namespace, pod_name, container_name, viewer)
+                    except RuntimeError as e:
+                        st.error(str(e))
+                        continue
+                lines = stream.snapshot(viewer)
+                st.caption(f"**{selection}** ({stream.status}{': ' + stream.error if stream.error else ''})")
+                st.code("\n".join(lines) if lines else "(no output yet)", language=None)
+
+        # Kubernetes Events のウォッチ（ネームスペースごとに1本をプロセス内で共有）
+        @st.cache_resource
+        def get_event_watch_manager():
+            load_k8s_config()
+            return EventWatchManager(max_entries=int(os.environ.get('EVENT_TIMELINE_MAX_ENTRIES', '200')))
+
+        # イベントタイムラインの描画関数（ウォッチが受け取った差分をフラグメントで定期的に反映）
+        @st.fragment(run_every=5)
+        def render_event_timeline(target_id, namespace, deployment):
+            manager = get_event_watch_manager()
+            timeline = manager.watch(target_id, namespace, deployment)
+            watcher = manager.watcher(namespace)
+            if watcher is not None and watcher.error:
+                st.caption(f"⚠️ Event watch error: {watcher.error}")
+            entries = timeline.entries()
+            if not entries:
+                st.write("No events for this deployment")
+                return
+            st.dataframe(
+                [
+                    {
+                        "Type": "⚠️ Warning" if entry["type"] == "Warning" else entry["type"],
+                        "Reason": entry["reason"],
+                        "Object": f"{entry['kind']}/{entry['object']}",
+                        "Message": entry["message"],
+                        "Count": entry["count"],
+                        "Last Seen": entry["last_seen"]
+                    }
+                    for entry in entries
+                ],
+                column_config={
+                    "Count": st.column_config.NumberColumn("Count"),
+                    "Last Seen": st.column_config.DatetimeColumn("Last Seen")
+                },
+                hide_index=True
+            )
+
+        # モニタリング開始関数
+        def start_monitoring(target_index, initial_delay=0, persist=True):
+            target = st.session_state.config['targets'][target_index]
+
+            if is_monitoring(target):
+                add_log(f"[{target['name']}] Monitoring is already running")
+                return
+        
+            if not target['github_repo'] or not target['k8s_deployment']:
+                st.error(f"GitHub repository and Kubernetes deployment must be set for {target['name']}")
+                return
+        
             try:
-                # スレッドIDを取得
-                thread_id = thread.ident
-                
-                # スレッドへSystemExitを送信
-                if thread_id:
-                    res = ctypes.pythonapi.PyThreadState_SetAsyncExc(
-                        ctypes.c_long(thread_id), 
-                        ctypes.py_object(SystemExit)
-                    )
-                    if res == 0:
-                        add_log(f"[{target['name']}] Invalid thread ID, could not terminate thread")
-                    elif res != 1:
-                        # 複数のスレッドを終了させてしまった場合、リセット
-                        ctypes.pythonapi.PyThreadState_SetAsyncExc(thread_id, None)
-                        add_log(f"[{target['name']}] Failed to terminate thread cleanly")
-                
-                # スレッドが終了するのを少し待つ
-                time.sleep(0.1)
+                PollingPolicy.from_target(target)
+            except ValueError as e:
+                st.error(f"Invalid polling policy for {target['name']}: {e}")
+                return
+        
+            # 設定にアクティブフラグを更新
+            st.session_state.config['targets'][target_index]['is_active'] = True
+        
+            # 変更をconfig.jsonに保存
+            if persist:
+                save_config()
+
+            if monitor_mode == 'external':
+                # ヘッドレスモニターが config.json の変更を検出して開始する
+                add_log(f"[{target['name']}] Monitoring requested from the headless monitor")
+                return
+            monitor_service.start_target(target, initial_delay)
+
+        # モニタリング停止関数
+        def stop_monitoring(target_index, persist=True):
+            target = st.session_state.config['targets'][target_index]
+        
+            if not is_monitoring(target):
+                add_log(f"[{target['name']}] Monitoring is not running")
+                return
+        
+            st.session_state.config['targets'][target_index]['is_active'] = False
+
+            # 変更をconfig.jsonに保存
+            if persist:
+                save_config()
+
+            add_log(f"[{target['name']}] Stopping monitoring")
+            # スレッドは次の待機中に停止フラグを確認して終了する
+            if monitor_mode != 'external':
+                monitor_service.stop_target(target['id'])
+
+        # 設定の基準（最後に読み込んだ・保存した内容）を記録し、次のターゲット番号を既存の ID より後にする関数
+        def set_config_base(config):
+            st.session_state.config_base = copy.deepcopy(config)
+            numbers = [int(target['id'][len('target'):]) for target in config['targets'] if target['id'][len('target'):].isdigit()]
+            st.session_state.next_target_id = max([st.session_state.next_target_id, *(number + 1 for number in numbers)])
+
+        # 設定保存関数
+        # 保存時点の最新の設定を読み直し、このセッションが変更した部分だけをマージして保存する
+        # （古い画面からの保存で、他のユーザーが開始・追加したターゲットを止めたり消したりしないようにする）
+        @profiler.timed("config.save")
+        def save_config():
+            try:
+                base = st.session_state.get('config_base')
+                local = st.session_state.config
+                merged = monitor_service.config_store.update(lambda current: merge_config(base, local, current))
+                selected_id = local['targets'][st.session_state.selected_target_index]['id'] if local['targets'] else None
+                st.session_state.config = merged
+                set_config_base(merged)
+                ids = [target['id'] for target in merged['targets']]
+                st.session_state.selected_target_index = ids.index(selected_id) if selected_id in ids else 0
+                add_log("Configuration saved successfully")
             except Exception as e:
-                add_log(f"[{target['name']}] Error terminating thread: {e}")
-            finally:
-                # 監視スレッド辞書から削除
-                del st.session_state.monitoring_threads[target_id]
-                add_log(f"[{target['name']}] Removed monitoring thread")
-
-    # 設定保存関数
-    def save_config():
-        try:
-            config_dir = os.environ.get('CONFIG_PATH', '')
-            config_path = os.path.join(config_dir, 'config.json') if config_dir else 'config.json'
-            # os.makedirs(os.path.dirname(config_dir), exist_ok=True)
-            with open(config_path, 'w') as f:
-                json.dump(st.session_state.config, f, indent=2)
-            add_log("Configuration saved successfully")
-        except Exception as e:
-            add_log(f"Error saving configuration: {e}")
-
-    # 設定読込関数
-    def load_config():
-        try:
-            config_dir = os.environ.get('CONFIG_PATH', '')
-            config_path = os.path.join(config_dir, 'config.json') if config_dir else 'config.json'
-            if os.path.exists(config_path):
-                with open(config_path, 'r') as f:
-                    st.session_state.config = json.load(f)
+                add_log(f"Error saving configuration: {e}")
+
+        # 設定読込関数
+        def load_config():
+            try:
+                config = monitor_service.config_store.load()
+                if config is not None:
+                    st.session_state.config = config
+                    set_config_base(config)
+                    st.session_state.selected_target_index = min(
+                        st.session_state.selected_target_index, max(len(config['targets']) - 1, 0)
+                    )
                 
-                # ターゲットごとの最新リリース情報をsession_stateにロード
-                for target in st.session_state.config['targets']:
-                    if 'latest_release' in target and target['latest_release']:
-                        target_id = target['id']
-                        st.session_state.latest_releases[target_id] = target['latest_release']
+                    # ターゲットごとの最新リリース情報を確認
+                    for target in st.session_state.config['targets']:
+                        if 'latest_release' in target and target['latest_release']:
+                            target_id = target['id']
                         
-                        # アクティブなモニタリングがある場合、共有状態にもセット
-                        if target['is_active']:
-                            shared_monitoring_state[f"{target_id}_stored_release_tag"] = target['latest_release']['tag_name']
+                            # アクティブなモニタリングがある場合、共有状態にもセット
+                            if target['is_active']:
+                                # 実行中のスレッドが記録したタグは上書きしない
+                                shared_monitoring_state.setdefault(f"{target_id}_stored_release_tag", target['latest_release']['tag_name'])
                 
-                add_log("Configuration loaded successfully")
-        except Exception as e:
-            add_log(f"Error loading configuration: {e}")
-
-    # 初回起動時に設定を読み込む
-    if 'config_loaded' not in st.session_state:
-        load_config()
-        
-        # アクティブなモニタリングを再開
-        for i, target in enumerate(st.session_state.config['targets']):
-            if target['is_active']:
-                add_log(f"Auto-restarting monitoring for {target['name']}")
-                start_monitoring(i)
-        
-        st.session_state.config_loaded = True
-
-    # ロールバック実行関数
-    def rollback_to_version(target_index, tag_name):
-        target = st.session_state.config['targets'][target_index]
-        if not target['k8s_deployment'] or not target['k8s_namespace']:
-            st.error(f"Kubernetes deployment and namespace must be set for {target['name']}")
-            return
-        
-        # 実際のアプリケーションではこの部分をカスタマイズして
-        # 特定のバージョンにロールバックするロジックを実装する
-        add_log(f"[{target['name']}] Rolling back to version {tag_name}")
-        
-        if load_k8s_config():
-            # ここでは簡単にロールアウトを再起動するだけ
-            # 実際のアプリケーションでは特定バージョンのデプロイが必要
-
-            api_v1 = k8s.client.AppsV1Api()
-            deployment = api_v1.read_namespaced_deployment(target['k8s_deployment'], target['k8s_namespace'])
-
-            for container in deployment.spec.template.spec.containers:
-                # コンテナイメージを指定されたタグに変更
-                container.image = f"{container.image.split(':')[0]}:{tag_name}"
-
-            # デプロイメントを更新
-            api_v1.patch_namespaced_deployment(
-                name=target['k8s_deployment'],
-                namespace=target['k8s_namespace'],
-                body=deployment
-            )
+                    add_log("Configuration loaded successfully")
+            except Exception as e:
+                add_log(f"Error loading configuration: {e}")
 
-            add_log(f"[{target['name']}] Successfully rolled back to {tag_name}")
-
-
-    # Streamlit UI
-    st.title("🚀 Git Release Monitor & K8s Manager")
-
-    # 新しいターゲット追加関数
-    def add_target():
-        new_target = {
-            'id': f'target{st.session_state.next_target_id}',
-            'name': f'Target {st.session_state.next_target_id}',
-            'github_repo': '',
-            'github_token': '',
-            'k8s_namespace': 'default',
-            'k8s_deployment': '',
-            'polling_interval': 60,
-            'is_active': False,
-            'latest_release': None  # Add latest_release field
-        }
-        st.session_state.config['targets'].append(new_target)
-        st.session_state.selected_target_index = len(st.session_state.config['targets']) - 1
-        st.session_state.next_target_id += 1
-        add_log(f"Added new monitoring target: {new_target['name']}")
-
-    # ターゲット削除関数
-    def delete_target(index):
-        if index == 0 and len(st.session_state.config['targets']) == 1:
-            st.error("Cannot delete the last target")
-            return
-            
-        target = st.session_state.config['targets'][index]
-        target_id = target['id']
-        
-        # モニタリングが実行中なら停止
-        if target_id in st.session_state.is_monitoring and st.session_state.is_monitoring[target_id]:
-            stop_monitoring(index)
-        
-        # セッションデータから削除
-        if target_id in st.session_state.monitoring_threads:
-            del st.session_state.monitoring_threads[target_id]
-        if target_id in st.session_state.is_monitoring:
-            del st.session_state.is_monitoring[target_id]
-        if target_id in st.session_state.latest_releases:
-            del st.session_state.latest_releases[target_id]
-        if target_id in st.session_state.release_histories:
-            del st.session_state.release_histories[target_id]
-        
-        # 共有状態からも削除
-        keys_to_remove = [key for key in shared_monitoring_state if key.startswith(f"{target_id}_")]
-        for key in keys_to_remove:
-            del shared_monitoring_state[key]
-        
-        # 設定から削除
-        removed_target = st.session_state.config['targets'].pop(index)
-        add_log(f"Removed monitoring target: {removed_target['name']}")
-        
-        # 設定を保存
-        save_config()
-        
-        # 選択中のインデックスを調整
-        if st.session_state.selected_target_index >= len(st.session_state.config['targets']):
+        # 永続化されたリリース履歴を共有キャッシュに読み込む関数（ウォームスタート）
+        # release_state.json が無い場合（再デプロイで emptyDir が空になった後など）は共有状態の最新リリースを使う
+        def warm_start_release_state():
+            release_cache.warm_start(st.session_state.config['targets'], load_release_state(), state_store.load)
+
+        # 初回起動時に設定を読み込む
+        if 'config_loaded' not in st.session_state:
+            startup_timer = StartupTimer(script_started_at)
+            startup_timer.mark("imports_and_auth")
+            load_config()
+            warm_start_release_state()
+            startup_timer.mark("load_config")
+        
+            # アクティブなモニタリングの再開はモニタリングサービス（組み込みモード）またはヘッドレスモニターが行う
+        
+            st.session_state.config_loaded = True
+            st.session_state.startup_seconds = startup_timer.total
+            add_log(f"Startup completed in {startup_timer.summary()}")
+            if startup_timer.total > DEFAULT_STARTUP_BUDGET:
+                add_log(f"Startup exceeded budget of {DEFAULT_STARTUP_BUDGET:.1f}s")
+            for phase, seconds in startup_timer.phases[1:]:
+                profiler.record(f"startup:{phase}", seconds)
+
+        # GitHubリリース取得（プロファイリング時は外部呼び出しとして計測）
+        fetch_github_releases = profiler.timed("github.releases")(get_github_releases)
+
+        # ロールバック実行関数
+        @profiler.timed("k8s.rollback")
+        def rollback_to_version(target_index, tag_name, index=None):
+            target = st.session_state.config['targets'][target_index]
+            if not target['k8s_deployment'] or not target['k8s_namespace']:
+                st.error(f"Kubernetes deployment and namespace must be set for {target['name']}")
+                return
+        
+            # 取得済みのリリースに存在しないタグへのロールバックは行わない
+            if index is not None and tag_name != 'latest' and tag_name not in index:
+                st.error(f"Release {tag_name} was not found for {target['name']}")
+                return
+        
+            # 実際のアプリケーションではこの部分をカスタマイズして
+            # 特定のバージョンにロールバックするロジックを実装する
+            add_log(f"[{target['name']}] Rolling back to version {index.label(tag_name) if index is not None else tag_name}")
+        
+            if load_k8s_config():
+                # ここでは簡単にロールアウトを再起動するだけ
+                # 実際のアプリケーションでは特定バージョンのデプロイが必要
+
+                api_v1 = k8s.client.AppsV1Api()
+                deployment = api_v1.read_namespaced_deployment(target['k8s_deployment'], target['k8s_namespace'])
+
+                for container in deployment.spec.template.spec.containers:
+                    # コンテナイメージを指定されたタグに変更（ダイジェスト指定は外す）
+                    registry, repository, _, _ = parse_image_reference(container.image)
+                    container.image = format_image_reference(registry, repository, tag_name)
+
+                # デプロイメントを更新
+                api_v1.patch_namespaced_deployment(
+                    name=target['k8s_deployment'],
+                    namespace=target['k8s_namespace'],
+                    body=deployment
+                )
+
+                add_log(f"[{target['name']}] Successfully rolled back to {tag_name}")
+
+
+        # Streamlit UI
+        st.title("🚀 Git Release Monitor & K8s Manager")
+
+        # 新しいターゲット追加関数
+        def add_target():
+            target = new_target(f'target{st.session_state.next_target_id}', f'Target {st.session_state.next_target_id}')
+            st.session_state.config['targets'].append(target)
             st.session_state.selected_target_index = len(st.session_state.config['targets']) - 1
+            st.session_state.next_target_id += 1
+            add_log(f"Added new monitoring target: {target['name']}")
 
-    # サイドバー（設定）
-    with st.sidebar:
-        st.header("⚙️ Target Management")
-        st.text("Welcome " + st.session_state['name'] + "!")
-        authenticator.logout("Logout")
-        
-        # ターゲット選択
-        target_names = [t['name'] for t in st.session_state.config['targets']]
-        selected_target = st.selectbox(
-            "Select Target", 
-            options=range(len(target_names)),
-            format_func=lambda i: f"{target_names[i]} {'🟢' if (st.session_state.config['targets'][i]['id'] in st.session_state.is_monitoring and st.session_state.is_monitoring[st.session_state.config['targets'][i]['id']]) else '🔴'}",
-            key="target_selector",
-            on_change=lambda: setattr(st.session_state, 'selected_target_index', st.session_state.target_selector)
-        )
-        
-        st.session_state.selected_target_index = selected_target
-        current_target = st.session_state.config['targets'][selected_target]
-        
-        # ターゲット操作ボタン
-        col1, col2 = st.columns(2)
-        with col1:
-            st.button("Add New Target", on_click=add_target, type="secondary")
-        with col2:
-            st.button("Delete Target", on_click=lambda: delete_target(st.session_state.selected_target_index), 
-                    type="secondary", disabled=len(st.session_state.config['targets']) <= 1 and selected_target == 0)
-        
-        st.markdown("---")
-        
-        # 選択したターゲットの設定
-        st.subheader(f"Settings for {current_target['name']}")
-        
-        # ターゲット名
-        target_name = st.text_input(
-            "Target Name", 
-            value=current_target['name'],
-            key=f"target_name_{selected_target}"
-        )
-        st.session_state.config['targets'][selected_target]['name'] = target_name
-        
-        # GitHub 設定
-        st.text_input(
-            "GitHub Repository (owner/repo)", 
-            value=current_target['github_repo'],
-            key=f"github_repo_input_{selected_target}",
-            on_change=lambda: st.session_state.config['targets'][selected_target].update(
-                {'github_repo': st.session_state[f"github_repo_input_{selected_target}"]}
+        # ターゲット削除関数
+        def delete_target(index):
+            if index == 0 and len(st.session_state.config['targets']) == 1:
+                st.error("Cannot delete the last target")
+                return
+            
+            target = st.session_state.config['targets'][index]
+            target_id = target['id']
+        
+            # モニタリングが実行中なら停止
+            if is_monitoring(target):
+                stop_monitoring(index)
+        
+            # キャッシュから削除
+            release_cache.discard(target_id)
+        
+            # 共有状態からも削除（ヘッドレスモニター使用時はモニターが設定の変更を検出して削除する）
+            if monitor_mode != 'external':
+                monitor_service.remove_target(target_id)
+        
+            remove_target_releases(target_id)
+            get_event_watch_manager().unwatch(target_id)
+        
+            # 設定から削除
+            removed_target = st.session_state.config['targets'].pop(index)
+            add_log(f"Removed monitoring target: {removed_target['name']}")
+        
+            # 設定を保存
+            save_config()
+        
+            # 選択中のインデックスを調整
+            if st.session_state.selected_target_index >= len(st.session_state.config['targets']):
+                st.session_state.selected_target_index = len(st.session_state.config['targets']) - 1
+
+        # サイドバーのターゲット設定ウィジェットの状態を破棄する関数（一括変更後に設定の値で表示し直す）
+        def reset_target_widgets():
+            prefixes = (
+                'target_name_', 'github_repo_input_', 'k8s_namespace_input_', 'k8s_deployment_input_',
+                'polling_interval_input_', 'priority_input_', 'backoff_input_', 'release_windows_input_',
+                'window_interval_input_', 'include_prereleases_input_', 'digest_check_input_', 'registry_url_input_'
             )
-        )
-        
-        # st.text_input(
-        #     "GitHub Token (Optional)", 
-        #     value=current_target['github_token'],
-        #     key=f"github_token_input_{selected_target}",
-        #     type="password",
-        #     on_change=lambda: st.session_state.config['targets'][selected_target].update(
-        #         {'github_token': st.session_state[f"github_token_input_{selected_target}"]}
-        #     )
-        # )
-        
-        # Kubernetes 設定
-        st.text_input(
-            "K8s Namespace", 
-            value=current_target['k8s_namespace'],
-            key=f"k8s_namespace_input_{selected_target}",
-            on_change=lambda: st.session_state.config['targets'][selected_target].update(
-                {'k8s_namespace': st.session_state[f"k8s_namespace_input_{selected_target}"]}
+            for key in [key for key in st.session_state if key.startswith(prefixes)]:
+                del st.session_state[key]
+
+        # ファイルからターゲットを一括インポートする関数（設定の保存は1回）
+        def import_targets_file():
+            uploaded = st.session_state.get('bulk_import_file')
+            if uploaded is None:
+                return
+            fmt = 'csv' if uploaded.name.lower().endswith('.csv') else 'yaml'
+            try:
+                imported = parse_targets(uploaded.getvalue().decode('utf-8'), fmt)
+            except (ValueError, UnicodeDecodeError, yaml.YAMLError) as e:
+                add_log(f"Error importing targets from {uploaded.name}: {e}")
+                st.session_state.bulk_import_error = str(e)
+                return
+            st.session_state.pop('bulk_import_error', None)
+            added, updated, st.session_state.next_target_id = merge_targets(
+                st.session_state.config['targets'], imported, st.session_state.next_target_id
             )
-        )
-        
-        st.text_input(
-            "K8s Deployment", 
-            value=current_target['k8s_deployment'],
-            key=f"k8s_deployment_input_{selected_target}",
-            on_change=lambda: st.session_state.config['targets'][selected_target].update(
-                {'k8s_deployment': st.session_state[f"k8s_deployment_input_{selected_target}"]}
+            reset_target_widgets()
+            save_config()
+            # 設定が変わった実行中のターゲットはスレッドを再起動して反映する（ヘッドレスモニターは自分で反映する）
+            if monitor_mode != 'external':
+                monitor_service.sync(st.session_state.config['targets'])
+            add_log(f"Imported targets from {uploaded.name}: {added} added, {updated} updated")
+
+        # 複数ターゲットのモニタリングを一括で開始・停止・再起動する関数（設定の保存はバッチごとに1回）
+        # 開始時は GitHub へのアクセスが集中しないよう、再開時と同じく各ポーリング間隔内にずらす
+        def batch_monitoring(action, target_ids):
+            targets = st.session_state.config['targets']
+            indexes = [i for i, target in enumerate(targets) if target['id'] in target_ids]
+            if action in ('stop', 'restart'):
+                running = [i for i in indexes if is_monitoring(targets[i])]
+                for i in running:
+                    stop_monitoring(i, persist=False)
+                if action == 'restart':
+                    indexes = running
+            if action in ('start', 'restart'):
+                pending = [i for i in indexes if not is_monitoring(targets[i])]
+                delays = staggered_delays([targets[i]['polling_interval'] for i in pending])
+                for i, delay in zip(pending, delays):
+                    start_monitoring(i, initial_delay=delay, persist=False)
+            save_config()
+            add_log(f"Bulk {action} applied to {len(indexes)} targets")
+
+        # サイドバー（設定）
+        with st.sidebar, profiler.section("sidebar"):
+            st.header("⚙️ Target Management")
+            st.text("Welcome " + st.session_state['name'] + "!")
+            authenticator.logout("Logout")
+
+            # リーダー選出の状態表示
+            if monitor_mode == 'external':
+                st.caption("🛰️ Monitoring runs in the headless monitor")
+            elif elector.is_leader:
+                st.caption(f"🗳️ Leader replica: {elector.identity} (this replica)")
+            else:
+                st.caption(f"🗳️ Leader replica: {elector.holder_identity or 'unknown'} / this replica: {elector.identity}")
+        
+            # ターゲット選択
+            target_names = [t['name'] for t in st.session_state.config['targets']]
+            selected_target = st.selectbox(
+                "Select Target", 
+                options=range(len(target_names)),
+                format_func=lambda i: f"{target_names[i]} {'🟢' if is_monitoring(st.session_state.config['targets'][i]) else '🔴'}",
+                key="target_selector",
+                on_change=lambda: setattr(st.session_state, 'selected_target_index', st.session_state.target_selector)
             )
-        )
-        
-        st.number_input(
-            "Polling Interval (seconds)",
-            min_value=10,
-            value=current_target['polling_interval'],
-            key=f"polling_interval_input_{selected_target}",
-            on_change=lambda: st.session_state.config['targets'][selected_target].update(
-                {'polling_interval': st.session_state[f"polling_interval_input_{selected_target}"]}
+        
+            st.session_state.selected_target_index = selected_target
+            current_target = st.session_state.config['targets'][selected_target]
+        
+            # ターゲット操作ボタン
+            col1, col2 = st.columns(2)
+            with col1:
+                st.button("Add New Target", on_click=add_target, type="secondary")
+            with col2:
+                st.button("Delete Target", on_click=lambda: delete_target(st.session_state.selected_target_index), 
+                        type="secondary", disabled=len(st.session_state.config['targets']) <= 1 and selected_target == 0)
+        
+            st.markdown("---")
+        
+            # 選択したターゲットの設定
+            st.subheader(f"Settings for {current_target['name']}")
+        
+            # ターゲット名
+            target_name = st.text_input(
+                "Target Name", 
+                value=current_target['name'],
+                key=f"target_name_{selected_target}"
             )
-        )
-        
-        # 設定保存/読み込みボタン
-        col1, col2 = st.columns(2)
-        with col1:
-            st.button("Save Config", on_click=save_config)
-        with col2:
-            st.button("Load Config", on_click=load_config)
-        
-        st.markdown("---")
-        
-        # モニタリング状態表示
-        st.subheader("Monitoring Status")
-        if current_target['id'] in st.session_state.is_monitoring and st.session_state.is_monitoring[current_target['id']]:
-            st.success("Monitoring is active")
-        else:
-            st.warning("Monitoring is inactive")
-
-        # モニタリング開始/停止ボタン
-
-        target_id = current_target['id']
-        if target_id in st.session_state.is_monitoring and st.session_state.is_monitoring[target_id]:
-            st.button("Stop Monitoring", on_click=lambda: stop_monitoring(selected_target), type="primary")
-        else:
-            st.button("Start Monitoring", on_click=lambda: start_monitoring(selected_target), type="primary")
-
-    # メインコンテンツ
-    tab1, tab2, tab3, tab4 = st.tabs(["Release Monitor", "Release History", "K8s Status", "Logs"])
-
-    # タブ1: リリースモニター
-    with tab1:
-        selected_target = st.session_state.selected_target_index
-        current_target = st.session_state.config['targets'][selected_target]
-        target_id = current_target['id']
-        
-        st.subheader(f"Monitor Status: {current_target['name']}")
-        
-        # 現在の監視状態を表示
-        is_active = target_id in st.session_state.is_monitoring and st.session_state.is_monitoring[target_id]
-        status = "🟢 Active" if is_active else "🔴 Inactive"
-        st.info(f"Monitoring Status: {status}")
-        
-        # スレッドからの新しいリリース情報を確認して更新
-        if target_id in shared_monitoring_state and f"{target_id}_new_release" in shared_monitoring_state and shared_monitoring_state[f"{target_id}_new_release"]:
-            st.session_state.latest_releases[target_id] = shared_monitoring_state[f"{target_id}_latest_release"]
-            st.session_state.release_histories[target_id] = shared_monitoring_state[f"{target_id}_releases"]
-            
-            # configにも最新リリース情報を保存
-            st.session_state.config['targets'][selected_target]['latest_release'] = shared_monitoring_state[f"{target_id}_latest_release"]
-            save_config()  # 設定をファイルに保存
-            
-            shared_monitoring_state[f"{target_id}_new_release"] = False
+            st.session_state.config['targets'][selected_target]['name'] = target_name
         
-        # 最新リリース情報表示
-        st.subheader("Latest Release")
+            # GitHub 設定
+            st.text_input(
+                "GitHub Repository (owner/repo)", 
+                value=current_target['github_repo'],
+                key=f"github_repo_input_{selected_target}",
+                on_change=lambda: st.session_state.config['targets'][selected_target].update(
+                    {'github_repo': st.session_state[f"github_repo_input_{selected_target}"]}
+                )
+            )
         
-        # 手動でリリースを確認するボタン
-        if st.button("Check Releases Now"):
-            if not current_target['github_repo']:
-                st.error(f"GitHub repository must be set for {current_target['name']}")
-            else:
-                releases = get_github_releases(
-                    current_target['github_repo'],
-                    current_target['github_token']
+            # st.text_input(
+            #     "GitHub Token (Optional)", 
+            #     value=current_target['github_token'],
+            #     key=f"github_token_input_{selected_target}",
+            #     type="password",
+            #     on_change=lambda: st.session_state.config['targets'][selected_target].update(
+            #         {'github_token': st.session_state[f"github_token_input_{selected_target}"]}
+            #     )
+            # )
+        
+            # Kubernetes 設定
+            st.text_input(
+                "K8s Namespace", 
+                value=current_target['k8s_namespace'],
+                key=f"k8s_namespace_input_{selected_target}",
+                on_change=lambda: st.session_state.config['targets'][selected_target].update(
+                    {'k8s_namespace': st.session_state[f"k8s_namespace_input_{selected_target}"]}
+                )
+            )
+        
+            st.text_input(
+                "K8s Deployment", 
+                value=current_target['k8s_deployment'],
+                key=f"k8s_deployment_input_{selected_target}",
+                on_change=lambda: st.session_state.config['targets'][selected_target].update(
+                    {'k8s_deployment': st.session_state[f"k8s_deployment_input_{selected_target}"]}
+                )
+            )
+        
+            st.number_input(
+                "Polling Interval (seconds)",
+                min_value=10,
+                value=current_target['polling_interval'],
+                key=f"polling_interval_input_{selected_target}",
+                on_change=lambda: st.session_state.config['targets'][selected_target].update(
+                    {'polling_interval': st.session_state[f"polling_interval_input_{selected_target}"]}
+                )
+            )
+        
+            # ポーリングポリシー（優先度・バックオフ・リリースウィンドウ）
+            with st.expander("Polling Policy"):
+                priorities = list(PRIORITY_MULTIPLIERS)
+                st.selectbox(
+                    "Priority",
+                    options=priorities,
+                    index=priorities.index(current_target.get('priority') or 'normal'),
+                    format_func=lambda p: f"{p} (x{PRIORITY_MULTIPLIERS[p]:g} interval)",
+                    key=f"priority_input_{selected_target}",
+                    on_change=lambda: st.session_state.config['targets'][selected_target].update(
+                        {'priority': st.session_state[f"priority_input_{selected_target}"]}
+                    )
                 )
-                if releases:
-                    st.session_state.latest_releases[target_id] = releases[0]
-                    st.session_state.release_histories[target_id] = releases
-                    
-                    # configにも最新リリース情報を保存
-                    st.session_state.config['targets'][selected_target]['latest_release'] = releases[0]
-                    save_config()  # 設定をファイルに保存
-                    
-                    add_log(f"Successfully fetched releases for {current_target['github_repo']}")
-                    # st.experimental_rerun()
-                else:
-                    st.error("Failed to fetch releases or no releases available")
-        
-        # リリース情報の表示（configからの取得も試みる）
-        latest = None
-        if target_id in st.session_state.latest_releases and st.session_state.latest_releases[target_id]:
-            latest = st.session_state.latest_releases[target_id]
-        elif current_target['latest_release']:
-            latest = current_target['latest_release']
             
-        if latest:
-            st.markdown(f"""
-            ### {latest['name'] or latest['tag_name']}
-            **Tag:** {latest['tag_name']}  
-            **Published At:** {latest['published_at']}  
-            **Description:** {latest['body'][:500] + '...' if len(latest['body']) > 500 else latest['body']}
-            """)
+                st.checkbox(
+                    "Back off when the repository has no recent releases",
+                    value=current_target.get('backoff', True),
+                    key=f"backoff_input_{selected_target}",
+                    on_change=lambda: st.session_state.config['targets'][selected_target].update(
+                        {'backoff': st.session_state[f"backoff_input_{selected_target}"]}
+                    )
+                )
             
-            if latest.get('assets'):
-                st.write("Assets:")
-                for asset in latest['assets']:
-                    st.write(f"- [{asset['name']}]({asset['browser_download_url']})")
-        else:
-            st.write("No release information available")
-
-    # タブ2: リリース履歴
-    with tab2:
-        selected_target = st.session_state.selected_target_index
-        current_target = st.session_state.config['targets'][selected_target]
-        target_id = current_target['id']
-        
-        st.subheader(f"Release History: {current_target['name']}")
-        
-        releases = None
-        # セッション状態から履歴を取得
-        if target_id in st.session_state.release_histories and st.session_state.release_histories[target_id]:
-            releases = st.session_state.release_histories[target_id]
-        
-        if releases:
-            # リリース履歴テーブル
-            release_data = []
-            for release in releases:
-                release_data.append({
-                    "Tag": release['tag_name'],
-                    "Name": release['name'] or release['tag_name'],
-                    "Published At": release['published_at'],
-                    "Actions": release['tag_name']  # ここにアクションボタン用のタグ名を入れる
-                })
+                st.text_area(
+                    "Release windows (cron, one per line)",
+                    value="\n".join(current_target.get('release_windows') or []),
+                    key=f"release_windows_input_{selected_target}",
+                    placeholder="* 9-17 * * 1-5",
+                    on_change=lambda: st.session_state.config['targets'][selected_target].update(
+                        {'release_windows': [
+                            line.strip() for line in st.session_state[f"release_windows_input_{selected_target}"].splitlines()
+                            if line.strip()
+                        ]}
+                    )
+                )
+                for expression in current_target.get('release_windows') or []:
+                    try:
+                        CronSchedule(expression)
+                    except ValueError as e:
+                        st.error(str(e))
             
-            # テーブル表示
-            df_releases = st.dataframe(
-                release_data,
-                column_config={
-                    "Tag": st.column_config.TextColumn("Tag"),
-                    "Name": st.column_config.TextColumn("Name"),
-                    "Published At": st.column_config.DatetimeColumn("Published At"),
-                    "Actions": st.column_config.TextColumn("Actions", width="small")
-                },
-                hide_index=True
+                st.number_input(
+                    "Polling interval during release windows (seconds)",
+                    min_value=10,
+                    value=current_target.get('window_interval') or DEFAULT_WINDOW_INTERVAL,
+                    key=f"window_interval_input_{selected_target}",
+                    on_change=lambda: st.session_state.config['targets'][selected_target].update(
+                        {'window_interval': st.session_state[f"window_interval_input_{selected_target}"]}
+                    )
+                )
+        
+            # イメージダイジェスト比較の設定
+            st.checkbox(
+                "Skip restart when image digest is unchanged",
+                value=current_target.get('digest_check', False),
+                key=f"digest_check_input_{selected_target}",
+                on_change=lambda: st.session_state.config['targets'][selected_target].update(
+                    {'digest_check': st.session_state[f"digest_check_input_{selected_target}"]}
+                )
             )
-            
-            # ロールバック対象の選択
-            selected_version = st.selectbox(
-                "Select version to rollback:",
-                options=["latest"] + [release["tag_name"] for release in releases],
-                format_func=lambda x: f"{x} ({next((r['name'] for r in releases if r['tag_name'] == x), x)})"
+        
+            st.text_input(
+                "Registry URL override (Optional)",
+                value=current_target.get('registry_url', ''),
+                key=f"registry_url_input_{selected_target}",
+                placeholder="http://localhost:5000",
+                disabled=not current_target.get('digest_check', False),
+                on_change=lambda: st.session_state.config['targets'][selected_target].update(
+                    {'registry_url': st.session_state[f"registry_url_input_{selected_target}"]}
+                )
+            )
+        
+            # プレリリースを最新リリースとして扱うかの設定
+            st.checkbox(
+                "Treat prereleases as new releases",
+                value=current_target.get('include_prereleases', False),
+                key=f"include_prereleases_input_{selected_target}",
+                on_change=lambda: st.session_state.config['targets'][selected_target].update(
+                    {'include_prereleases': st.session_state[f"include_prereleases_input_{selected_target}"]}
+                )
             )
+        
+            # 設定保存/読み込みボタン
+            col1, col2 = st.columns(2)
+            with col1:
+                st.button("Save Config", on_click=save_config)
+            with col2:
+                st.button("Load Config", on_click=load_config)
+        
+            st.markdown("---")
+        
+            # モニタリング状態表示
+            st.subheader("Monitoring Status")
+            if is_monitoring(current_target):
+                st.success("Monitoring is active")
+            else:
+                st.warning("Monitoring is inactive")
+
+            # モニタリング開始/停止ボタン
+
+            if is_monitoring(current_target):
+                st.button("Stop Monitoring", on_click=lambda: stop_monitoring(selected_target), type="primary")
+            else:
+                st.button("Start Monitoring", on_click=lambda: start_monitoring(selected_target), type="primary")
+
+        # メインコンテンツ
+        tab1, tab2, tab3, tab4, tab5 = st.tabs(["Release Monitor", "Release History", "K8s Status", "Logs", "Bulk Targets"])
+
+        # タブ1: リリースモニター
+        with tab1, profiler.section("tab:Release Monitor"):
+            selected_target = st.session_state.selected_target_index
+            current_target = st.session_state.config['targets'][selected_target]
+            target_id = current_target['id']
+        
+            st.subheader(f"Monitor Status: {current_target['name']}")
+        
+            # 現在の監視状態を表示
+            is_active = is_monitoring(current_target)
+            status = "🟢 Active" if is_active else "🔴 Inactive"
+            st.info(f"Monitoring Status: {status}")
+        
+            # ポーリングポリシーで決まった次回チェックまでの間隔
+            next_poll = shared_monitoring_state.get(f"{target_id}_next_poll")
+            if is_active and next_poll:
+                st.caption(f"Next check in {max(0, int(next_poll['at'] - time.time()))}s (every {next_poll['interval']}s: {next_poll['reason']})")
+        
+            # スレッドからの新しいリリース情報を確認して更新
+            if target_id in shared_monitoring_state and f"{target_id}_new_release" in shared_monitoring_state and shared_monitoring_state[f"{target_id}_new_release"]:
+                # configにも最新リリース情報を保存
+                latest_release = release_cache.get(LATEST, target_id)
+                if latest_release:
+                    st.session_state.config['targets'][selected_target]['latest_release'] = latest_release
+                    save_config()  # 設定をファイルに保存
             
-            if st.button("Execute Rollback"):
-                rollback_to_version(selected_target, selected_version)
-        else:
-            # リリース履歴取得ボタン
-            if st.button("Fetch Release History"):
+                shared_monitoring_state[f"{target_id}_new_release"] = False
+        
+            # フォロワーのレプリカやヘッドレスモニター使用時は、共有状態に書き込まれたリリース情報を表示
+            if monitor_mode == 'external' or not elector.is_leader:
+                with profiler.call("state_store.load"):
+                    shared_entry = state_store.load().get(target_id) or {}
+                if shared_entry.get('latest_release'):
+                    release_cache.put(LATEST, target_id, shared_entry['latest_release'])
+        
+            # 最新リリース情報表示
+            st.subheader("Latest Release")
+        
+            # 手動でリリースを確認するボタン
+            if st.button("Check Releases Now"):
                 if not current_target['github_repo']:
                     st.error(f"GitHub repository must be set for {current_target['name']}")
                 else:
-                    releases = get_github_releases(
+                    index = ReleaseIndex.from_github(fetch_github_releases(
                         current_target['github_repo'],
                         current_target['github_token']
-                    )
-                    if releases:
-                        st.session_state.release_histories[target_id] = releases
-                        
-                        # 最新リリースも更新
-                        st.session_state.latest_releases[target_id] = releases[0]
-                        st.session_state.config['targets'][selected_target]['latest_release'] = releases[0]
-                        save_config()
-                        
-                        add_log(f"Successfully fetched release history for {current_target['github_repo']}")
+                    ))
+                    latest_release = index.latest(current_target.get('include_prereleases', False))
+                    if latest_release:
+                        release_cache.put_index(target_id, index, latest_release)
+                    
+                        # configにも最新リリース情報を保存
+                        st.session_state.config['targets'][selected_target]['latest_release'] = latest_release
+                        save_config()  # 設定をファイルに保存
+                        save_target_releases(target_id, index.releases)
+                    
+                        add_log(f"Successfully fetched releases for {current_target['github_repo']}")
+                        # st.experimental_rerun()
                     else:
                         st.error("Failed to fetch releases or no releases available")
+        
+            # リリース情報の表示（configからの取得も試みる）
+            latest = release_cache.get(LATEST, target_id) or current_target['latest_release']
+            
+            if latest:
+                st.markdown(f"""
+                ### {latest['name'] or latest['tag_name']}
+                **Tag:** {latest['tag_name']}  
+                **Published At:** {latest['published_at']}  
+                **Description:** {latest['body'][:500] + '...' if len(latest['body']) > 500 else latest['body']}
+                """)
+            
+                if latest.get('assets'):
+                    st.write("Assets:")
+                    for asset in latest['assets']:
+                        st.write(f"- [{asset['name']}]({asset['browser_download_url']})")
             else:
-                st.write("No release history available")
-
-    # タブ3: Kubernetesステータス
-    with tab3:
-        selected_target = st.session_state.selected_target_index
-        current_target = st.session_state.config['targets'][selected_target]
-        target_id = current_target['id']
-        
-        st.subheader(f"Kubernetes Status: {current_target['name']}")
-        
-        if not current_target['k8s_namespace'] or not current_target['k8s_deployment']:
-            st.warning("Kubernetes namespace and deployment must be set to view status")
-        else:
-            # ステータス取得ボタン
-            status_col1, status_col2 = st.columns([3, 1])
-            with status_col2:
-                refresh_status = st.button("Refresh Status")
+                st.write("No release information available")
+
+        # タブ2: リリース履歴
+        with tab2, profiler.section("tab:Release History"):
+            selected_target = st.session_state.selected_target_index
+            current_target = st.session_state.config['targets'][selected_target]
+            target_id = current_target['id']
+        
+            st.subheader(f"Release History: {current_target['name']}")
+        
+            # 共有キャッシュから履歴のインデックスを取得（削除済みの場合は release_state.json から読み直す）
+            index = release_cache.index(target_id)
+        
+            if index:
+                # 表示するリリースの種類
+                filter_col1, filter_col2 = st.columns(2)
+                with filter_col1:
+                    show_prereleases = st.checkbox("Show prereleases", value=True, key=f"show_prereleases_{target_id}")
+                with filter_col2:
+                    show_drafts = st.checkbox("Show drafts", value=False, key=f"show_drafts_{target_id}")
+                releases = index.filtered(show_prereleases, show_drafts)
             
-            with status_col1:
-                st.write(f"**Deployment:** {current_target['k8s_deployment']} in namespace {current_target['k8s_namespace']}")
+                # リリース履歴テーブル（バージョンの新しい順）
+                release_data = []
+                for release in releases:
+                    release_data.append({
+                        "Tag": release['tag_name'],
+                        "Name": release['name'] or release['tag_name'],
+                        "Published At": release['published_at'],
+                        "Type": "Draft" if release.get('draft') else "Prerelease" if release.get('prerelease') else "Release",
+                        "Actions": release['tag_name']  # ここにアクションボタン用のタグ名を入れる
+                    })
             
-            # ステータス情報の取得と表示
-            if refresh_status or 'k8s_status' not in st.session_state:
-                st.session_state.k8s_status = {}
+                # テーブル表示
+                df_releases = st.dataframe(
+                    release_data,
+                    column_config={
+                        "Tag": st.column_config.TextColumn("Tag"),
+                        "Name": st.column_config.TextColumn("Name"),
+                        "Published At": st.column_config.DatetimeColumn("Published At"),
+                        "Type": st.column_config.TextColumn("Type", width="small"),
+                        "Actions": st.column_config.TextColumn("Actions", width="small")
+                    },
+                    hide_index=True
+                )
             
-            status = get_deployment_status(
-                current_target['k8s_namespace'], 
-                current_target['k8s_deployment']
-            )
+                # ロールバック対象の選択
+                selected_version = st.selectbox(
+                    "Select version to rollback:",
+                    options=["latest"] + [release["tag_name"] for release in releases],
+                    format_func=index.label
+                )
+            
+                if st.button("Execute Rollback"):
+                    rollback_to_version(selected_target, selected_version, index)
+            else:
+                # リリース履歴取得ボタン
+                if st.button("Fetch Release History"):
+                    if not current_target['github_repo']:
+                        st.error(f"GitHub repository must be set for {current_target['name']}")
+                    else:
+                        index = ReleaseIndex.from_github(fetch_github_releases(
+                            current_target['github_repo'],
+                            current_target['github_token']
+                        ))
+                        latest_release = index.latest(current_target.get('include_prereleases', False))
+                        if latest_release:
+                            # 履歴と最新リリースを更新
+                            release_cache.put_index(target_id, index, latest_release)
+                            st.session_state.config['targets'][selected_target]['latest_release'] = latest_release
+                            save_config()
+                            save_target_releases(target_id, index.releases)
+                        
+                            add_log(f"Successfully fetched release history for {current_target['github_repo']}")
+                        else:
+                            st.error("Failed to fetch releases or no releases available")
+                else:
+                    st.write("No release history available")
+
+        # タブ3: Kubernetesステータス
+        with tab3, profiler.section("tab:K8s Status"):
+            selected_target = st.session_state.selected_target_index
+            current_target = st.session_state.config['targets'][selected_target]
+            target_id = current_target['id']
+        
+            st.subheader(f"Kubernetes Status: {current_target['name']}")
+        
+            if not current_target['k8s_namespace'] or not current_target['k8s_deployment']:
+                st.warning("Kubernetes namespace and deployment must be set to view status")
+            else:
+                # ステータス取得ボタン
+                status_col1, status_col2 = st.columns([3, 1])
+                with status_col2:
+                    refresh_status = st.button("Refresh Status")
+            
+                with status_col1:
+                    st.write(f"**Deployment:** {current_target['k8s_deployment']} in namespace {current_target['k8s_namespace']}")
             
-            if status:
-                st.session_state.k8s_status[target_id] = status
+                # ステータス情報の取得と表示
+                if refresh_status:
+                    release_cache.discard(target_id, K8S_STATUS)
+            
+                status = get_deployment_status(
+                    current_target['k8s_namespace'], 
+                    current_target['k8s_deployment']
+                )
+            
+                if status:
+                    release_cache.put(K8S_STATUS, target_id, status)
                 
-                # デプロイメント概要情報
-                st.subheader("Deployment Overview")
-                col1, col2, col3 = st.columns(3)
-                with col1:
-                    st.metric("Desired Replicas", status["replicas"]["desired"])
-                with col2:
-                    st.metric("Available Replicas", status["replicas"]["available"])
-                with col3:
-                    st.metric("Ready Replicas", status["replicas"]["ready"])
+                    # デプロイメント概要情報
+                    st.subheader("Deployment Overview")
+                    col1, col2, col3 = st.columns(3)
+                    with col1:
+                        st.metric("Desired Replicas", status["replicas"]["desired"])
+                    with col2:
+                        st.metric("Available Replicas", status["replicas"]["available"])
+                    with col3:
+                        st.metric("Ready Replicas", status["replicas"]["ready"])
                 
-                # ストラテジーとタイムスタンプ情報
-                st.write(f"**Strategy:** {status['strategy']}")
-                st.write(f"**Created:** {status['created_at']}")
-                if status['updated_at']:
-                    st.write(f"**Last Updated:** {status['updated_at']}")
+                    # ストラテジーとタイムスタンプ情報
+                    st.write(f"**Strategy:** {status['strategy']}")
+                    st.write(f"**Created:** {status['created_at']}")
+                    if status['updated_at']:
+                        st.write(f"**Last Updated:** {status['updated_at']}")
                 
-                # イメージ情報
-                st.subheader("Container Images")
-                for image in status["images"]:
-                    image_name = image["image"]
-                    # イメージタグ（バージョン）の抽出
-                    image_tag = image_name.split(":")[-1] if ":" in image_name else "latest"
-                    st.info(f"**{image['name']}**: `{image_name}` (Tag: **{image_tag}**)")
+                    # イメージ情報
+                    st.subheader("Container Images")
+                    for image in status["images"]:
+                        image_name = image["image"]
+                        # イメージタグ（バージョン）の抽出
+                        image_tag = image_name.split(":")[-1] if ":" in image_name else "latest"
+                        st.info(f"**{image['name']}**: `{image_name}` (Tag: **{image_tag}**)")
                 
-                # ポッド情報
-                st.subheader("Pods")
-                if status["pods"]:
-                    # ポッドの概要情報をテーブルで表示
-                    pod_data = []
-                    for pod in status["pods"]:
-                        pod_status = "✅ Running" if pod["phase"] == "Running" else f"⚠️ {pod['phase']}"
+                    # ポッド情報テーブルとイベントタイムラインを並べて表示
+                    # （ポッドが作成できない場合の FailedCreate なども見えるよう、イベントはポッドの有無に関係なく表示）
+                    st.subheader("Pods")
+                    pods_col, events_col = st.columns([3, 2])
+                    with events_col:
+                        st.markdown("**Events**")
+                        render_event_timeline(target_id, current_target['k8s_namespace'], current_target['k8s_deployment'])
+                    if not status["pods"]:
+                        with pods_col:
+                            st.warning("No pods found for this deployment")
+                    else:
+                        # ポッドの概要情報をテーブルで表示
+                        pod_data = []
+                        for pod in status["pods"]:
+                            pod_status = "✅ Running" if pod["phase"] == "Running" else f"⚠️ {pod['phase']}"
                         
-                        # コンテナの状態を集約
-                        containers_ready = all(c["ready"] for c in pod["containers"])
-                        container_status = "✅ Ready" if containers_ready else "⚠️ Not Ready"
+                            # コンテナの状態を集約
+                            containers_ready = all(c["ready"] for c in pod["containers"])
+                            container_status = "✅ Ready" if containers_ready else "⚠️ Not Ready"
                         
-                        # リスタート回数を計算
-                        total_restarts = sum(c["restarts"] for c in pod["containers"])
+                            # リスタート回数を計算
+                            total_restarts = sum(c["restarts"] for c in pod["containers"])
                         
-                        pod_data.append({
-                            "Pod Name": pod["name"],
-                            "Status": pod_status,
-                            "Containers": container_status,
-                            "Restarts": total_restarts,
-                            "IP": pod["ip"] or "N/A",
-                            "Node": pod["node"] or "N/A",
-                            "Start Time": pod["start_time"]
-                        })
+                            pod_data.append({
+                                "Pod Name": pod["name"],
+                                "Status": pod_status,
+                                "Containers": container_status,
+                                "Restarts": total_restarts,
+                                "IP": pod["ip"] or "N/A",
+                                "Node": pod["node"] or "N/A",
+                                "Start Time": pod["start_time"]
+                            })
                     
-                    # ポッド情報テーブル
-                    st.dataframe(
-                        pod_data,
-                        column_config={
-                            "Pod Name": st.column_config.TextColumn("Pod Name"),
-                            "Status": st.column_config.TextColumn("Status"),
-                            "Containers": st.column_config.TextColumn("Containers"),
-                            "Restarts": st.column_config.NumberColumn("Restarts"),
-                            "IP": st.column_config.TextColumn("IP"),
-                            "Node": st.column_config.TextColumn("Node"),
-                            "Start Time": st.column_config.DatetimeColumn("Start Time")
-                        },
-                        hide_index=True
-                    )
+                        with pods_col:
+                            st.dataframe(
+                                pod_data,
+                                column_config={
+                                    "Pod Name": st.column_config.TextColumn("Pod Name"),
+                                    "Status": st.column_config.TextColumn("Status"),
+                                    "Containers": st.column_config.TextColumn("Containers"),
+                                    "Restarts": st.column_config.NumberColumn("Restarts"),
+                                    "IP": st.column_config.TextColumn("IP"),
+                                    "Node": st.column_config.TextColumn("Node"),
+                                    "Start Time": st.column_config.DatetimeColumn("Start Time")
+                                },
+                                hide_index=True
+                            )
                     
-                    # ポッド詳細情報（展開可能）
-                    for i, pod in enumerate(status["pods"]):
-                        with st.expander(f"Pod Details: {pod['name']}"):
-                            st.write(f"**Phase:** {pod['phase']}")
-                            st.write(f"**IP:** {pod['ip'] or 'N/A'}")
-                            st.write(f"**Node:** {pod['node'] or 'N/A'}")
-                            st.write(f"**Start Time:** {pod['start_time']}")
+                        # ポッド詳細情報（展開可能）
+                        for i, pod in enumerate(status["pods"]):
+                            with st.expander(f"Pod Details: {pod['name']}"):
+                                st.write(f"**Phase:** {pod['phase']}")
+                                st.write(f"**IP:** {pod['ip'] or 'N/A'}")
+                                st.write(f"**Node:** {pod['node'] or 'N/A'}")
+                                st.write(f"**Start Time:** {pod['start_time']}")
                             
-                            st.subheader("Containers")
-                            for container in pod["containers"]:
-                                container_status = "✅ Ready" if container["ready"] else "⚠️ Not Ready"
-                                st.markdown(f"""
-                                **{container['name']}**: {container_status}
-                                - **Image:** `{container['image']}`
-                                - **Image ID:** `{container['image_id']}`
-                                - **Restarts:** {container['restarts']}
-                                """)
+                                st.subheader("Containers")
+                                for container in pod["containers"]:
+                                    container_status = "✅ Ready" if container["ready"] else "⚠️ Not Ready"
+                                    st.markdown(f"""
+                                    **{container['name']}**: {container_status}
+                                    - **Image:** `{container['image']}`
+                                    - **Image ID:** `{container['image_id']}`
+                                    - **Restarts:** {container['restarts']}
+                                    """)
+                    
+                        # ポッドログ
+                        st.subheader("Pod Logs")
+                        log_options = [
+                            f"{pod['name']}/{container['name']}"
+                            for pod in status["pods"]
+                            for container in pod["containers"]
+                        ]
+                        log_selections = st.multiselect(
+                            "Follow logs for pods/containers",
+                            options=log_options,
+                            key=f"log_selection_{target_id}",
+                            max_selections=50
+                        )
+                        release_deselected_logs(target_id, current_target['k8s_namespace'], log_selections)
+                        if log_selections:
+                            col1, col2 = st.columns([3, 1])
+                            with col2:
+                                if st.button("Reconnect Streams"):
+                                    # 終了・エラーになったストリームを再接続
+                                    multiplexer = get_pod_log_multiplexer()
+                                    for selection in log_selections:
+                                        pod_name, container_name = selection.split("/", 1)
+                                        stream = multiplexer.get(current_target['k8s_namespace'], pod_name, container_name)
+                                        if stream is not None and stream.status not in ("connecting", "streaming"):
+                                            multiplexer.follow(current_target['k8s_namespace'], pod_name, container_name, get_log_viewer_id())
+                            render_pod_logs(current_target['k8s_namespace'], log_selections)
                 else:
-                    st.warning("No pods found for this deployment")
-            else:
-                st.error("Failed to get deployment status. Make sure your Kubernetes configuration is correct and the deployment exists.")
+                    st.error("Failed to get deployment status. Make sure your Kubernetes configuration is correct and the deployment exists.")
                 
-                # 最後に取得したステータスがある場合は表示
-                if target_id in st.session_state.k8s_status:
-                    st.info("Showing last known status:")
-                    st.json(st.session_state.k8s_status[target_id])
-                else:
-                    st.warning("No status information available")
+                    # 最後に取得したステータスがある場合は表示
+                    last_status = release_cache.get(K8S_STATUS, target_id)
+                    if last_status is not None:
+                        st.info("Showing last known status:")
+                        st.json(last_status)
+                    else:
+                        st.warning("No status information available")
 
-    # タブ4: ログ
-    with tab4:
-        st.subheader("Logs")
-        log_container = st.container()
+        # タブ4: ログ
+        with tab4, profiler.section("tab:Logs"):
+            st.subheader("Logs")
+            log_container = st.container()
             
-        if st.button("Clear Logs"):
-            st.session_state.logs = []
-            # 最新のログを表示
-        with log_container:
-            logs_text = "\n".join(st.session_state.logs)
-            st.text_area("Application Logs", logs_text, height=400)
+            if st.button("Clear Logs"):
+                st.session_state.logs = []
+                # 最新のログを表示
+            with log_container:
+                logs_text = "\n".join(st.session_state.logs)
+                st.text_area("Application Logs", logs_text, height=400)
+
+        # タブ5: ターゲットの一括操作
+        with tab5, profiler.section("tab:Bulk Targets"):
+            targets = st.session_state.config['targets']
+            st.subheader("Bulk Targets")
+        
+            # インポート・エクスポート（GitHub Token はエクスポートしない）
+            export_col, import_col = st.columns(2)
+            with export_col:
+                st.markdown("**Export**")
+                export_format = st.radio("Format", ["yaml", "csv"], horizontal=True, key="bulk_export_format")
+                st.download_button(
+                    "Download Targets",
+                    data=export_targets(targets, export_format),
+                    file_name=f"targets.{export_format}",
+                    mime="text/csv" if export_format == "csv" else "application/x-yaml"
+                )
+            with import_col:
+                st.markdown("**Import**")
+                st.file_uploader("Targets file (YAML or CSV)", type=["yaml", "yml", "csv"], key="bulk_import_file")
+                st.button(
+                    "Import Targets",
+                    on_click=import_targets_file,
+                    disabled=st.session_state.get('bulk_import_file') is None
+                )
+                if st.session_state.get('bulk_import_error'):
+                    st.error(st.session_state.bulk_import_error)
+        
+            st.markdown("---")
+        
+            # 一括操作の対象を絞り込むフィルター
+            filter_col1, filter_col2, filter_col3, filter_col4 = st.columns(4)
+            with filter_col1:
+                bulk_query = st.text_input("Name or repository contains", key="bulk_query")
+            with filter_col2:
+                bulk_namespaces = st.multiselect(
+                    "Namespaces",
+                    options=sorted({target['k8s_namespace'] for target in targets if target.get('k8s_namespace')}),
+                    key="bulk_namespaces"
+                )
+            with filter_col3:
+                bulk_priorities = st.multiselect("Priorities", options=list(PRIORITY_MULTIPLIERS), key="bulk_priorities")
+            with filter_col4:
+                bulk_status = st.selectbox("Status", ["All", "Active", "Inactive"], key="bulk_status")
+        
+            matched = [
+                targets[i] for i in filter_targets(
+                    targets,
+                    bulk_query,
+                    bulk_namespaces,
+                    bulk_priorities,
+                    None if bulk_status == "All" else bulk_status == "Active"
+                )
+            ]
+            matched_ids = [target['id'] for target in matched]
+        
+            st.write(f"{len(matched)} of {len(targets)} targets selected")
+            st.dataframe(
+                [
+                    {
+                        "Name": target['name'],
+                        "Repository": target['github_repo'],
+                        "Namespace": target['k8s_namespace'],
+                        "Deployment": target['k8s_deployment'],
+                        "Priority": target.get('priority') or 'normal',
+                        "Status": "🟢 Active" if is_monitoring(target) else "🔴 Inactive"
+                    }
+                    for target in matched
+                ],
+                hide_index=True
+            )
+        
+            # 絞り込んだターゲットへの一括操作
+            action_col1, action_col2, action_col3, action_col4 = st.columns(4)
+            with action_col1:
+                st.button("Start Selected", on_click=batch_monitoring, args=('start', matched_ids), disabled=not matched)
+            with action_col2:
+                st.button("Stop Selected", on_click=batch_monitoring, args=('stop', matched_ids), disabled=not matched)
+            with action_col3:
+                # ヘッドレスモニターは設定の変更でしか再起動できないため、組み込みモードのみ
+                st.button(
+                    "Restart Selected",
+                    on_click=batch_monitoring,
+                    args=('restart', matched_ids),
+                    disabled=not matched or monitor_mode == 'external'
+                )
+            with action_col4:
+                validate_clicked = st.button("Validate Selected", disabled=not matched)
+        
+            # リポジトリとデプロイメントの存在を並行して確認
+            if validate_clicked:
+                load_k8s_config()
+                with st.spinner(f"Validating {len(matched)} targets..."), profiler.call("bulk.validate"):
+                    st.session_state.bulk_validation = validate_targets(
+                        matched,
+                        workers=int(os.environ.get('BULK_VALIDATION_WORKERS', '8'))
+                    )
+        
+            if st.session_state.get('bulk_validation'):
+                results = st.session_state.bulk_validation
+                problems = [result for result in results if result['repo_error'] or result['deployment_error']]
+                if problems:
+                    st.error(f"{len(problems)} of {len(results)} validated targets have missing or unreachable repositories/deployments")
+                else:
+                    st.success(f"All {len(results)} validated targets have a repository and deployment")
+                st.dataframe(
+                    [
+                        {
+                            "Name": result['name'],
+                            "Repository": "✅" if not result['repo_error'] else f"⚠️ {result['repo_error']}",
+                            "Deployment": "✅" if not result['deployment_error'] else f"⚠️ {result['deployment_error']}"
+                        }
+                        for result in (problems or results)
+                    ],
+                    hide_index=True
+                )
+    except BaseException:
+        # 中断された再実行（RerunException など）でも cProfile を必ず停止する
+        profiler.abort_rerun()
+        raise
+    profiler.end_rerun()
+
+    # プロファイリングパネル（管理者のみ）
+    if profiler.enabled:
+        with st.expander("⏱️ Rerun Profiling"):
+            st.caption(f"Last {profiler.reruns} reruns of this session (call:* are GitHub/Kubernetes/file calls within the sections)")
+            st.dataframe(
+                [
+                    {
+                        "Section": row["section"],
+                        "Reruns": row["count"],
+                        "p50 (ms)": row["p50"] * 1000,
+                        "p95 (ms)": row["p95"] * 1000,
+                        "Last (ms)": row["last"] * 1000 if row["last"] is not None else None
+                    }
+                    for row in profiler.summary()
+                ],
+                column_config={
+                    "p50 (ms)": st.column_config.NumberColumn("p50 (ms)", format="%.1f"),
+                    "p95 (ms)": st.column_config.NumberColumn("p95 (ms)", format="%.1f"),
+                    "Last (ms)": st.column_config.NumberColumn("Last (ms)", format="%.1f")
+                },
+                hide_index=True
+            )
+            col1, col2 = st.columns(2)
+            with col1:
+                st.button(
+                    "Capture cProfile of next rerun",
+                    on_click=lambda: setattr(profiler, 'capture_next', True),
+                    disabled=profiler.capture_next
+                )
+                if profiler.capture_error:
+                    st.caption(f"⚠️ {profiler.capture_error}")
+            with col2:
+                if profiler.last_capture:
+                    st.download_button(
+                        "Download pstats",
+                        data=profiler.last_capture,
+                        file_name=f"rerun-{datetime.now().strftime('%Y%m%d-%H%M%S')}.pstats",
+                        mime="application/octet-stream"
+                    )
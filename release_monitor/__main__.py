@@ -0,0 +1,94 @@
+import argparse
+import os
+import signal
+import sys
+import threading
+from datetime import datetime
+
+from release_monitor.monitor import (
+    MonitorService,
+    create_config_store,
+    create_coordination,
+    get_background_service,
+    load_k8s_config,
+    watch_config,
+)
+
+
+# ログ出力関数（タイムスタンプ付きで標準出力へ）
+def log(message):
+    timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    print(f"[{timestamp}] {message}", flush=True)
+
+
+# ヘッドレスモニター: Streamlit を読み込まずにポーリングと再起動だけを実行する
+#
+# 設定（config.json またはレプリカ間で共有する ConfigMap）の変更は reload_interval ごとに検出し、
+# ダッシュボードからの開始・停止や設定変更を反映する。
+def run_monitor(args):
+    stop_event = threading.Event()
+    for signum in (signal.SIGTERM, signal.SIGINT):
+        signal.signal(signum, lambda *_: stop_event.set())
+
+    # デプロイメントの再起動に必要な Kubernetes 設定を読み込む
+    load_k8s_config(log)
+    elector, state_store = create_coordination(log)
+    config_store = create_config_store(getattr(elector, 'namespace', None), args.config)
+    service = MonitorService(elector, state_store, log, config_store=config_store)
+
+    try:
+        watch_config(service, stop_event, args.reload_interval)
+    finally:
+        log("Stopping monitor")
+        service.stop_all()
+        elector.stop()
+    return 0
+
+
+# ダッシュボード: Streamlit を起動する前にモニタリングサービスを開始する
+#
+# 組み込みモードではリーダー選出とアクティブなターゲットの監視がプロセスの起動時に始まり、
+# ブラウザのセッションが無くても続く。アプリは同じプロセス内のサービスを使う。
+def run_dashboard(args):
+    if os.environ.get('MONITOR_MODE', 'embedded').lower() != 'external':
+        load_k8s_config(log)
+        get_background_service(log)
+    from streamlit.web import cli
+    return cli.main(["run", args.script, *args.streamlit_args], prog_name="streamlit")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m release_monitor")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    monitor_parser = subparsers.add_parser("monitor", help="run release monitoring without the Streamlit UI")
+    monitor_parser.add_argument(
+        "--config",
+        default=None,
+        help="path to config.json (default: $CONFIG_PATH/config.json; initial contents of the ConfigMap with leader election)"
+    )
+    monitor_parser.add_argument(
+        "--reload-interval",
+        type=float,
+        default=10,
+        help="seconds between checks for configuration changes"
+    )
+
+    dashboard_parser = subparsers.add_parser("dashboard", help="start monitoring, then run the Streamlit dashboard")
+    dashboard_parser.add_argument("script", nargs="?", default="app.py", help="Streamlit script (default: app.py)")
+    dashboard_parser.add_argument(
+        "streamlit_args",
+        nargs=argparse.REMAINDER,
+        help="arguments passed to streamlit run"
+    )
+
+    args = parser.parse_args(argv)
+    if args.command == "monitor":
+        return run_monitor(args)
+    if args.command == "dashboard":
+        return run_dashboard(args)
+    return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
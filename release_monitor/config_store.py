@@ -0,0 +1,284 @@
+import base64
+import copy
+import json
+import os
+import tempfile
+import threading
+
+from release_monitor.lazy_import import lazy_import
+
+# kubernetes クライアントは初回使用時にインポートする
+k8s = lazy_import("kubernetes")
+
+CONFIG_KEY = "config.json"
+TOKENS_KEY = "tokens.json"
+
+# ConfigMap には保存せず、Secret に分けて保存するターゲットのフィールド
+TOKEN_FIELD = "github_token"
+
+# ConfigMap の更新が他のレプリカと競合した場合の再試行回数
+UPDATE_RETRIES = 5
+
+
+# config.json のパスを取得する関数
+def config_path():
+    config_dir = os.environ.get('CONFIG_PATH', '')
+    return os.path.join(config_dir, 'config.json') if config_dir else 'config.json'
+
+
+# 空いているターゲット ID を返す関数
+def _unused_target_id(used):
+    number = len(used) + 1
+    while f'target{number}' in used:
+        number += 1
+    return f'target{number}'
+
+
+# セッションで編集した設定を、保存時点の最新の設定にマージする関数（3方向マージ）
+#
+# base はセッションが最後に読み込んだ（または保存した）設定。セッションが base から変更した
+# ターゲットとフィールドだけを current に反映し、他のセッションやモニターの変更はそのまま残す。
+# セッションが削除したターゲットは削除し、追加したターゲットは末尾に追加する（ID が重なれば振り直す）。
+def merge_config(base, local, current):
+    base = base or {}
+    current = current or {}
+    base_targets = {target['id']: target for target in base.get('targets', [])}
+    local_targets = {target['id']: target for target in local.get('targets', [])}
+
+    merged = {key: value for key, value in current.items() if key != 'targets'}
+    for key, value in local.items():
+        if key != 'targets' and value != base.get(key):
+            merged[key] = value
+
+    targets = []
+    for target in current.get('targets', []):
+        target_id = target['id']
+        if target_id in base_targets and target_id not in local_targets:
+            continue
+        target = dict(target)
+        if target_id in base_targets:
+            base_target, local_target = base_targets[target_id], local_targets[target_id]
+            for key in set(base_target) | set(local_target):
+                if local_target.get(key) != base_target.get(key):
+                    if key in local_target:
+                        target[key] = local_target[key]
+                    else:
+                        target.pop(key, None)
+        targets.append(target)
+
+    used = {target['id'] for target in targets}
+    for target in local.get('targets', []):
+        if target['id'] in base_targets:
+            continue
+        target = dict(target)
+        if target['id'] in used:
+            target['id'] = _unused_target_id(used)
+        used.add(target['id'])
+        targets.append(target)
+
+    merged['targets'] = targets
+    return copy.deepcopy(merged)
+
+
+# 設定からトークンを取り除き、(トークンを除いた設定, {ターゲットID: トークン}) を返す関数
+def split_tokens(config):
+    if config is None:
+        return None, {}
+    config = copy.deepcopy(config)
+    tokens = {}
+    for target in config.get('targets', []):
+        token = target.pop(TOKEN_FIELD, None)
+        if token:
+            tokens[target['id']] = token
+    return config, tokens
+
+
+# split_tokens で取り除いたトークンを設定に戻す関数
+def join_tokens(config, tokens):
+    if config is None:
+        return None
+    for target in config.get('targets', []):
+        if target['id'] in tokens:
+            target[TOKEN_FIELD] = tokens[target['id']]
+    return config
+
+
+# ターゲット設定をファイル（config.json）に保存するストア（単一レプリカ用）
+#
+# version() はファイルの更新時刻で、ヘッドレスモニターはこれで設定の変更を検出する。
+# 書き込みは一時ファイルに書いてから置き換えるため、読み込み側が書きかけのファイルを読むことはない。
+class FileConfigStore:
+    def __init__(self, path=None):
+        self.path = path or config_path()
+        self._lock = threading.Lock()
+
+    # 設定を読み込む関数（存在しない場合は None）
+    def load(self):
+        if not os.path.exists(self.path):
+            return None
+        with open(self.path, 'r') as f:
+            return json.load(f)
+
+    def save(self, config):
+        self.update(lambda current: config)
+
+    # 最新の設定を読み込み、func(current) の結果を保存する関数（保存した設定を返す）
+    def update(self, func):
+        with self._lock:
+            config = func(self.load())
+            directory = os.path.dirname(os.path.abspath(self.path))
+            fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.config.')
+            try:
+                with os.fdopen(fd, 'w') as f:
+                    json.dump(config, f, indent=2)
+                os.replace(tmp_path, self.path)
+            except BaseException:
+                os.unlink(tmp_path)
+                raise
+            return config
+
+    def version(self):
+        try:
+            return os.path.getmtime(self.path)
+        except OSError:
+            return None
+
+
+# レプリカ間でターゲット設定を共有するための ConfigMap ストア
+#
+# 全レプリカのダッシュボードとモニターが同じ設定を読み書きする。
+# ConfigMap がまだ無い場合は、ローカルの config.json（seed_path）の内容で作成する。
+# GitHub トークンは ConfigMap には保存せず、Secret（secret_name）にターゲット ID ごとに保存する。
+# version() は ConfigMap と Secret の resourceVersion で、update() はこれを使った楽観的排他制御で書き込む。
+class ConfigMapConfigStore:
+    def __init__(self, name, namespace, api=None, seed_path=None, secret_name=None):
+        self.name = name
+        self.namespace = namespace
+        self.seed_path = seed_path
+        self.secret_name = secret_name or f"{name}-tokens"
+        self._api = api
+
+    @property
+    def api(self):
+        if self._api is None:
+            self._api = k8s.client.CoreV1Api()
+        return self._api
+
+    def _read(self):
+        try:
+            return self.api.read_namespaced_config_map(self.name, self.namespace)
+        except k8s.client.rest.ApiException as e:
+            if e.status == 404:
+                return None
+            raise
+
+    def _read_secret(self):
+        try:
+            return self.api.read_namespaced_secret(self.secret_name, self.namespace)
+        except k8s.client.rest.ApiException as e:
+            if e.status == 404:
+                return None
+            raise
+
+    @staticmethod
+    def _parse(config_map):
+        data = (config_map.data or {}).get(CONFIG_KEY) if config_map is not None else None
+        return json.loads(data) if data else None
+
+    @staticmethod
+    def _parse_tokens(secret):
+        data = (secret.data or {}).get(TOKENS_KEY) if secret is not None else None
+        return json.loads(base64.b64decode(data)) if data else {}
+
+    # 設定を読み込む関数（ConfigMap もシードも無い場合は None）
+    def load(self):
+        config_map = self._read()
+        if config_map is None:
+            return self._seed()
+        return join_tokens(self._parse(config_map), self._parse_tokens(self._read_secret()))
+
+    def save(self, config):
+        self.update(lambda current: config)
+
+    # 最新の設定を読み込み、func(current) の結果を保存する関数（保存した設定を返す）
+    # 読み込みから書き込みまでの間に他のレプリカが更新した場合は、読み込みからやり直す
+    def update(self, func):
+        for _ in range(UPDATE_RETRIES):
+            config_map = self._read()
+            if config_map is None and self._seed() is not None:
+                config_map = self._read()
+            if config_map is None:
+                config = func(None)
+                try:
+                    self._create(config)
+                except k8s.client.rest.ApiException as e:
+                    if e.status != 409:
+                        raise
+                    continue
+                return config
+
+            secret = self._read_secret()
+            config = func(join_tokens(self._parse(config_map), self._parse_tokens(secret)))
+            stored, tokens = split_tokens(config)
+            body = {
+                "metadata": {"resourceVersion": config_map.metadata.resource_version},
+                "data": {CONFIG_KEY: json.dumps(stored, indent=2)}
+            }
+            try:
+                self._write_tokens(secret, tokens)
+                self.api.patch_namespaced_config_map(self.name, self.namespace, body)
+            except k8s.client.rest.ApiException as e:
+                if e.status != 409:
+                    raise
+                continue
+            return config
+        raise RuntimeError(f"ConfigMap {self.namespace}/{self.name} was modified concurrently, giving up")
+
+    def version(self):
+        try:
+            config_map = self._read()
+            secret = self._read_secret()
+        except Exception as e:
+            print(f"[config-store] Error reading configuration: {e}")
+            return None
+        if config_map is None:
+            return None
+        return (config_map.metadata.resource_version, secret.metadata.resource_version if secret is not None else None)
+
+    # ローカルの config.json から ConfigMap を作成する関数（他のレプリカが先に作成した場合はそちらを使う）
+    def _seed(self):
+        if not self.seed_path or not os.path.exists(self.seed_path):
+            return None
+        with open(self.seed_path, 'r') as f:
+            config = json.load(f)
+        try:
+            self._create(config)
+        except k8s.client.rest.ApiException as e:
+            if e.status != 409:
+                raise
+            return self.load()
+        print(f"[config-store] Seeded ConfigMap {self.namespace}/{self.name} from {self.seed_path}")
+        return config
+
+    def _create(self, config):
+        stored, tokens = split_tokens(config)
+        self._write_tokens(self._read_secret(), tokens)
+        config_map = k8s.client.V1ConfigMap(
+            metadata=k8s.client.V1ObjectMeta(name=self.name, namespace=self.namespace),
+            data={CONFIG_KEY: json.dumps(stored, indent=2)}
+        )
+        self.api.create_namespaced_config_map(self.namespace, config_map)
+
+    # トークンを Secret に書き込む関数（変更が無ければ書き込まない。競合した場合は 409 の ApiException）
+    def _write_tokens(self, secret, tokens):
+        if tokens == self._parse_tokens(secret):
+            return
+        data = {TOKENS_KEY: base64.b64encode(json.dumps(tokens).encode()).decode()}
+        if secret is None:
+            self.api.create_namespaced_secret(self.namespace, k8s.client.V1Secret(
+                metadata=k8s.client.V1ObjectMeta(name=self.secret_name, namespace=self.namespace),
+                data=data
+            ))
+            return
+        body = {"metadata": {"resourceVersion": secret.metadata.resource_version}, "data": data}
+        self.api.patch_namespaced_secret(self.secret_name, self.namespace, body)
@@ -0,0 +1,279 @@
+import re
+import threading
+from collections import OrderedDict, deque
+
+from release_monitor.lazy_import import lazy_import
+
+# kubernetes クライアントは初回使用時にインポートする
+k8s = lazy_import("kubernetes")
+
+HTTP_STATUS_GONE = 410
+
+# pod-template-hash と Pod 名の接尾辞に使われる文字（Kubernetes の SafeEncodeString。母音を含まない）
+SAFE_ENCODE_CHARS = "bcdfghjklmnpqrstvwxz2456789"
+
+
+# Event をタイムライン表示用の辞書に変換する関数
+def event_to_entry(event):
+    involved = event.involved_object
+    series = getattr(event, "series", None)
+    count = event.count or (series.count if series and series.count else 1)
+    last_seen = (
+        event.last_timestamp
+        or (series.last_observed_time if series else None)
+        or event.event_time
+        or event.metadata.creation_timestamp
+    )
+    return {
+        "type": event.type,
+        "reason": event.reason,
+        "message": (event.message or "").strip(),
+        "kind": involved.kind,
+        "object": involved.name,
+        "count": count,
+        "first_seen": event.first_timestamp or last_seen,
+        "last_seen": last_seen,
+    }
+
+
+# デプロイメントと、そのReplicaSet・Podに関するEventかを判定するフィルター
+#
+# ReplicaSet は "<deployment>-<pod-template-hash>"、Pod は "<replicaset>-<5文字の接尾辞>" という
+# 命名規則なので、まず名前の形式で候補を絞る。owner_lookup（ReplicaSet 名から所有者のデプロイメント名を
+# 返す関数）があれば、ownerReferences で実際にこのデプロイメントの ReplicaSet かを確認する。
+# 所有者の確認は ReplicaSet ごとに1回だけ行い、結果を保持する。
+# 例: デプロイメント "web" に対して "web-api" の ReplicaSet や StatefulSet の Pod "web-0" は含めない。
+class DeploymentEventFilter:
+    def __init__(self, deployment, owner_lookup=None):
+        self.deployment = deployment
+        self.owner_lookup = owner_lookup
+        escaped = re.escape(deployment)
+        self._replica_set = re.compile(rf"^{escaped}-[{SAFE_ENCODE_CHARS}]{{1,10}}$")
+        self._pod = re.compile(rf"^({escaped}-[{SAFE_ENCODE_CHARS}]{{1,10}})-[{SAFE_ENCODE_CHARS}]{{5}}$")
+        self._owners = {}
+
+    def matches(self, entry):
+        kind, name = entry["kind"], entry["object"] or ""
+        if kind == "Deployment":
+            return name == self.deployment
+        if kind == "ReplicaSet":
+            return bool(self._replica_set.match(name)) and self._owned(name)
+        if kind == "Pod":
+            match = self._pod.match(name)
+            return bool(match) and self._owned(match.group(1))
+        return False
+
+    # ReplicaSet がこのデプロイメントのものか確認する関数
+    # 削除済みなどで所有者を確認できない ReplicaSet は、名前の形式だけで判定する
+    def _owned(self, replica_set):
+        if self.owner_lookup is None:
+            return True
+        if replica_set not in self._owners:
+            try:
+                self._owners[replica_set] = self.owner_lookup(replica_set)
+            except Exception as e:
+                print(f"[events] Error reading owner of ReplicaSet {replica_set}: {e}")
+                return True
+        owner = self._owners[replica_set]
+        return owner is None or owner == self.deployment
+
+
+# ターゲットごとのイベントタイムライン（上限付き・重複排除）
+#
+# 同じオブジェクト・理由・メッセージのイベントは1件にまとめ、回数と最終発生時刻だけを更新する。
+class EventTimeline:
+    def __init__(self, max_entries=200):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def add(self, entry):
+        key = (entry["kind"], entry["object"], entry["reason"], entry["message"])
+        with self._lock:
+            existing = self._entries.pop(key, None)
+            if existing is not None:
+                existing["count"] = max(existing["count"], entry["count"])
+                existing["last_seen"] = entry["last_seen"] or existing["last_seen"]
+                existing["type"] = entry["type"]
+                entry = existing
+            self._entries[key] = entry
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    # 新しい順にイベントを返す関数
+    def entries(self):
+        with self._lock:
+            return list(reversed(self._entries.values()))
+
+
+# ネームスペース単位の Event ウォッチャー
+#
+# 最初に1回だけ list で現在のイベントと resourceVersion を取得し、以降は watch で差分だけを受け取る。
+# watch が期限切れ（410 Gone）になった場合のみ list し直す。
+class NamespaceEventWatcher:
+    def __init__(self, namespace, core_v1=None, recent_events=500, max_entries=200, watch_timeout=300, apps_v1=None):
+        self.namespace = namespace
+        self.max_entries = max_entries
+        self.watch_timeout = watch_timeout
+        self.status = "starting"
+        self.error = None
+        self._core_v1 = core_v1
+        self._apps_v1 = apps_v1
+        self._recent = deque(maxlen=recent_events)
+        self._subscribers = {}
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._watch = None
+        self._thread = threading.Thread(target=self.run, name=f"event-watch-{namespace}", daemon=True)
+
+    @property
+    def core_v1(self):
+        if self._core_v1 is None:
+            self._core_v1 = k8s.client.CoreV1Api()
+        return self._core_v1
+
+    @property
+    def apps_v1(self):
+        if self._apps_v1 is None:
+            self._apps_v1 = k8s.client.AppsV1Api()
+        return self._apps_v1
+
+    # ReplicaSet を所有するデプロイメント名を返す関数（ReplicaSet が存在しない場合は None、
+    # デプロイメント以外が所有している場合は空文字）
+    def replica_set_owner(self, name):
+        try:
+            replica_set = self.apps_v1.read_namespaced_replica_set(name, self.namespace)
+        except k8s.client.rest.ApiException as e:
+            if e.status == 404:
+                return None
+            raise
+        for owner in replica_set.metadata.owner_references or []:
+            if owner.kind == "Deployment" and owner.controller:
+                return owner.name
+        return ""
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop_event.set()
+        if self._watch is not None:
+            self._watch.stop()
+
+    # ターゲットを登録する関数（直近のイベントでタイムラインを初期化）
+    # 所有者の確認で API を呼ぶことがあるため、フィルターの判定はロックの外で行う
+    def subscribe(self, target_id, deployment):
+        with self._lock:
+            current = self._subscribers.get(target_id)
+            if current and current[0].deployment == deployment:
+                return current[1]
+            recent = list(self._recent)
+        event_filter = DeploymentEventFilter(deployment, self.replica_set_owner)
+        timeline = EventTimeline(self.max_entries)
+        for entry in recent:
+            if event_filter.matches(entry):
+                timeline.add(dict(entry))
+        with self._lock:
+            self._subscribers[target_id] = (event_filter, timeline)
+        return timeline
+
+    def unsubscribe(self, target_id):
+        with self._lock:
+            self._subscribers.pop(target_id, None)
+            return not self._subscribers
+
+    def timeline(self, target_id):
+        with self._lock:
+            subscriber = self._subscribers.get(target_id)
+        return subscriber[1] if subscriber else None
+
+    def _dispatch(self, event):
+        entry = event_to_entry(event)
+        with self._lock:
+            self._recent.append(entry)
+            subscribers = list(self._subscribers.values())
+        for event_filter, timeline in subscribers:
+            if event_filter.matches(entry):
+                timeline.add(dict(entry))
+
+    def _list(self):
+        events = self.core_v1.list_namespaced_event(self.namespace)
+        for event in events.items:
+            self._dispatch(event)
+        return events.metadata.resource_version
+
+    def run(self):
+        resource_version = None
+        while not self._stop_event.is_set():
+            try:
+                if resource_version is None:
+                    resource_version = self._list()
+                self.status = "watching"
+                self.error = None
+                self._watch = k8s.watch.Watch()
+                for item in self._watch.stream(
+                    self.core_v1.list_namespaced_event,
+                    self.namespace,
+                    resource_version=resource_version,
+                    timeout_seconds=self.watch_timeout,
+                    allow_watch_bookmarks=True
+                ):
+                    if item["type"] in ("ADDED", "MODIFIED"):
+                        self._dispatch(item["object"])
+                    if self._stop_event.is_set():
+                        break
+                # タイムアウトで終了した場合は最後に受け取った resourceVersion から再開
+                resource_version = self._watch.resource_version or resource_version
+            except k8s.client.rest.ApiException as e:
+                if e.status == HTTP_STATUS_GONE:
+                    resource_version = None
+                    continue
+                self.status, self.error = "error", str(e)
+                self._stop_event.wait(5)
+            except Exception as e:
+                self.status, self.error = "error", str(e)
+                self._stop_event.wait(5)
+        self.status = "stopped"
+
+
+# ネームスペースごとのウォッチャーを管理するクラス
+class EventWatchManager:
+    def __init__(self, core_v1=None, max_entries=200, apps_v1=None):
+        self.max_entries = max_entries
+        self._core_v1 = core_v1
+        self._apps_v1 = apps_v1
+        self._watchers = {}
+        self._targets = {}
+        self._lock = threading.Lock()
+
+    # ターゲットのイベント監視を開始し、タイムラインを返す関数
+    def watch(self, target_id, namespace, deployment):
+        with self._lock:
+            previous = self._targets.get(target_id)
+            if previous and previous != namespace:
+                self._unwatch_locked(target_id)
+            watcher = self._watchers.get(namespace)
+            if watcher is None:
+                watcher = NamespaceEventWatcher(
+                    namespace, self._core_v1, max_entries=self.max_entries, apps_v1=self._apps_v1
+                )
+                self._watchers[namespace] = watcher
+                watcher.start()
+            self._targets[target_id] = namespace
+        return watcher.subscribe(target_id, deployment)
+
+    def unwatch(self, target_id):
+        with self._lock:
+            self._unwatch_locked(target_id)
+
+    def _unwatch_locked(self, target_id):
+        namespace = self._targets.pop(target_id, None)
+        watcher = self._watchers.get(namespace)
+        if watcher is not None and watcher.unsubscribe(target_id):
+            # 購読者がいなくなったネームスペースのウォッチは停止する
+            watcher.stop()
+            del self._watchers[namespace]
+
+    def watcher(self, namespace):
+        with self._lock:
+            return self._watchers.get(namespace)
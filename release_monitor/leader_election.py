@@ -0,0 +1,218 @@
+import os
+import socket
+import threading
+import time
+from datetime import datetime, timezone
+
+from release_monitor.lazy_import import lazy_import
+
+# kubernetes クライアントは初回使用時にインポートする
+k8s = lazy_import("kubernetes")
+
+# サービスアカウントのネームスペースファイル（クラスター内実行時のみ存在）
+SERVICE_ACCOUNT_NAMESPACE_FILE = "/var/run/secrets/kubernetes.io/serviceaccount/namespace"
+
+
+# 自分自身のIDを取得する関数（Downward APIのPOD_NAMEを優先）
+def default_identity():
+    return os.environ.get("POD_NAME") or socket.gethostname()
+
+
+# Leaseを作成するネームスペースを取得する関数
+def default_namespace():
+    namespace = os.environ.get("LEASE_NAMESPACE")
+    if namespace:
+        return namespace
+    try:
+        with open(SERVICE_ACCOUNT_NAMESPACE_FILE) as f:
+            return f.read().strip()
+    except OSError:
+        return "default"
+
+
+# coordination.k8s.io の Lease を使ったリーダー選出
+#
+# client-go の leaderelection と同じ考え方で、リース期限は相手側の renewTime ではなく
+# 「自分がそのレコードを最後に観測したローカル時刻」から判定する（ノード間の時計ずれ対策）。
+# api には CoordinationV1Api 互換のオブジェクトを渡せるので、テスト時はフェイクに差し替え可能。
+class LeaseLeaderElector:
+    def __init__(self, lease_name, namespace=None, identity=None,
+                 lease_duration=15, renew_deadline=10, retry_period=2,
+                 api=None, on_started_leading=None, on_stopped_leading=None):
+        self.lease_name = lease_name
+        self.namespace = namespace or default_namespace()
+        self.identity = identity or default_identity()
+        self.lease_duration = lease_duration
+        self.renew_deadline = renew_deadline
+        self.retry_period = retry_period
+        self.on_started_leading = on_started_leading
+        self.on_stopped_leading = on_stopped_leading
+
+        self._api = api
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._thread = None
+        self._is_leader = False
+        self._last_renew = 0.0
+        self._observed_record = None
+        self._observed_time = 0.0
+        self._holder = None
+
+    @property
+    def api(self):
+        if self._api is None:
+            self._api = k8s.client.CoordinationV1Api()
+        return self._api
+
+    @property
+    def is_leader(self):
+        with self._lock:
+            # renew_deadline 内に更新できていなければリーダーとは見なさない
+            if self._is_leader and time.monotonic() - self._last_renew > self.renew_deadline:
+                return False
+            return self._is_leader
+
+    @property
+    def holder_identity(self):
+        with self._lock:
+            return self._holder
+
+    # Lease の取得または更新を1回試行する関数
+    def try_acquire_or_renew(self):
+        now = datetime.now(timezone.utc)
+        try:
+            lease = self.api.read_namespaced_lease(self.lease_name, self.namespace)
+        except k8s.client.rest.ApiException as e:
+            if e.status != 404:
+                raise
+            lease = k8s.client.V1Lease(
+                metadata=k8s.client.V1ObjectMeta(name=self.lease_name, namespace=self.namespace),
+                spec=k8s.client.V1LeaseSpec(
+                    holder_identity=self.identity,
+                    lease_duration_seconds=self.lease_duration,
+                    acquire_time=now,
+                    renew_time=now,
+                    lease_transitions=0
+                )
+            )
+            try:
+                self.api.create_namespaced_lease(self.namespace, lease)
+            except k8s.client.rest.ApiException as create_error:
+                if create_error.status == 409:
+                    # 他のレプリカが先に作成した
+                    return False
+                raise
+            self._observe(lease.spec)
+            return True
+
+        spec = lease.spec or k8s.client.V1LeaseSpec()
+        holder = spec.holder_identity
+        self._observe(spec)
+
+        if holder and holder != self.identity:
+            duration = spec.lease_duration_seconds or self.lease_duration
+            if time.monotonic() - self._observed_time < duration:
+                # 他のレプリカが有効なリースを保持している
+                return False
+
+        if holder != self.identity:
+            spec.acquire_time = now
+            spec.lease_transitions = (spec.lease_transitions or 0) + 1
+        spec.holder_identity = self.identity
+        spec.lease_duration_seconds = self.lease_duration
+        spec.renew_time = now
+        lease.spec = spec
+
+        try:
+            # resourceVersion 付きの replace で楽観的排他制御を行う
+            self.api.replace_namespaced_lease(self.lease_name, self.namespace, lease)
+        except k8s.client.rest.ApiException as e:
+            if e.status == 409:
+                return False
+            raise
+        self._observe(spec)
+        return True
+
+    # 観測したレコードを記録する関数（内容が変わった時だけ観測時刻を更新）
+    def _observe(self, spec):
+        record = (
+            spec.holder_identity,
+            spec.lease_duration_seconds,
+            str(spec.renew_time),
+            spec.lease_transitions
+        )
+        with self._lock:
+            if record != self._observed_record:
+                self._observed_record = record
+                self._observed_time = time.monotonic()
+            self._holder = spec.holder_identity
+
+    def _set_leader(self, leader):
+        with self._lock:
+            changed = leader != self._is_leader
+            self._is_leader = leader
+            if leader:
+                self._last_renew = time.monotonic()
+        if changed:
+            callback = self.on_started_leading if leader else self.on_stopped_leading
+            if callback:
+                try:
+                    callback()
+                except Exception as e:
+                    print(f"[leader-election] Error in leadership callback: {e}")
+
+    # リーダー選出ループ
+    def run(self):
+        while not self._stop_event.is_set():
+            try:
+                acquired = self.try_acquire_or_renew()
+            except Exception as e:
+                print(f"[leader-election] Error acquiring lease {self.namespace}/{self.lease_name}: {e}")
+                acquired = False
+
+            if acquired:
+                if not self._is_leader:
+                    print(f"[leader-election] {self.identity} became leader")
+                self._set_leader(True)
+            elif self._is_leader and time.monotonic() - self._last_renew > self.renew_deadline:
+                print(f"[leader-election] {self.identity} lost leadership")
+                self._set_leader(False)
+
+            self._stop_event.wait(self.retry_period)
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self.run, name="leader-election", daemon=True)
+        self._thread.start()
+
+    # 停止時にリースを解放して、他のレプリカがすぐに引き継げるようにする
+    def stop(self, release=True):
+        self._stop_event.set()
+        if self._thread:
+            self._thread.join(timeout=self.retry_period + 1)
+        if release and self._is_leader:
+            try:
+                lease = self.api.read_namespaced_lease(self.lease_name, self.namespace)
+                if lease.spec and lease.spec.holder_identity == self.identity:
+                    lease.spec.holder_identity = None
+                    lease.spec.lease_duration_seconds = 1
+                    lease.spec.renew_time = datetime.now(timezone.utc)
+                    self.api.replace_namespaced_lease(self.lease_name, self.namespace, lease)
+            except Exception as e:
+                print(f"[leader-election] Error releasing lease: {e}")
+        self._set_leader(False)
+
+
+# リーダー選出を使わない場合（単一レプリカ）の代替実装
+class StandaloneElector:
+    identity = default_identity()
+    holder_identity = identity
+    is_leader = True
+
+    def start(self):
+        pass
+
+    def stop(self, release=True):
+        pass
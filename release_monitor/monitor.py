@@ -0,0 +1,512 @@
+import atexit
+import os
+import threading
+import time
+from datetime import datetime
+
+import requests
+
+from release_monitor.config_store import ConfigMapConfigStore, FileConfigStore, config_path
+from release_monitor.lazy_import import lazy_import
+from release_monitor.leader_election import LeaseLeaderElector, StandaloneElector, default_namespace
+from release_monitor.registry import (
+    credentials_from_secret_data,
+    digest_from_image_id,
+    format_image_reference,
+    parse_image_reference,
+    resolve_image_digest,
+)
+from release_monitor.polling import PollingPolicy, parse_timestamp
+from release_monitor.release_cache import ReleaseCache
+from release_monitor.release_index import ReleaseIndex
+from release_monitor.release_state import save_target_releases
+from release_monitor.startup import staggered_delays
+from release_monitor.state_store import ConfigMapStateStore, FileStateStore
+
+# kubernetes クライアントは大きいため、初めて使用する時点でインポートする
+k8s = lazy_import("kubernetes")
+
+# モニタリングスレッドの設定として扱うターゲットのフィールド（変更されたらスレッドを再起動する）
+THREAD_SETTINGS = (
+    'github_repo', 'github_token', 'k8s_namespace', 'k8s_deployment', 'polling_interval',
+    'digest_check', 'registry_url', 'include_prereleases', 'priority', 'release_windows', 'window_interval', 'backoff'
+)
+
+
+# Githubリリース取得関数
+def get_github_releases(repo, token=None):
+    headers = {}
+    if token:
+        headers["Authorization"] = f"token {token}"
+
+    url = f"https://api.github.com/repos/{repo}/releases"
+    try:
+        response = requests.get(url, headers=headers)
+        response.raise_for_status()
+        return response.json()
+    except requests.exceptions.RequestException:
+        return []
+
+
+# Kubernetes設定ロード関数
+def load_k8s_config(log=print):
+    try:
+        # kubeconfig からの設定ロード試行
+        k8s.config.load_kube_config()
+        log("Loaded Kubernetes config from kubeconfig file")
+    except Exception:
+        try:
+            # クラスター内実行時の設定ロード試行
+            k8s.config.load_incluster_config()
+            log("Loaded in-cluster Kubernetes config")
+        except Exception as e:
+            log(f"Failed to load Kubernetes config: {e}")
+            return False
+    return True
+
+
+# デプロイメントの imagePullSecrets からレジストリの認証情報を読み込む関数
+# 読めない Secret は無視する（そのレジストリには匿名でアクセスする）
+def load_pull_secret_credentials(core_v1, namespace, deployment):
+    credentials = {}
+    for ref in deployment.spec.template.spec.image_pull_secrets or []:
+        try:
+            secret = core_v1.read_namespaced_secret(name=ref.name, namespace=namespace)
+            credentials.update(credentials_from_secret_data(secret.data))
+        except Exception as e:
+            print(f"Could not read imagePullSecret {namespace}/{ref.name}: {e}")
+    return credentials
+
+
+# リリースのイメージダイジェストと稼働中ポッドのダイジェストを比較する関数
+# 戻り値: 更新が必要なコンテナの [(インデックス, 新しいイメージ参照)]。ダイジェストを解決できない場合は None
+def plan_image_digest_patch(apps_v1, core_v1, namespace, deployment_name, release_tag, registry_url=None):
+    deployment = apps_v1.read_namespaced_deployment(name=deployment_name, namespace=namespace)
+    credentials = load_pull_secret_credentials(core_v1, namespace, deployment)
+    pods = core_v1.list_namespaced_pod(
+        namespace=namespace,
+        label_selector=",".join([f"{k}={v}" for k, v in deployment.spec.selector.match_labels.items()])
+    )
+
+    # コンテナ名ごとに稼働中ポッドのダイジェストを集約（get_deployment_statusのimage_idと同じ情報）
+    running_digests = {}
+    for pod in pods.items:
+        for container in pod.status.container_statuses if pod.status.container_statuses else []:
+            running_digests.setdefault(container.name, set()).add(digest_from_image_id(container.image_id))
+
+    changes = []
+    for index, container in enumerate(deployment.spec.template.spec.containers):
+        registry, repository, image_tag, _ = parse_image_reference(container.image)
+        # リリースタグのイメージを優先し、無ければデプロイメントに指定されたタグで解決する
+        tag = release_tag
+        digest = resolve_image_digest(container.image, tag, registry_url, credentials)
+        if digest is None and image_tag and image_tag != release_tag:
+            tag = image_tag
+            digest = resolve_image_digest(container.image, tag, registry_url, credentials)
+        if digest is None:
+            return None
+        if running_digests.get(container.name) != {digest}:
+            changes.append((index, format_image_reference(registry, repository, tag, digest)))
+    return changes
+
+
+# Kubernetesデプロイメントのリスタート関数
+# digest_check=True の場合、イメージが変わっていなければ再起動をスキップし、
+# 変わっていれば restartedAt ではなく変更されたコンテナのイメージだけをダイジェスト指定で更新する
+def restart_k8s_deployment(namespace, deployment_name, release_tag=None, digest_check=False, registry_url=None):
+    try:
+        apps_v1 = k8s.client.AppsV1Api()
+
+        if digest_check and release_tag:
+            changes = plan_image_digest_patch(
+                apps_v1, k8s.client.CoreV1Api(), namespace, deployment_name, release_tag, registry_url
+            )
+            if changes is not None:
+                if not changes:
+                    print(f"Image digest unchanged for {namespace}/{deployment_name} ({release_tag}), skipping restart")
+                    return True
+                patch = [
+                    {"op": "replace", "path": f"/spec/template/spec/containers/{index}/image", "value": image}
+                    for index, image in changes
+                ]
+                apps_v1.patch_namespaced_deployment(
+                    name=deployment_name,
+                    namespace=namespace,
+                    body=patch
+                )
+                print(f"Updated image digest for {namespace}/{deployment_name}: {[image for _, image in changes]}")
+                return True
+            print(f"Could not resolve image digest for {namespace}/{deployment_name}, falling back to rolling restart")
+
+        now = datetime.utcnow().isoformat()
+        patch = {
+            "spec": {
+                "template": {
+                    "metadata": {
+                        "annotations": {
+                            "kubectl.kubernetes.io/restartedAt": now
+                        }
+                    }
+                }
+            }
+        }
+
+        # 実行
+        apps_v1.patch_namespaced_deployment(
+            name=deployment_name,
+            namespace=namespace,
+            body=patch
+        )
+        return True
+    except Exception as e:
+        print(f"Error restarting deployment {namespace}/{deployment_name}: {e}")
+        return False
+
+
+# 共有状態ストアを作成する関数
+# リーダー選出が有効な場合はレプリカ間で共有する ConfigMap、それ以外は config.json と同じディレクトリのファイル
+def create_state_store(namespace=None):
+    if os.environ.get('LEADER_ELECTION_ENABLED', 'false').lower() == 'true':
+        lease_name = os.environ.get('LEASE_NAME', 'hackathon-devops-monitor')
+        return ConfigMapStateStore(
+            os.environ.get('STATE_CONFIGMAP', f"{lease_name}-state"),
+            namespace or default_namespace()
+        )
+    return FileStateStore()
+
+
+# ターゲット設定のストアを作成する関数
+# リーダー選出が有効な場合はレプリカ間で共有する ConfigMap（初回はローカルの config.json で作成）、
+# それ以外は config.json
+def create_config_store(namespace=None, path=None):
+    path = path or config_path()
+    if os.environ.get('LEADER_ELECTION_ENABLED', 'false').lower() == 'true':
+        lease_name = os.environ.get('LEASE_NAME', 'hackathon-devops-monitor')
+        name = os.environ.get('CONFIG_CONFIGMAP', f"{lease_name}-config")
+        return ConfigMapConfigStore(
+            name,
+            namespace or default_namespace(),
+            seed_path=path,
+            secret_name=os.environ.get('CONFIG_TOKEN_SECRET', f"{name}-tokens")
+        )
+    return FileConfigStore(path)
+
+
+# リーダー選出とレプリカ間共有状態を初期化する関数
+def create_coordination(log=print):
+    if os.environ.get('LEADER_ELECTION_ENABLED', 'false').lower() != 'true':
+        return StandaloneElector(), FileStateStore()
+    if not load_k8s_config(log):
+        log("Leader election disabled: Kubernetes config is not available")
+        return StandaloneElector(), FileStateStore()
+
+    lease_name = os.environ.get('LEASE_NAME', 'hackathon-devops-monitor')
+    elector = LeaseLeaderElector(
+        lease_name,
+        lease_duration=int(os.environ.get('LEASE_DURATION_SECONDS', '15')),
+        renew_deadline=int(os.environ.get('LEASE_RENEW_DEADLINE_SECONDS', '10')),
+        retry_period=int(os.environ.get('LEASE_RETRY_PERIOD_SECONDS', '2'))
+    )
+    state_store = create_state_store(elector.namespace)
+    elector.start()
+    # プロセス終了時にリースを解放して、フェイルオーバーを早める
+    atexit.register(elector.stop)
+    log(f"Leader election started as {elector.identity} (lease {elector.namespace}/{lease_name})")
+    return elector, state_store
+
+
+# 停止されるまで指定秒数待機する関数（停止要求があれば途中で抜ける）
+def _wait(is_running, seconds):
+    deadline = time.monotonic() + seconds
+    while is_running():
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return
+        time.sleep(min(1, remaining))
+
+
+# モニタリングスレッド関数
+# monitoring_state[target_id] が run_token と一致している間だけ動作する
+def monitoring_thread(target_id, target_name, repo, token, namespace, deployment, interval, monitoring_state,
+                      elector=None, state_store=None, digest_check=False, registry_url=None,
+                      initial_delay=0, run_token=True, release_cache=None, include_prereleases=False,
+                      policy=None):
+    def is_running():
+        return monitoring_state.get(target_id) is run_token
+
+    # 設定からlast_release_tagを取得する（存在する場合）
+    last_release_tag = None
+    # スレッド間で共有状態から初期値を設定
+    if f"{target_id}_stored_release_tag" in monitoring_state:
+        last_release_tag = monitoring_state[f"{target_id}_stored_release_tag"]
+
+    # ポリシーが無い場合は polling_interval 固定で動作する
+    policy = policy or PollingPolicy(interval, backoff=False, boost_duration=0)
+    last_release_at = None
+    last_change_at = None
+
+    # 再開時のバースト防止のため、最初のチェックまで待機
+    _wait(is_running, initial_delay)
+    was_leader = False
+    while is_running():
+        # リーダー以外のレプリカはポーリングも再起動も行わず、リーダー交代に備えて待機
+        if elector is not None and not elector.is_leader:
+            was_leader = False
+            _wait(is_running, min(interval, getattr(elector, 'retry_period', interval)))
+            continue
+        if not was_leader and state_store is not None:
+            # リーダーになった直後は前リーダーが記録したタグを引き継ぎ、重複した再起動を防ぐ
+            stored = (state_store.load(use_cache=False).get(target_id) or {}).get('stored_release_tag')
+            if stored:
+                last_release_tag = stored
+            was_leader = True
+        try:
+            # 取得ごとに1回だけインデックスを作成し、下書きを除いたバージョン順で最新のリリースを判定する
+            # （APIの並び順は作成日時順のため、古いバージョンへのパッチリリースを最新と誤認しない）
+            index = ReleaseIndex.from_github(get_github_releases(repo, token))
+            latest_release = index.latest(include_prereleases)
+            if latest_release:
+                previous_release_tag = last_release_tag
+
+                # ダッシュボード向けにリリース情報を共有キャッシュへ格納（ヘッドレスモニターでは保持しない）
+                if release_cache is not None:
+                    release_cache.put_index(target_id, index, latest_release)
+
+                # 前回チェック時から新しいリリースが出たら再起動
+                if last_release_tag is None:
+                    # 初回実行時
+                    print(f"[{target_name}] Initial release detected: {latest_release['tag_name']}")
+                    monitoring_state[f"{target_id}_new_release"] = True
+                elif latest_release['tag_name'] != last_release_tag:
+                    # 新しいリリースが検出された
+                    print(f"[{target_name}] New release detected: {latest_release['tag_name']}")
+                    # 続けて出るホットフィックスを拾うため、しばらく短い間隔でポーリングする
+                    last_change_at = time.time()
+
+                    # Kubernetesデプロイメントを再起動
+                    restart_result = restart_k8s_deployment(
+                        namespace,
+                        deployment,
+                        release_tag=latest_release['tag_name'],
+                        digest_check=digest_check,
+                        registry_url=registry_url
+                    )
+                    if restart_result:
+                        print(f"[{target_name}] Automatically restarted deployment for new release {latest_release['tag_name']}")
+                    else:
+                        print(f"[{target_name}] Failed to restart deployment for new release {latest_release['tag_name']}")
+
+                    monitoring_state[f"{target_id}_new_release"] = True
+                else:
+                    # 変更なし
+                    print(f"[{target_name}] No new releases detected")
+
+                # 最新のリリースタグを記録
+                last_release_tag = latest_release['tag_name']
+                last_release_at = parse_timestamp(latest_release.get('published_at'))
+                monitoring_state[f"{target_id}_stored_release_tag"] = last_release_tag
+
+                # 他のレプリカのダッシュボード向けに共有状態へ書き込む（変化があった時のみ）
+                if last_release_tag != previous_release_tag:
+                    if state_store is not None:
+                        state_store.update_target(target_id, latest_release, last_release_tag)
+                    # 次回起動時のウォームスタート用にリリース履歴を保存
+                    save_target_releases(target_id, index.releases)
+            else:
+                print(f"[{target_name}] No releases found or error getting releases")
+        except Exception as e:
+            print(f"[{target_name}] Error in monitoring thread: {e}")
+
+        # ポリシーに従って次のポーリングまで待機（ダッシュボード表示用に間隔と理由を共有）
+        next_interval, reason = policy.next_interval(last_release_at=last_release_at, last_change_at=last_change_at)
+        monitoring_state[f"{target_id}_next_poll"] = {'interval': next_interval, 'reason': reason, 'at': time.time() + next_interval}
+        _wait(is_running, next_interval)
+
+
+# ターゲットごとのモニタリングスレッドを管理するクラス
+#
+# Streamlit のダッシュボード（組み込みモード）とヘッドレスデーモンの両方から使う。
+# プロセス内で1つだけ作成し、同じターゲットのスレッドが重複して起動しないようにする。
+class MonitorService:
+    def __init__(self, elector=None, state_store=None, log=print, release_cache=None, config_store=None):
+        self.elector = elector or StandaloneElector()
+        self.state_store = state_store or FileStateStore()
+        self.config_store = config_store or FileConfigStore()
+        self.log = log
+        self.release_cache = release_cache
+        self.monitoring_state = {}
+        self._threads = {}
+        self._settings = {}
+        self._lock = threading.Lock()
+
+    def is_running(self, target_id):
+        with self._lock:
+            thread = self._threads.get(target_id)
+            return thread is not None and self.monitoring_state.get(target_id) is not None
+
+    def running_targets(self):
+        with self._lock:
+            return [target_id for target_id in self._threads if self.monitoring_state.get(target_id) is not None]
+
+    # ターゲットのモニタリングを開始する関数（起動した場合 True）
+    def start_target(self, target, initial_delay=0):
+        target_id = target['id']
+        if not target.get('github_repo') or not target.get('k8s_deployment'):
+            self.log(f"[{target['name']}] GitHub repository and Kubernetes deployment must be set")
+            return False
+        try:
+            policy = PollingPolicy.from_target(target)
+        except ValueError as e:
+            self.log(f"[{target['name']}] Invalid polling policy: {e}")
+            return False
+
+        with self._lock:
+            if self.monitoring_state.get(target_id) is not None:
+                return False
+            # 前回のリリースタグがあれば共有状態に設定
+            if target.get('latest_release') and 'tag_name' in target['latest_release']:
+                self.monitoring_state.setdefault(f"{target_id}_stored_release_tag", target['latest_release']['tag_name'])
+
+            run_token = object()
+            self.monitoring_state[target_id] = run_token
+            thread = threading.Thread(
+                target=monitoring_thread,
+                args=(
+                    target_id,
+                    target['name'],
+                    target['github_repo'],
+                    target.get('github_token'),
+                    target['k8s_namespace'],
+                    target['k8s_deployment'],
+                    target['polling_interval'],
+                    self.monitoring_state,
+                    self.elector,
+                    self.state_store,
+                    target.get('digest_check', False),
+                    target.get('registry_url') or None,
+                    initial_delay,
+                    run_token,
+                    self.release_cache,
+                    target.get('include_prereleases', False),
+                    policy
+                ),
+                name=f"monitor-{target_id}",
+                daemon=True
+            )
+            self._threads[target_id] = thread
+            self._settings[target_id] = tuple(target.get(key) for key in THREAD_SETTINGS)
+        if self.release_cache is not None:
+            self.release_cache.pin(target_id)
+        thread.start()
+        self.log(f"[{target['name']}] Starting monitoring for {target['github_repo']}, checking every {target['polling_interval']} seconds")
+        return True
+
+    # ターゲットのモニタリングを停止する関数（スレッドは次の待機中に自分で終了する）
+    def stop_target(self, target_id):
+        with self._lock:
+            self.monitoring_state.pop(target_id, None)
+            self._threads.pop(target_id, None)
+            self._settings.pop(target_id, None)
+        if self.release_cache is not None:
+            self.release_cache.unpin(target_id)
+
+    # ターゲットを停止し、共有状態からも削除する関数
+    def remove_target(self, target_id):
+        self.stop_target(target_id)
+        with self._lock:
+            for key in [key for key in self.monitoring_state if key.startswith(f"{target_id}_")]:
+                del self.monitoring_state[key]
+        if self.release_cache is not None:
+            self.release_cache.discard(target_id)
+        if self.elector.is_leader:
+            try:
+                self.state_store.remove_target(target_id)
+            except Exception as e:
+                self.log(f"Error removing shared state for {target_id}: {e}")
+
+    # アクティブなターゲットを各ポーリング間隔内にずらして再開する関数
+    def resume(self, targets):
+        active = [target for target in targets if target.get('is_active')]
+        delays = staggered_delays([target['polling_interval'] for target in active])
+        resumed = []
+        for target, delay in zip(active, delays):
+            # 他のセッションが既に再開したターゲットはスキップ
+            if self.start_target(target, initial_delay=delay):
+                self.log(f"Auto-restarting monitoring for {target['name']} (first check in {delay:.1f}s)")
+                resumed.append((target, delay))
+        return resumed
+
+    # 設定ファイルの内容に合わせてスレッドを開始・停止・再起動する関数
+    def sync(self, targets):
+        target_ids = {target['id'] for target in targets}
+        for target_id in self.running_targets():
+            if target_id not in target_ids:
+                self.log(f"Target {target_id} was removed, stopping monitoring")
+                self.remove_target(target_id)
+        for target in targets:
+            target_id = target['id']
+            running = self.is_running(target_id)
+            if not target.get('is_active'):
+                if running:
+                    self.log(f"[{target['name']}] Stopping monitoring")
+                    self.stop_target(target_id)
+                continue
+            if running and self._settings.get(target_id) != tuple(target.get(key) for key in THREAD_SETTINGS):
+                self.log(f"[{target['name']}] Settings changed, restarting monitoring")
+                self.stop_target(target_id)
+                running = False
+            if not running:
+                self.start_target(target)
+
+    def stop_all(self):
+        for target_id in self.running_targets():
+            self.stop_target(target_id)
+
+
+# 共有設定の変更を監視し、モニタリングスレッドに反映する関数（stop_event がセットされるまで実行）
+# 最初の読み込みでアクティブなターゲットを再開し、以降は変更のたびに開始・停止・再起動する
+def watch_config(service, stop_event, interval=10):
+    last_version = None
+    loaded = False
+    while not stop_event.is_set():
+        version = service.config_store.version()
+        if not loaded or version != last_version:
+            try:
+                config = service.config_store.load() or {'targets': []}
+            except Exception as e:
+                service.log(f"Error loading configuration: {e}")
+            else:
+                if not loaded:
+                    service.resume(config['targets'])
+                else:
+                    service.log("Configuration changed, reloading targets")
+                    service.sync(config['targets'])
+                last_version = version
+                loaded = True
+        stop_event.wait(interval)
+
+
+_background_service = None
+_background_lock = threading.Lock()
+_background_stop = threading.Event()
+
+
+# 組み込みモードでプロセス内に1つだけ作成するモニタリングサービスを取得する関数
+# 初回の呼び出しでリーダー選出を開始し、共有設定を監視するスレッドでアクティブなターゲットを再開する。
+# ダッシュボード（python -m release_monitor dashboard）はセッションを待たずに起動時に呼び出す
+def get_background_service(log=print, reload_interval=10):
+    global _background_service
+    with _background_lock:
+        if _background_service is None:
+            elector, state_store = create_coordination(log)
+            config_store = create_config_store(getattr(elector, 'namespace', None))
+            service = MonitorService(elector, state_store, log, ReleaseCache(), config_store)
+            threading.Thread(
+                target=watch_config,
+                args=(service, _background_stop, reload_interval),
+                name="config-watch",
+                daemon=True
+            ).start()
+            atexit.register(_background_stop.set)
+            _background_service = service
+        return _background_service
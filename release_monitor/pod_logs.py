@@ -0,0 +1,286 @@
+import queue
+import selectors
+import threading
+import time
+from collections import deque
+
+from release_monitor.lazy_import import lazy_import
+
+# kubernetes クライアントは初回使用時にインポートする
+k8s = lazy_import("kubernetes")
+
+READ_CHUNK_SIZE = 64 * 1024
+
+
+# 1つのポッド/コンテナのログストリーム
+# 行はリングバッファ（deque）に保持するため、ストリームごとのメモリ使用量は max_lines で頭打ちになる
+# viewers はこのストリームを表示しているセッションの集合（全セッションが release するとストリームを閉じる）
+class LogStream:
+    def __init__(self, namespace, pod, container, max_lines, max_line_length):
+        self.namespace = namespace
+        self.pod = pod
+        self.container = container
+        self.max_line_length = max_line_length
+        self.lines = deque(maxlen=max_lines)
+        self.status = "connecting"
+        self.error = None
+        self.response = None
+        self.last_viewed = time.monotonic()
+        self.viewers = set()
+        self._partial = b""
+        self._lock = threading.Lock()
+
+    @property
+    def key(self):
+        return (self.namespace, self.pod, self.container)
+
+    # 受信したバイト列を行に分割してバッファに追加する関数
+    def feed(self, data):
+        data = self._partial + data
+        *complete, self._partial = data.split(b"\n")
+        # 改行が来ないまま大きくなった行は強制的に区切る
+        if len(self._partial) > self.max_line_length:
+            complete.append(self._partial)
+            self._partial = b""
+        with self._lock:
+            for line in complete:
+                self.lines.append(line[:self.max_line_length].decode("utf-8", errors="replace"))
+
+    def snapshot(self, viewer=None):
+        self.last_viewed = time.monotonic()
+        with self._lock:
+            if viewer is not None:
+                self.viewers.add(viewer)
+            return list(self.lines)
+
+    def close(self, status="stopped", error=None):
+        if self._partial:
+            self.feed(b"\n")
+        self.status = status
+        self.error = error
+        if self.response is not None:
+            try:
+                self.response.release_conn()
+            except Exception:
+                pass
+            try:
+                self.response.close()
+            except Exception:
+                pass
+            self.response = None
+
+
+# ソケットがブロックせずに読める状態かを判定する関数
+# http.client は受信データをバッファリングするため、ソケットが読めなくてもバッファに行が残っている場合がある
+def _has_buffered_data(response):
+    fp = getattr(getattr(response, "_fp", None), "fp", None)
+    sock = getattr(getattr(fp, "raw", None), "_sock", None)
+    if fp is None or sock is None:
+        return False
+    timeout = sock.gettimeout()
+    try:
+        sock.setblocking(False)
+        return bool(fp.peek(1))
+    except (OSError, ValueError):
+        return False
+    finally:
+        sock.settimeout(timeout)
+
+
+# ストリームから現在読めるだけのデータを読む関数
+# 戻り値: (データ, ストリームが終了したか)
+def _read_available(response):
+    raw = getattr(response, "_fp", response)
+    chunks = []
+    while True:
+        chunk = raw.read1(READ_CHUNK_SIZE)
+        if not chunk:
+            return b"".join(chunks), True
+        chunks.append(chunk)
+        if not _has_buffered_data(response):
+            return b"".join(chunks), False
+
+
+# 少数のワーカースレッドで多数のログストリームを多重化するクラス
+#
+# 各ワーカーは selectors で担当ストリームのソケットを監視し、データが届いたストリームだけを読む。
+# ポッド数が増えてもスレッド数は workers で固定される。
+class PodLogMultiplexer:
+    def __init__(self, core_v1=None, workers=2, max_streams=100, max_lines=500, tail_lines=100,
+                 max_line_length=2000, idle_timeout=300):
+        self.max_streams = max_streams
+        self.max_lines = max_lines
+        self.tail_lines = tail_lines
+        self.max_line_length = max_line_length
+        self.idle_timeout = idle_timeout
+        self._core_v1 = core_v1
+        self._lock = threading.Lock()
+        self._streams = {}
+        self._workers = [_LogWorker(self, i) for i in range(workers)]
+        for worker in self._workers:
+            worker.start()
+
+    @property
+    def core_v1(self):
+        if self._core_v1 is None:
+            self._core_v1 = k8s.client.CoreV1Api()
+        return self._core_v1
+
+    # ポッドのログのフォローを開始する関数（tail_lines 行を取得してから追従）
+    def follow(self, namespace, pod, container=None, viewer=None):
+        key = (namespace, pod, container)
+        with self._lock:
+            stream = self._streams.get(key)
+            if stream is not None and stream.status in ("connecting", "streaming"):
+                stream.last_viewed = time.monotonic()
+                if viewer is not None:
+                    stream.viewers.add(viewer)
+                return stream
+            if stream is None and len(self._streams) >= self.max_streams:
+                raise RuntimeError(f"Too many log streams (max {self.max_streams})")
+            viewers = stream.viewers if stream is not None else set()
+            stream = LogStream(namespace, pod, container, self.max_lines, self.max_line_length)
+            stream.viewers = viewers
+            if viewer is not None:
+                stream.viewers.add(viewer)
+            self._streams[key] = stream
+
+        try:
+            stream.response = self.core_v1.read_namespaced_pod_log(
+                name=pod,
+                namespace=namespace,
+                container=container,
+                follow=True,
+                tail_lines=self.tail_lines,
+                _preload_content=False
+            )
+        except Exception as e:
+            stream.close("error", str(e))
+            return stream
+
+        stream.status = "streaming"
+        worker = min(self._workers, key=lambda w: w.load)
+        worker.add(stream)
+        return stream
+
+    def unfollow(self, namespace, pod, container=None):
+        with self._lock:
+            stream = self._streams.pop((namespace, pod, container), None)
+        if stream is not None:
+            for worker in self._workers:
+                worker.remove(stream)
+
+    # セッションの表示をやめる関数（他に表示しているセッションが無ければストリームを閉じて枠を空ける）
+    def release(self, namespace, pod, container=None, viewer=None):
+        with self._lock:
+            stream = self._streams.get((namespace, pod, container))
+            if stream is None:
+                return
+            stream.viewers.discard(viewer)
+            if stream.viewers:
+                return
+            del self._streams[stream.key]
+        for worker in self._workers:
+            worker.remove(stream)
+
+    def get(self, namespace, pod, container=None):
+        with self._lock:
+            return self._streams.get((namespace, pod, container))
+
+    def streams(self):
+        with self._lock:
+            return list(self._streams.values())
+
+    # 一定時間表示されていないストリームを閉じる関数（ブラウザを閉じたセッションの後始末）
+    def close_idle(self):
+        now = time.monotonic()
+        for stream in self.streams():
+            if now - stream.last_viewed > self.idle_timeout:
+                self.unfollow(*stream.key)
+
+    def stop(self):
+        for stream in self.streams():
+            self.unfollow(*stream.key)
+        for worker in self._workers:
+            worker.stop()
+
+
+# ログストリームを担当するワーカースレッド
+class _LogWorker:
+    def __init__(self, multiplexer, index, poll_interval=0.5):
+        self.multiplexer = multiplexer
+        self.poll_interval = poll_interval
+        self._selector = selectors.DefaultSelector()
+        self._pending = queue.Queue()
+        self._streams = set()
+        self._stop_event = threading.Event()
+        self._thread = threading.Thread(target=self.run, name=f"pod-log-worker-{index}", daemon=True)
+
+    @property
+    def load(self):
+        return len(self._streams) + self._pending.qsize()
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop_event.set()
+        self._thread.join(timeout=self.poll_interval + 1)
+
+    # selector の登録・解除はワーカースレッド内でのみ行う
+    def add(self, stream):
+        self._pending.put(("add", stream))
+
+    def remove(self, stream):
+        self._pending.put(("remove", stream))
+
+    def _apply_pending(self):
+        while True:
+            try:
+                action, stream = self._pending.get_nowait()
+            except queue.Empty:
+                return
+            if action == "add":
+                try:
+                    self._selector.register(stream.response.fileno(), selectors.EVENT_READ, stream)
+                    self._streams.add(stream)
+                except (OSError, ValueError, AttributeError) as e:
+                    stream.close("error", str(e))
+            elif stream in self._streams:
+                self._detach(stream, "stopped")
+
+    def _detach(self, stream, status, error=None):
+        self._streams.discard(stream)
+        try:
+            self._selector.unregister(stream.response.fileno())
+        except (OSError, ValueError, KeyError, AttributeError):
+            pass
+        stream.close(status, error)
+
+    def run(self):
+        last_idle_check = time.monotonic()
+        while not self._stop_event.is_set():
+            self._apply_pending()
+            if not self._streams:
+                self._stop_event.wait(self.poll_interval)
+            else:
+                for key, _ in self._selector.select(timeout=self.poll_interval):
+                    stream = key.data
+                    try:
+                        data, ended = _read_available(stream.response)
+                    except Exception as e:
+                        self._detach(stream, "error", str(e))
+                        continue
+                    if data:
+                        stream.feed(data)
+                    if ended:
+                        # ポッドの終了などでストリームが閉じられた
+                        self._detach(stream, "ended")
+
+            if time.monotonic() - last_idle_check > self.poll_interval * 10:
+                self.multiplexer.close_idle()
+                last_idle_check = time.monotonic()
+
+        for stream in list(self._streams):
+            self._detach(stream, "stopped")
+        self._selector.close()
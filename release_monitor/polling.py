@@ -0,0 +1,163 @@
+import math
+import os
+import time
+from datetime import datetime, timedelta
+
+# ポーリング間隔の下限（秒）。ダッシュボードの入力の最小値と同じ
+MIN_POLLING_INTERVAL = 10
+
+# 優先度ごとのポーリング間隔の倍率
+PRIORITY_MULTIPLIERS = {
+    'high': 0.5,
+    'normal': 1.0,
+    'low': 4.0,
+}
+
+# 最新リリースからこの秒数が経過するごとにポーリング間隔を2倍にする（バックオフ）
+DEFAULT_BACKOFF_AFTER = int(os.environ.get('POLL_BACKOFF_AFTER_SECONDS', str(3 * 24 * 3600)))
+# バックオフ時のポーリング間隔の上限（秒）
+DEFAULT_BACKOFF_MAX = int(os.environ.get('POLL_BACKOFF_MAX_SECONDS', str(6 * 3600)))
+# リリース検出後に短い間隔でポーリングする期間と間隔（秒）
+DEFAULT_BOOST_DURATION = int(os.environ.get('POLL_BOOST_DURATION_SECONDS', '1800'))
+DEFAULT_BOOST_INTERVAL = int(os.environ.get('POLL_BOOST_INTERVAL_SECONDS', '30'))
+# リリースウィンドウ中のデフォルトのポーリング間隔（秒）
+DEFAULT_WINDOW_INTERVAL = 30
+
+# cron の各フィールドの範囲（分・時・日・月・曜日）
+CRON_FIELDS = ((0, 59), (0, 23), (1, 31), (1, 12), (0, 7))
+
+
+# cron の1フィールドを値の集合に変換する関数（*, */n, a-b, a-b/n, カンマ区切りに対応）
+def _parse_cron_field(field, minimum, maximum):
+    values = set()
+    for part in field.split(','):
+        expression, _, step = part.partition('/')
+        step = int(step) if step else 1
+        if expression == '*':
+            start, end = minimum, maximum
+        elif '-' in expression:
+            start, end = (int(value) for value in expression.split('-', 1))
+        else:
+            start = end = int(expression)
+        if step < 1 or start < minimum or end > maximum or start > end:
+            raise ValueError(f"invalid cron field: {field}")
+        values.update(range(start, end + 1, step))
+    return values
+
+
+# cron 形式（分 時 日 月 曜日）のリリースウィンドウ
+#
+# 現在時刻（分単位）が式にマッチしている間をウィンドウとみなす。
+# 例: "* 9-17 * * 1-5" は平日の 9:00〜17:59
+class CronSchedule:
+    def __init__(self, expression):
+        fields = expression.split()
+        if len(fields) != 5:
+            raise ValueError(f"cron expression must have 5 fields: {expression}")
+        self.expression = expression
+        try:
+            self.minutes, self.hours, self.days, self.months, weekdays = (
+                _parse_cron_field(field, minimum, maximum)
+                for field, (minimum, maximum) in zip(fields, CRON_FIELDS)
+            )
+        except ValueError as e:
+            raise ValueError(f"invalid cron expression '{expression}': {e}") from None
+        # 曜日の 7 は日曜日（0）として扱う
+        self.weekdays = {day % 7 for day in weekdays}
+        # cron と同じく、* で始まるフィールド（*/2 など）は指定なしとして扱う
+        self._any_day = fields[2].startswith('*')
+        self._any_weekday = fields[4].startswith('*')
+
+    def matches(self, dt):
+        if dt.minute not in self.minutes or dt.hour not in self.hours or dt.month not in self.months:
+            return False
+        day_matches = dt.day in self.days
+        weekday_matches = (dt.weekday() + 1) % 7 in self.weekdays
+        # cron と同じく、日と曜日の両方が指定されている場合はどちらかに一致すればよい
+        if self._any_day or self._any_weekday:
+            return day_matches and weekday_matches
+        return day_matches or weekday_matches
+
+
+# ISO 8601 形式の日時（GitHub API の published_at）を UNIX 時刻に変換する関数
+def parse_timestamp(value):
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(value.replace('Z', '+00:00')).timestamp()
+    except (TypeError, ValueError):
+        return None
+
+
+# ターゲットのポーリングポリシー
+#
+# 基本間隔に優先度の倍率を掛け、最新リリースから長く変化がなければバックオフする。
+# リリースウィンドウ中とリリース検出直後は短い間隔でポーリングする。
+class PollingPolicy:
+    def __init__(self, base_interval, priority='normal', release_windows=(), window_interval=DEFAULT_WINDOW_INTERVAL,
+                 backoff=True, backoff_after=DEFAULT_BACKOFF_AFTER, backoff_max=DEFAULT_BACKOFF_MAX,
+                 boost_duration=DEFAULT_BOOST_DURATION, boost_interval=DEFAULT_BOOST_INTERVAL):
+        if priority not in PRIORITY_MULTIPLIERS:
+            raise ValueError(f"unknown priority: {priority}")
+        self.base_interval = base_interval
+        self.priority = priority
+        self.windows = [CronSchedule(expression) for expression in release_windows if expression.strip()]
+        self.window_interval = window_interval
+        self.backoff = backoff
+        self.backoff_after = backoff_after
+        self.backoff_max = backoff_max
+        self.boost_duration = boost_duration
+        self.boost_interval = boost_interval
+
+    # ターゲットの設定からポリシーを作成する関数（不正な設定は ValueError）
+    @classmethod
+    def from_target(cls, target):
+        return cls(
+            target['polling_interval'],
+            priority=target.get('priority') or 'normal',
+            release_windows=target.get('release_windows') or (),
+            window_interval=target.get('window_interval') or DEFAULT_WINDOW_INTERVAL,
+            backoff=target.get('backoff', True)
+        )
+
+    def in_window(self, now):
+        dt = datetime.fromtimestamp(now)
+        return any(window.matches(dt) for window in self.windows)
+
+    # 次にリリースウィンドウが始まるまでの秒数（horizon 秒以内に無ければ None）
+    def seconds_until_window(self, now, horizon):
+        if not self.windows:
+            return None
+        minute = datetime.fromtimestamp(now).replace(second=0, microsecond=0)
+        for step in range(1, int(horizon // 60) + 2):
+            candidate = minute + timedelta(minutes=step)
+            if any(window.matches(candidate) for window in self.windows):
+                return max(0, candidate.timestamp() - now)
+        return None
+
+    # 次のポーリングまでの間隔と理由を返す関数
+    # last_release_at: 最新リリースの公開時刻、last_change_at: このプロセスでリリースを検出した時刻
+    def next_interval(self, now=None, last_release_at=None, last_change_at=None):
+        now = time.time() if now is None else now
+        interval = self.base_interval * PRIORITY_MULTIPLIERS[self.priority]
+        reason = f"{self.priority} priority"
+
+        if self.backoff and last_release_at is not None and self.backoff_after > 0:
+            periods = int((now - last_release_at) // self.backoff_after)
+            if periods > 0:
+                backed_off = min(interval * 2 ** min(periods, 16), max(self.backoff_max, interval))
+                if backed_off > interval:
+                    interval = backed_off
+                    reason = f"backoff (no release for {(now - last_release_at) / 86400:.0f} days)"
+
+        if self.in_window(now) and self.window_interval < interval:
+            interval, reason = self.window_interval, "release window"
+        if last_change_at is not None and now - last_change_at < self.boost_duration and self.boost_interval < interval:
+            interval, reason = self.boost_interval, "post-release boost"
+
+        # 長い間隔で待機中にリリースウィンドウが始まる場合は、ウィンドウの開始時に起きる
+        until_window = None if self.in_window(now) else self.seconds_until_window(now, interval)
+        if until_window is not None and until_window < interval:
+            interval, reason = until_window, "release window starts"
+
+        return max(MIN_POLLING_INTERVAL, math.ceil(interval)), reason
@@ -0,0 +1,163 @@
+import cProfile
+import functools
+import marshal
+import math
+import os
+import pstats
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+# プロファイリングを有効にするか（オプトイン）
+PROFILING_ENABLED = os.environ.get('PROFILING_ENABLED', 'false').lower() == 'true'
+
+# セッションごとに保持する再実行の件数
+DEFAULT_WINDOW = int(os.environ.get('PROFILING_WINDOW', '50'))
+
+# プロファイリングパネルを表示できるユーザー名（カンマ区切り。admin ロールのユーザーは常に表示）
+PROFILING_ADMINS = {name.strip() for name in os.environ.get('PROFILING_ADMINS', '').split(',') if name.strip()}
+
+TOTAL = 'total'
+
+# cProfile の記録はプロセス内で同時に1つだけ行う
+# （Python 3.12 以降の cProfile はインタープリター全体で1つしか有効にできず、全スレッドを記録する）
+_capture_lock = threading.Lock()
+
+
+# 管理者かを判定する関数（streamlit-authenticator のロールまたは PROFILING_ADMINS）
+def is_profiling_admin(username, roles=None):
+    return 'admin' in (roles or []) or username in PROFILING_ADMINS
+
+
+# 最近傍順位法でパーセンタイルを求める関数
+def percentile(values, q):
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(1, math.ceil(q / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+# スクリプト再実行ごとのセクション・外部呼び出しの所要時間を記録するクラス
+#
+# セッションごとに1つ作成し、直近 window 回分の再実行を保持する。
+# 無効な場合や再実行の外（フラグメントの再描画など）では計測せず、何もしない。
+class RerunProfiler:
+    def __init__(self, window=DEFAULT_WINDOW, enabled=False):
+        self.enabled = enabled
+        self.capture_next = False
+        self.capture_error = None
+        self.last_capture = None
+        self._history = deque(maxlen=window)
+        self._current = None
+        self._started_at = None
+        self._profile = None
+
+    @property
+    def reruns(self):
+        return len(self._history)
+
+    # 再実行の計測を開始する関数（capture_next が立っていればこの再実行を cProfile で記録）
+    # 他のセッションが記録中の場合は記録せず、capture_next を残して次の再実行で再試行する
+    def start_rerun(self, started_at=None):
+        self._stop_profile()
+        if not self.enabled:
+            self._current = None
+            return
+        self._current = {}
+        self._started_at = started_at if started_at is not None else time.perf_counter()
+        if self.capture_next:
+            self._start_profile()
+
+    def _start_profile(self):
+        if not _capture_lock.acquire(blocking=False):
+            self.capture_error = "Another session is capturing a profile, retrying on the next rerun"
+            return
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError as e:
+            # 他のプロファイラー（デバッガーなど）が有効になっている
+            _capture_lock.release()
+            self.capture_error = str(e)
+            self.capture_next = False
+            return
+        self._profile = profile
+        self.capture_next = False
+        self.capture_error = None
+
+    def record(self, name, seconds):
+        if self._current is not None:
+            self._current[name] = self._current.get(name, 0.0) + seconds
+
+    # スクリプトのセクションを計測するコンテキストマネージャー
+    @contextmanager
+    def section(self, name):
+        if self._current is None:
+            yield
+            return
+        started_at = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - started_at)
+
+    # GitHub や Kubernetes API などの外部呼び出しを計測する
+    def call(self, name):
+        return self.section(f"call:{name}")
+
+    # 外部呼び出しを行う関数を計測対象にするデコレーター
+    def timed(self, name):
+        def decorator(func):
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                with self.call(name):
+                    return func(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    # 再実行の計測を終了し、履歴に追加する関数
+    def end_rerun(self):
+        if self._current is None:
+            return
+        self._current[TOTAL] = time.perf_counter() - self._started_at
+        self._history.append(self._current)
+        self._current = None
+        profile = self._stop_profile()
+        if profile is not None:
+            self.last_capture = marshal.dumps(pstats.Stats(profile).stats)
+
+    # 中断された再実行（RerunException など）の計測を破棄する関数（記録中の cProfile も停止する）
+    def abort_rerun(self):
+        self._current = None
+        self._stop_profile()
+
+    def _stop_profile(self):
+        profile, self._profile = self._profile, None
+        if profile is not None:
+            try:
+                profile.disable()
+            finally:
+                _capture_lock.release()
+        return profile
+
+    # セクションごとの p50/p95 を返す関数（p95 の大きい順）
+    def summary(self):
+        samples = {}
+        for rerun in self._history:
+            for name, seconds in rerun.items():
+                samples.setdefault(name, []).append(seconds)
+        last = self._history[-1] if self._history else {}
+        rows = [
+            {
+                "section": name,
+                "count": len(values),
+                "p50": percentile(values, 50),
+                "p95": percentile(values, 95),
+                "last": last.get(name),
+            }
+            for name, values in samples.items()
+        ]
+        rows.sort(key=lambda row: row["p95"], reverse=True)
+        return rows
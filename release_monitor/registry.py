@@ -0,0 +1,169 @@
+import base64
+import json
+import re
+from urllib.parse import urlparse
+
+import requests
+
+DEFAULT_REGISTRY = "registry-1.docker.io"
+
+# Docker Hub を指す認証情報のキー（imagePullSecret では index.docker.io などで登録される）
+DOCKER_HUB_ALIASES = {"docker.io", "index.docker.io", "registry.hub.docker.com", DEFAULT_REGISTRY}
+
+# マニフェスト取得時に受け付けるメディアタイプ（マルチアーキテクチャのインデックスを含む）
+MANIFEST_ACCEPT = ", ".join([
+    "application/vnd.oci.image.index.v1+json",
+    "application/vnd.docker.distribution.manifest.list.v2+json",
+    "application/vnd.oci.image.manifest.v1+json",
+    "application/vnd.docker.distribution.manifest.v2+json",
+])
+
+DIGEST_PATTERN = re.compile(r"(sha256:[0-9a-f]{64})")
+
+
+# イメージ参照を (registry, repository, tag, digest) に分解する関数
+def parse_image_reference(image):
+    digest = None
+    if "@" in image:
+        image, digest = image.split("@", 1)
+
+    registry = DEFAULT_REGISTRY
+    first, _, rest = image.partition("/")
+    if rest and ("." in first or ":" in first or first == "localhost"):
+        registry = first
+        image = rest
+
+    tag = None
+    name, sep, candidate = image.rpartition(":")
+    if sep and "/" not in candidate:
+        image, tag = name, candidate
+
+    if registry == DEFAULT_REGISTRY and "/" not in image:
+        image = f"library/{image}"
+    return registry, image, tag, digest
+
+
+# レジストリ・リポジトリ・タグ・ダイジェストからイメージ参照を組み立てる関数
+def format_image_reference(registry, repository, tag=None, digest=None):
+    if registry == DEFAULT_REGISTRY:
+        reference = repository[len("library/"):] if repository.startswith("library/") else repository
+    else:
+        reference = f"{registry}/{repository}"
+    if tag:
+        reference += f":{tag}"
+    if digest:
+        reference += f"@{digest}"
+    return reference
+
+
+# コンテナステータスの image_id からダイジェストを取り出す関数
+# 例: "docker-pullable://ghcr.io/org/app@sha256:..." / "ghcr.io/org/app@sha256:..."
+def digest_from_image_id(image_id):
+    if not image_id:
+        return None
+    match = DIGEST_PATTERN.search(image_id)
+    return match.group(1) if match else None
+
+
+# 認証情報のキー（URL またはホスト名）をレジストリのホスト名に正規化する関数
+def normalize_registry_host(server):
+    host = urlparse(server if "//" in server else f"//{server}").netloc or server
+    return DEFAULT_REGISTRY if host in DOCKER_HUB_ALIASES else host
+
+
+# imagePullSecret の内容（.dockerconfigjson / .dockercfg）から {ホスト: (ユーザー名, パスワード)} を取り出す関数
+def credentials_from_docker_config(config):
+    credentials = {}
+    for server, entry in (config.get("auths", config) or {}).items():
+        if not isinstance(entry, dict):
+            continue
+        username, password = entry.get("username"), entry.get("password")
+        if not password and entry.get("auth"):
+            username, _, password = base64.b64decode(entry["auth"]).decode("utf-8").partition(":")
+        if password:
+            credentials[normalize_registry_host(server)] = (username, password)
+    return credentials
+
+
+# Kubernetes Secret の data（base64）から認証情報を取り出す関数
+def credentials_from_secret_data(data):
+    for key in (".dockerconfigjson", ".dockercfg"):
+        if data and data.get(key):
+            return credentials_from_docker_config(json.loads(base64.b64decode(data[key])))
+    return {}
+
+
+# ホストのサイト（ドメインの末尾2ラベル）を求める関数。IP アドレスはそのまま返す
+def _site(host):
+    hostname = urlparse(f"//{host}").hostname or ""
+    if not re.search(r"[a-z]", hostname.rsplit(".", 1)[-1]):
+        return hostname
+    return ".".join(hostname.split(".")[-2:])
+
+
+# 認証サーバーがレジストリと同じサイトか判定する関数
+# 例: registry-1.docker.io と auth.docker.io は同じ docker.io のため認証情報を送る
+def _same_site(host, other):
+    return _site(host) == _site(other) != ""
+
+
+# WWW-Authenticate ヘッダー（Bearer）を解析する関数
+def _parse_bearer_challenge(header):
+    if not header or not header.lower().startswith("bearer "):
+        return None
+    return dict(re.findall(r'(\w+)="([^"]*)"', header))
+
+
+# Bearer トークンを取得する関数（認証情報が無い場合は匿名で取得）
+def _fetch_bearer_token(challenge, credential=None, timeout=10):
+    params = {key: challenge[key] for key in ("service", "scope") if key in challenge}
+    auth = credential
+    response = requests.get(challenge["realm"], params=params, auth=auth, timeout=timeout)
+    response.raise_for_status()
+    payload = response.json()
+    return payload.get("token") or payload.get("access_token")
+
+
+# レジストリ v2 API でタグをダイジェストに解決する関数
+#
+# registry_url を指定するとそのレジストリに問い合わせる（例: テスト用の http://localhost:5000）。
+# credentials は {ホスト: (ユーザー名, パスワード)} で、問い合わせ先のホストの認証情報だけを使う。
+# 認証情報はそのレジストリと同じサイトの認証サーバーにだけ送り、それ以外は匿名でアクセスする。
+# 解決できなかった場合は None を返す。
+def resolve_image_digest(image, tag=None, registry_url=None, credentials=None, timeout=10):
+    registry, repository, image_tag, _ = parse_image_reference(image)
+    reference = tag or image_tag or "latest"
+    base_url = (registry_url or f"https://{registry}").rstrip("/")
+    url = f"{base_url}/v2/{repository}/manifests/{reference}"
+    host = urlparse(base_url).netloc
+    credential = (credentials or {}).get(normalize_registry_host(host))
+    headers = {"Accept": MANIFEST_ACCEPT}
+    auth = None
+
+    try:
+        response = requests.head(url, headers=headers, timeout=timeout)
+        if response.status_code == 401:
+            challenge = _parse_bearer_challenge(response.headers.get("WWW-Authenticate"))
+            if challenge and "realm" in challenge:
+                realm_host = urlparse(challenge["realm"]).netloc
+                token = _fetch_bearer_token(
+                    challenge, credential if _same_site(realm_host, host) else None, timeout
+                )
+                headers["Authorization"] = f"Bearer {token}"
+            elif credential:
+                auth = credential
+            response = requests.head(url, headers=headers, auth=auth, timeout=timeout)
+        if response.status_code == 404:
+            return None
+        response.raise_for_status()
+
+        digest = response.headers.get("Docker-Content-Digest")
+        if not digest:
+            # HEAD でダイジェストを返さないレジストリ向けに GET で再試行
+            response = requests.get(url, headers=headers, auth=auth, timeout=timeout)
+            response.raise_for_status()
+            digest = response.headers.get("Docker-Content-Digest")
+        return digest
+    except requests.exceptions.RequestException as e:
+        print(f"[registry] Error resolving digest for {image} ({reference}): {e}")
+        return None
@@ -0,0 +1,185 @@
+import os
+import sys
+import threading
+from collections import OrderedDict
+
+from release_monitor.release_index import ReleaseIndex
+from release_monitor.release_state import load_release_state
+
+# キャッシュ全体のメモリ予算（バイト）
+DEFAULT_MAX_BYTES = int(os.environ.get('RELEASE_CACHE_MAX_BYTES', str(16 * 1024 * 1024)))
+
+# キャッシュするデータの種類
+LATEST = 'latest'
+HISTORY = 'history'
+K8S_STATUS = 'k8s_status'
+
+
+# キャッシュエントリのメモリ使用量を見積もる関数
+#
+# JSON の長さでは dict や str のオブジェクトのオーバーヘッドが含まれず、実際の使用量の半分以下になる。
+# コンテナをたどって各オブジェクトの sys.getsizeof を合計する（エントリ内で共有されるオブジェクトは1回だけ数える）。
+def estimate_size(value):
+    seen = set()
+    stack = [value]
+    size = 0
+    while stack:
+        obj = stack.pop()
+        if id(obj) in seen:
+            continue
+        seen.add(id(obj))
+        size += sys.getsizeof(obj)
+        if isinstance(obj, dict):
+            stack.extend(obj.keys())
+            stack.extend(obj.values())
+        elif isinstance(obj, (list, tuple, set, frozenset)):
+            stack.extend(obj)
+    return size
+
+
+# release_state.json から永続化されたリリース履歴を読み込む関数
+def load_persisted_releases(target_id):
+    return (load_release_state().get(target_id) or {}).get('releases') or None
+
+
+# ターゲットごとのリリース情報・デプロイメントステータスを保持する共有キャッシュ
+#
+# プロセス内で1つだけ作成し、全セッションとモニタリングスレッドで共有する。
+# 合計サイズが max_bytes を超えると最も長く使われていないエントリから削除する。
+# 監視中のターゲット（pin したもの）は、それ以外のエントリを削除しきるまで残す。
+# 削除されたリリース履歴は history() で release_state.json から読み直す。
+# 履歴ごとのタグインデックスは履歴と同じ寿命で保持する（履歴が削除されると一緒に破棄）。
+class ReleaseCache:
+    def __init__(self, max_bytes=DEFAULT_MAX_BYTES, loader=load_persisted_releases):
+        self.max_bytes = max_bytes
+        self.loader = loader
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._indexes = {}
+        self._pinned = set()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    @property
+    def size_bytes(self):
+        return self._bytes
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, kind, target_id, default=None):
+        key = (kind, target_id)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return default
+            self._entries.move_to_end(key)
+            return entry[0]
+
+    def put(self, kind, target_id, value):
+        key = (kind, target_id)
+        size = estimate_size(value)
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._bytes -= previous[1]
+            if kind == HISTORY:
+                self._indexes.pop(target_id, None)
+            self._entries[key] = (value, size)
+            self._bytes += size
+            self._evict_locked(keep=key)
+        return value
+
+    # 取得ごとに作成したインデックスを、履歴と最新リリースとして格納する関数
+    def put_index(self, target_id, index, latest_release):
+        self.put(HISTORY, target_id, index.releases)
+        with self._lock:
+            if (HISTORY, target_id) in self._entries:
+                self._indexes[target_id] = index
+        self.put(LATEST, target_id, latest_release)
+        return index
+
+    # リリース履歴を取得する関数（削除済みの場合は永続化された履歴を読み直す）
+    def history(self, target_id):
+        releases = self.get(HISTORY, target_id)
+        if releases is None and self.loader is not None:
+            releases = self.loader(target_id)
+            if releases:
+                self.put(HISTORY, target_id, releases)
+        return releases
+
+    # リリース履歴のインデックスを取得する関数（読み直した履歴は初回のみインデックスを作成）
+    def index(self, target_id):
+        releases = self.history(target_id)
+        if not releases:
+            return None
+        with self._lock:
+            index = self._indexes.get(target_id)
+            if index is not None and index.releases is releases:
+                return index
+        index = ReleaseIndex(releases)
+        with self._lock:
+            key = (HISTORY, target_id)
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] is releases:
+                # 並べ替え済みの一覧に置き換えて、次回からはインデックスを再利用する
+                self._entries[key] = (index.releases, entry[1])
+                self._indexes[target_id] = index
+        return index
+
+    # 永続化されたリリース状態をキャッシュに読み込む関数（ウォームスタート）
+    #
+    # release_state は load_release_state() の内容。キャッシュ済みのターゲットは上書きしない。
+    # release_state.json に履歴が無いターゲット（emptyDir が作り直された後など）は、
+    # load_shared_state()（共有状態ストアの load）に記録された最新リリースだけを読み込む。
+    def warm_start(self, targets, release_state, load_shared_state=None):
+        shared_state = None
+        for target in targets:
+            target_id = target['id']
+            releases = (release_state.get(target_id) or {}).get('releases')
+            if releases:
+                if self.get(HISTORY, target_id) is not None:
+                    continue
+                self.put(HISTORY, target_id, releases)
+                if self.get(LATEST, target_id) is None:
+                    index = self.index(target_id)
+                    self.put(LATEST, target_id, index.latest(target.get('include_prereleases', False)))
+            elif load_shared_state is not None and self.get(LATEST, target_id) is None:
+                if shared_state is None:
+                    shared_state = load_shared_state()
+                latest_release = (shared_state.get(target_id) or {}).get('latest_release')
+                if latest_release:
+                    self.put(LATEST, target_id, latest_release)
+
+    # ターゲットのエントリを削除する関数（kind を省略すると全種類）
+    def discard(self, target_id, kind=None):
+        with self._lock:
+            for key in [key for key in self._entries if key[1] == target_id and kind in (None, key[0])]:
+                self._remove_locked(key)
+
+    # LRU で削除されにくくするターゲット（監視中のターゲット）を設定する関数
+    def pin(self, target_id):
+        with self._lock:
+            self._pinned.add(target_id)
+
+    def unpin(self, target_id):
+        with self._lock:
+            self._pinned.discard(target_id)
+
+    # 予算内に収まるまで古いエントリを削除する（まず pin されていないもの、次に pin されたもの）
+    def _evict_locked(self, keep):
+        for evict_pinned in (False, True):
+            if self._bytes <= self.max_bytes:
+                return
+            for key in list(self._entries):
+                if self._bytes <= self.max_bytes:
+                    return
+                if key == keep or (key[1] in self._pinned) != evict_pinned:
+                    continue
+                self._remove_locked(key)
+                self.evictions += 1
+
+    def _remove_locked(self, key):
+        self._bytes -= self._entries.pop(key)[1]
+        if key[0] == HISTORY:
+            self._indexes.pop(key[1], None)
@@ -0,0 +1,83 @@
+import re
+
+from release_monitor.state_store import trim_release
+
+# v1.2.3 / 1.2 / 1.2.3-rc.1+build などのタグにマッチするパターン
+SEMVER_PATTERN = re.compile(
+    r"^[vV]?(?P<major>\d+)(?:\.(?P<minor>\d+))?(?:\.(?P<patch>\d+))?"
+    r"(?:-(?P<prerelease>[0-9A-Za-z.-]+))?(?:\+[0-9A-Za-z.-]+)?$"
+)
+
+
+# タグをセマンティックバージョンとして解析する関数（解析できない場合は None）
+# 戻り値は比較可能なタプルで、プレリリースは同じバージョンの正式リリースより小さくなる
+def parse_semver(tag):
+    match = SEMVER_PATTERN.match(tag or "")
+    if not match:
+        return None
+    core = tuple(int(match.group(part) or 0) for part in ("major", "minor", "patch"))
+    prerelease = match.group("prerelease")
+    if not prerelease:
+        return core + (1, ())
+    # 数値の識別子は数値として、英数字の識別子は文字列として比較する（数値の方が小さい）
+    identifiers = tuple(
+        (0, int(part), "") if part.isdigit() else (1, 0, part)
+        for part in prerelease.split(".")
+    )
+    return core + (0, identifiers)
+
+
+# リリースの並び順のキー
+# セマンティックバージョンのタグはバージョン順、それ以外は公開日時順（セマンティックバージョンより古い扱い）
+def release_sort_key(release):
+    published_at = release.get("published_at") or ""
+    version = parse_semver(release.get("tag_name"))
+    if version is None:
+        return (0, (), published_at)
+    return (1, version, published_at)
+
+
+# 1回の取得結果から作るリリースのインデックス
+#
+# タグをキーにした辞書で定数時間の検索ができ、releases は新しい順に並べ替え済み。
+# 最新の正式リリースと、プレリリースを含む最新リリースは作成時に求めておく。
+class ReleaseIndex:
+    def __init__(self, releases):
+        self.releases = sorted(releases or [], key=release_sort_key, reverse=True)
+        self._by_tag = {}
+        for release in self.releases:
+            self._by_tag.setdefault(release["tag_name"], release)
+        published = [release for release in self.releases if not release.get("draft")]
+        self._latest = next((release for release in published if not release.get("prerelease")), None)
+        self._latest_prerelease = published[0] if published else None
+
+    # GitHub API のレスポンスから、表示に必要なフィールドだけに縮小して作成する
+    @classmethod
+    def from_github(cls, releases):
+        return cls([trim_release(release) for release in releases or []])
+
+    def __len__(self):
+        return len(self.releases)
+
+    def __contains__(self, tag):
+        return tag in self._by_tag
+
+    def get(self, tag, default=None):
+        return self._by_tag.get(tag, default)
+
+    # 最新リリースを返す関数（下書きは常に除外）
+    def latest(self, include_prereleases=False):
+        return self._latest_prerelease if include_prereleases else self._latest
+
+    # 条件に合うリリースを新しい順に返す関数
+    def filtered(self, include_prereleases=True, include_drafts=True):
+        return [
+            release for release in self.releases
+            if (include_prereleases or not release.get("prerelease"))
+            and (include_drafts or not release.get("draft"))
+        ]
+
+    # 選択肢の表示用ラベル（タグ名とリリース名）
+    def label(self, tag):
+        release = self._by_tag.get(tag)
+        return f"{tag} ({(release.get('name') if release else None) or tag})"
@@ -0,0 +1,64 @@
+import json
+import os
+import tempfile
+import threading
+import time
+
+from release_monitor.state_store import trim_release
+
+# ターゲットごとに保存するリリース履歴の最大件数
+MAX_PERSISTED_RELEASES = 100
+
+_lock = threading.Lock()
+
+
+# リリース状態ファイルのパスを取得する関数（config.json と同じディレクトリ）
+def release_state_path():
+    config_dir = os.environ.get('CONFIG_PATH', '')
+    return os.path.join(config_dir, 'release_state.json') if config_dir else 'release_state.json'
+
+
+# 永続化されたリリース状態を読み込む関数
+def load_release_state(path=None):
+    path = path or release_state_path()
+    try:
+        with open(path, 'r') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+    except (OSError, ValueError) as e:
+        print(f"[release-state] Error loading release state: {e}")
+        return {}
+
+
+# ターゲットのリリース履歴を永続化する関数
+# 書き込みは一時ファイル経由で置き換えるため、途中で落ちても壊れたファイルは残らない
+def save_target_releases(target_id, releases, path=None):
+    path = path or release_state_path()
+    with _lock:
+        state = load_release_state(path)
+        state[target_id] = {
+            'releases': [trim_release(release) for release in releases[:MAX_PERSISTED_RELEASES]],
+            'saved_at': time.time()
+        }
+        _write_state(state, path)
+
+
+def remove_target_releases(target_id, path=None):
+    path = path or release_state_path()
+    with _lock:
+        state = load_release_state(path)
+        if target_id in state:
+            del state[target_id]
+            _write_state(state, path)
+
+
+def _write_state(state, path):
+    directory = os.path.dirname(os.path.abspath(path))
+    try:
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.release_state.')
+        with os.fdopen(fd, 'w') as f:
+            json.dump(state, f)
+        os.replace(tmp_path, path)
+    except OSError as e:
+        print(f"[release-state] Error saving release state: {e}")
@@ -0,0 +1,98 @@
+import ast
+import json
+import os
+import random
+import subprocess
+import sys
+import time
+
+# 起動時間の予算（秒）
+DEFAULT_STARTUP_BUDGET = float(os.environ.get('STARTUP_BUDGET_SECONDS', '3.0'))
+
+# 起動時インポートを計測するスクリプト（リポジトリ直下の app.py）
+APP_SCRIPT = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "app.py")
+
+# 起動時に読み込まれてはいけない重いモジュール（遅延モジュール自体は sys.modules に登録されるためサブモジュールで判定）
+DEFERRED_IMPORTS = ("kubernetes.client",)
+
+
+# 起動処理の各フェーズの所要時間を記録するクラス
+class StartupTimer:
+    def __init__(self, started_at=None):
+        self.started_at = started_at if started_at is not None else time.perf_counter()
+        self._last = self.started_at
+        self.phases = []
+
+    def mark(self, phase):
+        now = time.perf_counter()
+        self.phases.append((phase, now - self._last))
+        self._last = now
+
+    @property
+    def total(self):
+        return self._last - self.started_at
+
+    def summary(self):
+        phases = ", ".join(f"{phase}={seconds:.3f}s" for phase, seconds in self.phases)
+        return f"{self.total:.3f}s ({phases})"
+
+
+# アクティブなターゲットの再開を各ポーリング間隔に分散させる初期遅延を計算する関数
+#
+# n 個のターゲットのうち i 番目は間隔を n 等分したスロット i に、スロット内のジッターを加えて配置する。
+# 遅延は常にポーリング間隔未満なので、再開後の最初のチェックが1周期以上遅れることはない。
+def staggered_delays(intervals, rng=None):
+    rng = rng or random.Random()
+    count = len(intervals)
+    delays = []
+    for i, interval in enumerate(intervals):
+        slot = interval / count
+        delays.append(i * slot + rng.uniform(0, slot))
+    return delays
+
+
+# スクリプトのトップレベルのインポート文を抽出する関数
+#
+# 手作業で管理する一覧は app.py の変更に追従しなくなるため、app.py 自体を ast で解析する。
+# 関数内のインポート（遅延インポート）は起動時に実行されないため含めない。
+def startup_imports(script=APP_SCRIPT):
+    with open(script, encoding="utf-8") as f:
+        tree = ast.parse(f.read(), filename=script)
+    return [ast.unparse(node) for node in tree.body if isinstance(node, (ast.Import, ast.ImportFrom))]
+
+
+# 新しいプロセスでスクリプトのトップレベルのインポートを実行し、所要時間と読み込まれた遅延モジュールを返す関数
+def measure_startup_imports(script=APP_SCRIPT, deferred=DEFERRED_IMPORTS):
+    source = "\n".join(startup_imports(script))
+    code = (
+        "import json, sys, time\n"
+        "start = time.perf_counter()\n"
+        f"exec({source!r})\n"
+        "elapsed = time.perf_counter() - start\n"
+        f"loaded = [name for name in {list(deferred)!r} if name in sys.modules]\n"
+        "print(json.dumps({'elapsed': elapsed, 'loaded': loaded}))\n"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True, check=True, cwd=os.path.dirname(script)
+    )
+    payload = json.loads(result.stdout.strip().splitlines()[-1])
+    return payload["elapsed"], payload["loaded"]
+
+
+# 起動時間の回帰チェック（CI のワークフローから `python -m release_monitor.startup` で実行）
+def main():
+    budget = DEFAULT_STARTUP_BUDGET
+    elapsed, loaded = measure_startup_imports()
+    print(f"Startup imports took {elapsed:.3f}s (budget {budget:.1f}s)")
+    failed = False
+    if loaded:
+        print(f"Deferred modules were imported at startup: {', '.join(loaded)}")
+        failed = True
+    if elapsed > budget:
+        print("Startup import budget exceeded")
+        failed = True
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,197 @@
+import json
+import os
+import tempfile
+import threading
+import time
+
+from release_monitor.lazy_import import lazy_import
+
+# kubernetes クライアントは初回使用時にインポートする
+k8s = lazy_import("kubernetes")
+
+STATE_KEY = "state.json"
+
+# ConfigMap の更新が他のプロセスと競合した場合の再試行回数
+UPDATE_RETRIES = 5
+
+# ConfigMap に保存するリリース情報のフィールド（1MiB制限があるため必要なものだけ）
+RELEASE_FIELDS = ("tag_name", "name", "published_at", "body", "html_url", "prerelease", "draft")
+
+
+# ConfigMap へ保存できるようにリリース情報を縮小する関数
+def trim_release(release):
+    if not release:
+        return None
+    trimmed = {key: release.get(key) for key in RELEASE_FIELDS if key in release}
+    if trimmed.get("body") and len(trimmed["body"]) > 2000:
+        trimmed["body"] = trimmed["body"][:2000]
+    trimmed["assets"] = [
+        {"name": asset.get("name"), "browser_download_url": asset.get("browser_download_url")}
+        for asset in release.get("assets") or []
+    ]
+    return trimmed
+
+
+# レプリカ間でリリース状態を共有するための ConfigMap ストア
+#
+# 書き込みはリーダーのみが行い、全レプリカのダッシュボードはここから読み込む。
+# リーダーはターゲットごとのスレッドから同時に書き込むため、読み込みから書き込みまでをロックで直列化する。
+# 書き込みは resourceVersion を指定した楽観的排他制御で行い、他のプロセスと競合した場合は読み込みからやり直す。
+class ConfigMapStateStore:
+    def __init__(self, name, namespace, api=None, cache_ttl=5):
+        self.name = name
+        self.namespace = namespace
+        self.cache_ttl = cache_ttl
+        self._api = api
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._cache = None
+        self._cache_time = 0.0
+
+    @property
+    def api(self):
+        if self._api is None:
+            self._api = k8s.client.CoreV1Api()
+        return self._api
+
+    # 全ターゲットの状態を読み込む関数
+    def load(self, use_cache=True):
+        with self._lock:
+            if use_cache and self._cache is not None and time.monotonic() - self._cache_time < self.cache_ttl:
+                return dict(self._cache)
+        try:
+            config_map = self._read()
+            state = self._parse(config_map)
+        except Exception as e:
+            print(f"[state-store] Error reading state: {e}")
+            return dict(self._cache or {})
+        self._set_cache(state)
+        return dict(state)
+
+    # 1ターゲット分の状態を更新する関数
+    def update_target(self, target_id, latest_release=None, stored_release_tag=None):
+        def apply(state):
+            entry = dict(state.get(target_id) or {})
+            if latest_release is not None:
+                entry["latest_release"] = trim_release(latest_release)
+            if stored_release_tag is not None:
+                entry["stored_release_tag"] = stored_release_tag
+            entry["updated_at"] = time.time()
+            state[target_id] = entry
+            return state
+
+        self._update(apply)
+
+    def remove_target(self, target_id):
+        def apply(state):
+            if target_id not in state:
+                return None
+            del state[target_id]
+            return state
+
+        self._update(apply)
+
+    def save(self, state):
+        self._update(lambda current: state)
+
+    def _read(self):
+        try:
+            return self.api.read_namespaced_config_map(self.name, self.namespace)
+        except k8s.client.rest.ApiException as e:
+            if e.status == 404:
+                return None
+            raise
+
+    @staticmethod
+    def _parse(config_map):
+        if config_map is None:
+            return {}
+        return json.loads((config_map.data or {}).get(STATE_KEY) or "{}")
+
+    def _set_cache(self, state):
+        with self._lock:
+            self._cache = state
+            self._cache_time = time.monotonic()
+
+    # 最新の状態を読み込み、func(state) の結果を書き込む関数（func が None を返した場合は書き込まない）
+    def _update(self, func):
+        with self._write_lock:
+            for _ in range(UPDATE_RETRIES):
+                config_map = self._read()
+                state = func(self._parse(config_map))
+                if state is None:
+                    return
+                data = {STATE_KEY: json.dumps(state)}
+                try:
+                    if config_map is None:
+                        self.api.create_namespaced_config_map(self.namespace, k8s.client.V1ConfigMap(
+                            metadata=k8s.client.V1ObjectMeta(name=self.name, namespace=self.namespace),
+                            data=data
+                        ))
+                    else:
+                        body = {"metadata": {"resourceVersion": config_map.metadata.resource_version}, "data": data}
+                        self.api.patch_namespaced_config_map(self.name, self.namespace, body)
+                except k8s.client.rest.ApiException as e:
+                    if e.status != 409:
+                        raise
+                    continue
+                self._set_cache(state)
+                return
+        raise RuntimeError(f"ConfigMap {self.namespace}/{self.name} was modified concurrently, giving up")
+
+
+# 単一レプリカ時に使うファイルベースのストア
+#
+# config.json と同じディレクトリの monitor_state.json に保存するため、
+# 同じボリュームを共有するヘッドレスデーモンとダッシュボードの間で状態を受け渡せる。
+class FileStateStore:
+    def __init__(self, path=None):
+        if path is None:
+            config_dir = os.environ.get('CONFIG_PATH', '')
+            path = os.path.join(config_dir, 'monitor_state.json') if config_dir else 'monitor_state.json'
+        self.path = path
+        self._lock = threading.Lock()
+
+    def load(self, use_cache=True):
+        try:
+            with open(self.path, 'r') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError) as e:
+            print(f"[state-store] Error reading state: {e}")
+            return {}
+
+    def update_target(self, target_id, latest_release=None, stored_release_tag=None):
+        with self._lock:
+            state = self.load()
+            entry = dict(state.get(target_id) or {})
+            if latest_release is not None:
+                entry["latest_release"] = trim_release(latest_release)
+            if stored_release_tag is not None:
+                entry["stored_release_tag"] = stored_release_tag
+            entry["updated_at"] = time.time()
+            state[target_id] = entry
+            self._write(state)
+
+    def remove_target(self, target_id):
+        with self._lock:
+            state = self.load()
+            if target_id in state:
+                del state[target_id]
+                self._write(state)
+
+    def save(self, state):
+        with self._lock:
+            self._write(state)
+
+    # 一時ファイルに書いてから置き換え、読み込み側が書きかけのファイルを読まないようにする
+    def _write(self, state):
+        directory = os.path.dirname(os.path.abspath(self.path))
+        try:
+            fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.monitor_state.')
+            with os.fdopen(fd, 'w') as f:
+                json.dump(state, f)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            print(f"[state-store] Error saving state: {e}")
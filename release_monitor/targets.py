@@ -0,0 +1,211 @@
+import csv
+import io
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+import yaml
+
+from release_monitor.lazy_import import lazy_import
+from release_monitor.polling import DEFAULT_WINDOW_INTERVAL, MIN_POLLING_INTERVAL, PollingPolicy
+
+# kubernetes クライアントは初回使用時にインポートする
+k8s = lazy_import("kubernetes")
+
+# 新しいターゲットのデフォルト値
+TARGET_DEFAULTS = {
+    'github_repo': '',
+    'github_token': '',
+    'k8s_namespace': 'default',
+    'k8s_deployment': '',
+    'polling_interval': 60,
+    'is_active': False,
+    'latest_release': None,
+    'digest_check': False,
+    'registry_url': '',
+    'include_prereleases': False,
+    'priority': 'normal',
+    'backoff': True,
+    'release_windows': [],
+    'window_interval': DEFAULT_WINDOW_INTERVAL,
+}
+
+
+# デフォルト値で新しいターゲットを作成する関数
+def new_target(target_id, name):
+    return dict(TARGET_DEFAULTS, id=target_id, name=name, release_windows=[])
+
+
+# インポート・エクスポートの対象フィールド（トークンはエクスポートしない。状態は対象外）
+EXPORT_FIELDS = (
+    'id', 'name', 'github_repo', 'k8s_namespace', 'k8s_deployment', 'polling_interval', 'priority', 'backoff',
+    'release_windows', 'window_interval', 'include_prereleases', 'digest_check', 'registry_url'
+)
+IMPORT_FIELDS = EXPORT_FIELDS + ('github_token',)
+
+INT_FIELDS = ('polling_interval', 'window_interval')
+BOOL_FIELDS = ('backoff', 'include_prereleases', 'digest_check')
+
+
+# ターゲットを YAML または CSV の文字列にエクスポートする関数
+def export_targets(targets, fmt='yaml'):
+    rows = [{field: target.get(field, TARGET_DEFAULTS.get(field)) for field in EXPORT_FIELDS} for target in targets]
+    if fmt == 'yaml':
+        return yaml.safe_dump({'targets': rows}, sort_keys=False, allow_unicode=True)
+    if fmt == 'csv':
+        output = io.StringIO()
+        writer = csv.DictWriter(output, fieldnames=EXPORT_FIELDS)
+        writer.writeheader()
+        for row in rows:
+            # CSV ではリリースウィンドウを ; 区切りで1列にまとめる
+            writer.writerow(dict(row, release_windows=';'.join(row['release_windows'] or [])))
+        return output.getvalue()
+    raise ValueError(f"unsupported format: {fmt}")
+
+
+def _to_bool(value):
+    if isinstance(value, bool):
+        return value
+    return str(value).strip().lower() in ('1', 'true', 'yes', 'y', 'on')
+
+
+# インポートした1件を検証し、型をそろえる関数
+def _normalize_row(row, number):
+    target = {}
+    for field in IMPORT_FIELDS:
+        value = row.get(field)
+        if value is None or value == '':
+            continue
+        if field in INT_FIELDS:
+            try:
+                value = int(value)
+            except (TypeError, ValueError):
+                raise ValueError(f"target {number}: {field} must be an integer") from None
+            if value < MIN_POLLING_INTERVAL:
+                raise ValueError(f"target {number}: {field} must be at least {MIN_POLLING_INTERVAL} seconds")
+        elif field in BOOL_FIELDS:
+            value = _to_bool(value)
+        elif field == 'release_windows':
+            if isinstance(value, str):
+                value = value.split(';')
+            value = [str(window).strip() for window in value if str(window).strip()]
+        else:
+            value = str(value).strip()
+        target[field] = value
+    if not target.get('github_repo') and not target.get('name'):
+        raise ValueError(f"target {number}: name or github_repo is required")
+    try:
+        PollingPolicy.from_target(dict(TARGET_DEFAULTS, **target))
+    except ValueError as e:
+        raise ValueError(f"target {number}: {e}") from None
+    return target
+
+
+# YAML（targets のリスト、またはリストそのもの）または CSV からターゲットを読み込む関数
+def parse_targets(text, fmt='yaml'):
+    if fmt == 'yaml':
+        data = yaml.safe_load(text) or []
+        rows = data.get('targets', []) if isinstance(data, dict) else data
+        if not isinstance(rows, list) or not all(isinstance(row, dict) for row in rows):
+            raise ValueError("YAML must be a list of targets or a mapping with a 'targets' list")
+    elif fmt == 'csv':
+        try:
+            rows = list(csv.DictReader(io.StringIO(text)))
+        except csv.Error as e:
+            raise ValueError(f"invalid CSV: {e}") from None
+    else:
+        raise ValueError(f"unsupported format: {fmt}")
+    return [_normalize_row(row, number) for number, row in enumerate(rows, start=1)]
+
+
+# インポートしたターゲットを既存のターゲットにマージする関数
+# id（無ければ名前）が一致するターゲットは更新し、それ以外は新しい id で追加する
+# 戻り値: (追加件数, 更新件数, 次のターゲット番号)
+def merge_targets(targets, imported, next_target_id):
+    by_id = {target['id']: target for target in targets}
+    by_name = {target['name']: target for target in targets}
+    added = updated = 0
+    for row in imported:
+        existing = by_id.get(row.get('id')) or by_name.get(row.get('name'))
+        if existing is not None:
+            existing.update({key: value for key, value in row.items() if key != 'id'})
+            updated += 1
+            continue
+        while f'target{next_target_id}' in by_id:
+            next_target_id += 1
+        target_id = f'target{next_target_id}'
+        next_target_id += 1
+        target = new_target(target_id, row.get('name') or row['github_repo'])
+        target.update({key: value for key, value in row.items() if key != 'id'})
+        targets.append(target)
+        by_id[target_id] = by_name[target['name']] = target
+        added += 1
+    return added, updated, next_target_id
+
+
+# 条件に一致するターゲットのインデックスを返す関数
+def filter_targets(targets, query='', namespaces=None, priorities=None, active=None):
+    query = (query or '').strip().lower()
+    indexes = []
+    for index, target in enumerate(targets):
+        if query and query not in target['name'].lower() and query not in (target.get('github_repo') or '').lower():
+            continue
+        if namespaces and target.get('k8s_namespace') not in namespaces:
+            continue
+        if priorities and (target.get('priority') or 'normal') not in priorities:
+            continue
+        if active is not None and bool(target.get('is_active')) != active:
+            continue
+        indexes.append(index)
+    return indexes
+
+
+# GitHub リポジトリが存在するか確認する関数（問題が無ければ None、あればその内容）
+def check_github_repo(repo, token=None, timeout=10):
+    if not repo:
+        return "not set"
+    headers = {"Authorization": f"token {token}"} if token else {}
+    try:
+        response = requests.get(f"https://api.github.com/repos/{repo}", headers=headers, timeout=timeout)
+    except requests.exceptions.RequestException as e:
+        return str(e)
+    if response.status_code == 404:
+        return "not found"
+    if not response.ok:
+        return f"HTTP {response.status_code}"
+    return None
+
+
+# Kubernetes デプロイメントが存在するか確認する関数（問題が無ければ None、あればその内容）
+def check_deployment(namespace, deployment, apps_v1=None):
+    if not namespace or not deployment:
+        return "not set"
+    try:
+        (apps_v1 or k8s.client.AppsV1Api()).read_namespaced_deployment(name=deployment, namespace=namespace)
+    except k8s.client.rest.ApiException as e:
+        return "not found" if e.status == 404 else f"HTTP {e.status}"
+    except Exception as e:
+        return str(e)
+    return None
+
+
+# 全ターゲットのリポジトリとデプロイメントを並行して検証する関数
+# 同じリポジトリ・デプロイメントは1回だけ確認する。戻り値はターゲットごとの結果
+def validate_targets(targets, workers=8, apps_v1=None):
+    repos = {(target.get('github_repo'), target.get('github_token') or None) for target in targets}
+    deployments = {(target.get('k8s_namespace'), target.get('k8s_deployment')) for target in targets}
+    # API クライアントはスレッド間で共有する（コネクションプールを再利用）
+    apps_v1 = apps_v1 or k8s.client.AppsV1Api()
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        repo_futures = {key: executor.submit(check_github_repo, *key) for key in repos}
+        deployment_futures = {key: executor.submit(check_deployment, *key, apps_v1) for key in deployments}
+        repo_results = {key: future.result() for key, future in repo_futures.items()}
+        deployment_results = {key: future.result() for key, future in deployment_futures.items()}
+    return [
+        {
+            'id': target['id'],
+            'name': target['name'],
+            'repo_error': repo_results[(target.get('github_repo'), target.get('github_token') or None)],
+            'deployment_error': deployment_results[(target.get('k8s_namespace'), target.get('k8s_deployment'))],
+        }
+        for target in targets
+    ]
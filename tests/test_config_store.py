@@ -0,0 +1,149 @@
+import copy
+import json
+from types import SimpleNamespace
+
+from release_monitor import config_store
+from release_monitor.config_store import ConfigMapConfigStore, FileConfigStore, merge_config
+
+# アプリと同じ遅延インポート経由で参照する
+ApiException = config_store.k8s.client.rest.ApiException
+
+
+def target(target_id, **fields):
+    return dict({'id': target_id, 'name': target_id, 'is_active': False, 'polling_interval': 60}, **fields)
+
+
+def test_stale_session_keeps_other_changes():
+    base = {'targets': [target('target1'), target('target2')]}
+    # 他のユーザーが target2 を開始し、target3 を追加した
+    current = {'targets': [target('target1'), target('target2', is_active=True), target('target3', is_active=True)]}
+    # 古い画面のセッションは target1 の間隔だけを変更した
+    local = {'targets': [target('target1', polling_interval=120), target('target2')]}
+
+    merged = merge_config(base, local, current)
+
+    assert merged['targets'] == [
+        target('target1', polling_interval=120),
+        target('target2', is_active=True),
+        target('target3', is_active=True),
+    ]
+
+
+def test_local_changes_win_for_changed_fields():
+    base = {'targets': [target('target1')]}
+    current = {'targets': [target('target1', polling_interval=30)]}
+    local = {'targets': [target('target1', is_active=True)]}
+
+    assert merge_config(base, local, current)['targets'] == [target('target1', polling_interval=30, is_active=True)]
+
+
+def test_deletions_and_additions():
+    base = {'targets': [target('target1'), target('target2')]}
+    current = {'targets': [target('target1'), target('target2'), target('target3', name='theirs')]}
+    # このセッションは target2 を削除し、target3 を追加した（他のセッションと ID が重なる）
+    local = {'targets': [target('target1'), target('target3', name='mine')]}
+
+    merged = merge_config(base, local, current)
+
+    assert [(t['id'], t['name']) for t in merged['targets']] == [
+        ('target1', 'target1'), ('target3', 'theirs'), ('target4', 'mine')
+    ]
+
+
+def test_target_deleted_elsewhere_stays_deleted():
+    base = {'targets': [target('target1'), target('target2')]}
+    current = {'targets': [target('target1')]}
+    local = {'targets': [target('target1'), target('target2', polling_interval=90)]}
+
+    assert merge_config(base, local, current)['targets'] == [target('target1')]
+
+
+def test_without_base_keeps_current_targets():
+    current = {'targets': [target('target1', is_active=True)]}
+    local = {'targets': [target('target1', name='new')]}
+
+    assert merge_config(None, local, current)['targets'] == [target('target1', is_active=True), target('target2', name='new')]
+
+
+def test_file_store_update_is_atomic(tmp_path):
+    path = tmp_path / 'config.json'
+    store = FileConfigStore(str(path))
+    assert store.load() is None
+
+    store.save({'targets': [target('target1')]})
+    merged = store.update(lambda current: merge_config(current, {'targets': [target('target1', is_active=True)]}, current))
+
+    assert json.loads(path.read_text()) == merged == {'targets': [target('target1', is_active=True)]}
+    assert [p.name for p in tmp_path.iterdir()] == ['config.json']
+
+
+# CoreV1Api の ConfigMap / Secret 操作だけを実装したフェイク（resourceVersion による楽観的排他制御あり）
+class FakeCoreApi:
+    def __init__(self):
+        self.objects = {}
+
+    def _read(self, kind, name):
+        if (kind, name) not in self.objects:
+            raise ApiException(status=404)
+        return copy.deepcopy(self.objects[(kind, name)])
+
+    def _create(self, kind, body):
+        key = (kind, body.metadata.name)
+        if key in self.objects:
+            raise ApiException(status=409)
+        self.objects[key] = SimpleNamespace(data=dict(body.data), metadata=SimpleNamespace(resource_version="1"))
+
+    def _patch(self, kind, name, body):
+        current = self.objects[(kind, name)].metadata.resource_version
+        if body["metadata"]["resourceVersion"] != current:
+            raise ApiException(status=409)
+        self.objects[(kind, name)] = SimpleNamespace(
+            data=dict(body["data"]), metadata=SimpleNamespace(resource_version=str(int(current) + 1))
+        )
+
+    def read_namespaced_config_map(self, name, namespace):
+        return self._read("configmap", name)
+
+    def create_namespaced_config_map(self, namespace, body):
+        self._create("configmap", body)
+
+    def patch_namespaced_config_map(self, name, namespace, body):
+        self._patch("configmap", name, body)
+
+    def read_namespaced_secret(self, name, namespace):
+        return self._read("secret", name)
+
+    def create_namespaced_secret(self, namespace, body):
+        self._create("secret", body)
+
+    def patch_namespaced_secret(self, name, namespace, body):
+        self._patch("secret", name, body)
+
+
+def test_configmap_store_keeps_tokens_in_secret(tmp_path):
+    seed = tmp_path / 'config.json'
+    seed.write_text(json.dumps({'targets': [target('target1', github_token='ghp_seed'), target('target2')]}))
+    api = FakeCoreApi()
+    store = ConfigMapConfigStore('config', 'ns', api=api, seed_path=str(seed))
+
+    assert store.load()['targets'][0]['github_token'] == 'ghp_seed'
+    store.update(lambda current: merge_config(current, {'targets': [
+        target('target1', github_token='ghp_seed'), target('target2', github_token='ghp_new')
+    ]}, current))
+
+    stored = api.objects[('configmap', 'config')].data['config.json']
+    assert 'ghp_' not in stored
+    assert api.objects.get(('secret', 'config-tokens')) is not None
+    assert [t.get('github_token') for t in store.load()['targets']] == ['ghp_seed', 'ghp_new']
+
+
+def test_configmap_store_version_changes_with_tokens():
+    api = FakeCoreApi()
+    store = ConfigMapConfigStore('config', 'ns', api=api)
+    store.save({'targets': [target('target1')]})
+    version = store.version()
+
+    store.save({'targets': [target('target1', github_token='ghp_token')]})
+
+    assert store.version() != version
+    assert 'ghp_' not in api.objects[('configmap', 'config')].data['config.json']
@@ -0,0 +1,44 @@
+from release_monitor.k8s_events import DeploymentEventFilter
+
+
+def entry(kind, name):
+    return {"kind": kind, "object": name}
+
+
+def test_matches_deployment_replica_sets_and_pods():
+    event_filter = DeploymentEventFilter("web")
+
+    assert event_filter.matches(entry("Deployment", "web"))
+    assert event_filter.matches(entry("ReplicaSet", "web-6d4cf56db6"))
+    assert event_filter.matches(entry("Pod", "web-6d4cf56db6-x2bkz"))
+
+
+def test_ignores_objects_with_similar_names():
+    event_filter = DeploymentEventFilter("web")
+
+    assert not event_filter.matches(entry("Deployment", "web-api"))
+    assert not event_filter.matches(entry("ReplicaSet", "web-api"))
+    # StatefulSet / DaemonSet / Job の Pod
+    assert not event_filter.matches(entry("Pod", "web-0"))
+    assert not event_filter.matches(entry("Pod", "web-x2bkz"))
+    assert not event_filter.matches(entry("Pod", "web-api-x2bkz"))
+    assert not event_filter.matches(entry("Pod", "web-6d4cf56db6-x2bk"))
+
+
+def test_checks_replica_set_owner_once():
+    lookups = []
+    owners = {"web-6d4cf56db6": "web", "web-7f8d9c6b5": "web-7f8d9c6b5-deploy", "web-5b6c7d8f9": None}
+
+    def owner_lookup(name):
+        lookups.append(name)
+        return owners[name]
+
+    event_filter = DeploymentEventFilter("web", owner_lookup)
+
+    assert event_filter.matches(entry("ReplicaSet", "web-6d4cf56db6"))
+    assert event_filter.matches(entry("Pod", "web-6d4cf56db6-x2bkz"))
+    # 名前の形式は同じでも別のデプロイメントが所有している
+    assert not event_filter.matches(entry("Pod", "web-7f8d9c6b5-x2bkz"))
+    # 削除済みの ReplicaSet は名前の形式で判定
+    assert event_filter.matches(entry("ReplicaSet", "web-5b6c7d8f9"))
+    assert lookups == ["web-6d4cf56db6", "web-7f8d9c6b5", "web-5b6c7d8f9"]
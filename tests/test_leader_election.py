@@ -0,0 +1,163 @@
+import copy
+
+import pytest
+
+from release_monitor import leader_election
+from release_monitor.leader_election import LeaseLeaderElector
+
+# アプリと同じ遅延インポート経由で参照する（kubernetes.client.rest を直接インポートすると遅延ロードと干渉する）
+ApiException = leader_election.k8s.client.rest.ApiException
+
+
+# CoordinationV1Api の Lease 操作だけを実装したフェイク（resourceVersion による楽観的排他制御あり）
+class FakeCoordinationApi:
+    def __init__(self):
+        self.leases = {}
+        self.create_conflict = False
+
+    def read_namespaced_lease(self, name, namespace):
+        lease = self.leases.get((namespace, name))
+        if lease is None:
+            raise ApiException(status=404)
+        return copy.deepcopy(lease)
+
+    def create_namespaced_lease(self, namespace, body):
+        key = (namespace, body.metadata.name)
+        if self.create_conflict or key in self.leases:
+            raise ApiException(status=409)
+        lease = copy.deepcopy(body)
+        lease.metadata.resource_version = "1"
+        self.leases[key] = lease
+        return copy.deepcopy(lease)
+
+    def replace_namespaced_lease(self, name, namespace, body):
+        current = self.leases[(namespace, name)]
+        if body.metadata.resource_version != current.metadata.resource_version:
+            raise ApiException(status=409)
+        lease = copy.deepcopy(body)
+        lease.metadata.resource_version = str(int(current.metadata.resource_version) + 1)
+        self.leases[(namespace, name)] = lease
+        return copy.deepcopy(lease)
+
+    def holder(self, name="lease", namespace="ns"):
+        return self.leases[(namespace, name)].spec.holder_identity
+
+
+# time.monotonic を差し替える手動の時計
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(leader_election.time, "monotonic", clock)
+    return clock
+
+
+def make_elector(api, identity):
+    return LeaseLeaderElector("lease", namespace="ns", identity=identity, lease_duration=15, api=api)
+
+
+def test_creates_lease_when_missing(clock):
+    api = FakeCoordinationApi()
+    elector = make_elector(api, "pod-a")
+
+    assert elector.try_acquire_or_renew()
+    assert api.holder() == "pod-a"
+    assert elector.holder_identity == "pod-a"
+
+
+def test_create_conflict_loses(clock):
+    api = FakeCoordinationApi()
+    api.create_conflict = True
+
+    assert not make_elector(api, "pod-a").try_acquire_or_renew()
+
+
+def test_renews_own_lease(clock):
+    api = FakeCoordinationApi()
+    elector = make_elector(api, "pod-a")
+    elector.try_acquire_or_renew()
+
+    clock.now += 5
+    assert elector.try_acquire_or_renew()
+    assert api.leases[("ns", "lease")].spec.lease_transitions == 0
+
+
+def test_does_not_take_over_valid_lease(clock):
+    api = FakeCoordinationApi()
+    make_elector(api, "pod-a").try_acquire_or_renew()
+    follower = make_elector(api, "pod-b")
+
+    assert not follower.try_acquire_or_renew()
+    clock.now += 10
+    assert not follower.try_acquire_or_renew()
+    assert api.holder() == "pod-a"
+
+
+def test_takes_over_after_expiry(clock):
+    api = FakeCoordinationApi()
+    make_elector(api, "pod-a").try_acquire_or_renew()
+    follower = make_elector(api, "pod-b")
+    follower.try_acquire_or_renew()
+
+    # リーダーが更新を止めたまま、フォロワーが観測してから lease_duration が経過
+    clock.now += 16
+    assert follower.try_acquire_or_renew()
+    assert api.holder() == "pod-b"
+    assert api.leases[("ns", "lease")].spec.lease_transitions == 1
+
+
+def test_renewal_by_holder_resets_expiry(clock):
+    api = FakeCoordinationApi()
+    leader = make_elector(api, "pod-a")
+    leader.try_acquire_or_renew()
+    follower = make_elector(api, "pod-b")
+    follower.try_acquire_or_renew()
+
+    clock.now += 10
+    leader.try_acquire_or_renew()
+    clock.now += 1
+    follower.try_acquire_or_renew()
+    clock.now += 10
+    assert not follower.try_acquire_or_renew()
+
+
+def test_replace_conflict_loses(clock):
+    api = FakeCoordinationApi()
+    make_elector(api, "pod-a").try_acquire_or_renew()
+    follower = make_elector(api, "pod-b")
+    follower.try_acquire_or_renew()
+    clock.now += 16
+
+    # 読み込みと置き換えの間に他のレプリカが更新した
+    read = api.read_namespaced_lease
+
+    def stale_read(name, namespace):
+        lease = read(name, namespace)
+        api.leases[(namespace, name)].metadata.resource_version = "99"
+        return lease
+
+    api.read_namespaced_lease = stale_read
+    assert not follower.try_acquire_or_renew()
+    assert api.holder() == "pod-a"
+
+
+def test_stop_releases_lease(clock):
+    api = FakeCoordinationApi()
+    leader = make_elector(api, "pod-a")
+    leader._set_leader(leader.try_acquire_or_renew())
+    assert leader.is_leader
+
+    leader.stop()
+    assert not leader.is_leader
+    assert api.holder() is None
+
+    # 解放されたリースは期限を待たずに取得できる
+    assert make_elector(api, "pod-b").try_acquire_or_renew()
+    assert api.holder() == "pod-b"
@@ -0,0 +1,196 @@
+import threading
+import time
+
+import pytest
+
+from release_monitor import monitor
+from release_monitor.monitor import MonitorService, watch_config
+
+
+def target(target_id, **fields):
+    return dict({
+        'id': target_id, 'name': target_id, 'github_repo': f'org/{target_id}', 'github_token': '',
+        'k8s_namespace': 'default', 'k8s_deployment': target_id, 'polling_interval': 60, 'is_active': True
+    }, **fields)
+
+
+# monitoring_thread の代わりに起動されるスタブ（run_token が外されるまで待機して終了する）
+class ThreadRecorder:
+    def __init__(self):
+        self.started = []
+        self.exited = []
+        self._lock = threading.Lock()
+
+    def __call__(self, target_id, target_name, repo, token, namespace, deployment, interval, monitoring_state,
+                 elector, state_store, digest_check, registry_url, initial_delay, run_token, *args):
+        with self._lock:
+            self.started.append({'id': target_id, 'interval': interval, 'delay': initial_delay, 'token': run_token})
+        while monitoring_state.get(target_id) is run_token:
+            time.sleep(0.005)
+        with self._lock:
+            self.exited.append(run_token)
+
+    # スレッドが count 個起動するまで待ち、起動したターゲット ID を起動順に返す
+    def ids(self, count, timeout=2):
+        deadline = time.monotonic() + timeout
+        while len(self.started) < count and time.monotonic() < deadline:
+            time.sleep(0.005)
+        return [start['id'] for start in self.started]
+
+    def wait_exited(self, run_token, timeout=2):
+        deadline = time.monotonic() + timeout
+        while run_token not in self.exited and time.monotonic() < deadline:
+            time.sleep(0.005)
+        return run_token in self.exited
+
+
+class FakeStateStore:
+    def __init__(self):
+        self.removed = []
+
+    def load(self, use_cache=True):
+        return {}
+
+    def remove_target(self, target_id):
+        self.removed.append(target_id)
+
+
+# version() が設定の変更ごとに変わる設定ストアのフェイク
+class FakeConfigStore:
+    def __init__(self, targets):
+        self.config = {'targets': targets}
+        self.revision = 1
+        self.loads = 0
+
+    def set_targets(self, targets):
+        self.config = {'targets': targets}
+        self.revision += 1
+
+    def version(self):
+        return self.revision
+
+    def load(self):
+        self.loads += 1
+        return {'targets': [dict(t) for t in self.config['targets']]}
+
+
+# watch_config の待機のたびに次の手順を実行し、手順が尽きたら停止する stop_event
+# （最後の手順の後のチェックは行われないため、変更を反映させるには末尾に何もしない手順が必要）
+class ScriptedStop:
+    def __init__(self, *steps):
+        self.steps = list(steps)
+
+    def is_set(self):
+        return not self.steps
+
+    def wait(self, timeout):
+        self.steps.pop(0)()
+
+
+@pytest.fixture
+def recorder(monkeypatch):
+    recorder = ThreadRecorder()
+    monkeypatch.setattr(monitor, "monitoring_thread", recorder)
+    return recorder
+
+
+@pytest.fixture
+def service(recorder):
+    service = MonitorService(state_store=FakeStateStore(), log=lambda message: None, config_store=FakeConfigStore([]))
+    yield service
+    service.stop_all()
+
+
+def test_resume_staggers_active_targets(service, recorder):
+    resumed = service.resume([target('target1'), target('target2', is_active=False), target('target3')])
+
+    assert [t['id'] for t, _ in resumed] == ['target1', 'target3']
+    delays = [delay for _, delay in resumed]
+    # 2つのターゲットは間隔を2等分したそれぞれのスロットに配置される
+    assert 0 <= delays[0] < 30 <= delays[1] < 60
+    assert sorted(recorder.ids(2)) == ['target1', 'target3']
+
+
+def test_resume_skips_running_targets(service, recorder):
+    service.start_target(target('target1'))
+
+    assert service.resume([target('target1')]) == []
+    assert recorder.ids(1) == ['target1']
+
+
+def test_sync_restarts_only_on_thread_setting_changes(service, recorder):
+    service.sync([target('target1'), target('target2')])
+    recorder.ids(2)
+    first = {start['id']: start['token'] for start in recorder.started}
+
+    # name は THREAD_SETTINGS に含まれないため再起動しない
+    service.sync([target('target1', name='renamed'), target('target2', polling_interval=120)])
+
+    assert recorder.ids(3) == ['target1', 'target2', 'target2']
+    assert recorder.started[-1]['interval'] == 120
+    assert recorder.wait_exited(first['target2'])
+    assert first['target1'] not in recorder.exited
+    assert service.is_running('target1') and service.is_running('target2')
+
+
+def test_sync_stops_inactive_and_removed_targets(service, recorder):
+    service.sync([target('target1'), target('target2')])
+    recorder.ids(2)
+    tokens = {start['id']: start['token'] for start in recorder.started}
+    service.monitoring_state['target2_stored_release_tag'] = 'v1'
+
+    service.sync([target('target1', is_active=False)])
+
+    assert service.running_targets() == []
+    assert recorder.wait_exited(tokens['target1']) and recorder.wait_exited(tokens['target2'])
+    # 削除したターゲットだけ共有状態から消す
+    assert service.state_store.removed == ['target2']
+    assert 'target2_stored_release_tag' not in service.monitoring_state
+
+
+def test_stopped_thread_exits_when_restarted(service, recorder):
+    service.start_target(target('target1'))
+    service.stop_target('target1')
+    service.start_target(target('target1'))
+
+    recorder.ids(2)
+    old, new = (start['token'] for start in recorder.started)
+    assert recorder.wait_exited(old)
+    assert new not in recorder.exited
+    assert service.monitoring_state['target1'] is new
+
+
+def test_watch_config_resumes_then_applies_changes(service, recorder, monkeypatch):
+    store = service.config_store
+    store.set_targets([target('target1'), target('target2', is_active=False)])
+    resumed = []
+    resume = service.resume
+    monkeypatch.setattr(service, "resume", lambda targets: resumed.append(resume(targets)))
+
+    watch_config(service, ScriptedStop(
+        lambda: None,
+        lambda: store.set_targets([target('target1'), target('target2')]),
+        lambda: store.set_targets([target('target2')]),
+        lambda: None,
+    ), interval=0)
+
+    # 最初の読み込みだけ resume し、以降は変更があった時だけ読み込んで sync する
+    assert len(resumed) == 1 and [t['id'] for t, _ in resumed[0]] == ['target1']
+    assert store.loads == 3
+    assert recorder.ids(2) == ['target1', 'target2']
+    assert service.running_targets() == ['target2']
+
+
+def test_watch_config_retries_failed_load(service, recorder):
+    store = service.config_store
+    store.set_targets([target('target1')])
+    load = store.load
+
+    def failing_load():
+        store.load = load
+        raise RuntimeError("api unavailable")
+
+    store.load = failing_load
+    watch_config(service, ScriptedStop(lambda: None, lambda: None), interval=0)
+
+    assert recorder.ids(1) == ['target1']
@@ -0,0 +1,48 @@
+import pytest
+
+from release_monitor.pod_logs import PodLogMultiplexer
+
+
+# ログの取得は行わず、ストリームをエラー状態のまま登録させる CoreV1Api のフェイク
+class FakeCoreApi:
+    def read_namespaced_pod_log(self, **kwargs):
+        raise ConnectionError("unreachable")
+
+
+@pytest.fixture
+def multiplexer():
+    multiplexer = PodLogMultiplexer(core_v1=FakeCoreApi(), workers=1, max_streams=1)
+    yield multiplexer
+    multiplexer.stop()
+
+
+def test_release_frees_stream_slot(multiplexer):
+    multiplexer.follow("ns", "pod-a", "app", viewer="session-1")
+    with pytest.raises(RuntimeError):
+        multiplexer.follow("ns", "pod-b", "app", viewer="session-1")
+
+    multiplexer.release("ns", "pod-a", "app", viewer="session-1")
+
+    assert multiplexer.get("ns", "pod-a", "app") is None
+    multiplexer.follow("ns", "pod-b", "app", viewer="session-1")
+
+
+def test_stream_stays_open_while_other_sessions_view_it(multiplexer):
+    stream = multiplexer.follow("ns", "pod-a", "app", viewer="session-1")
+    stream.snapshot("session-2")
+
+    multiplexer.release("ns", "pod-a", "app", viewer="session-1")
+    assert multiplexer.get("ns", "pod-a", "app") is stream
+
+    multiplexer.release("ns", "pod-a", "app", viewer="session-2")
+    assert multiplexer.get("ns", "pod-a", "app") is None
+
+
+def test_reconnect_keeps_viewers(multiplexer):
+    stream = multiplexer.follow("ns", "pod-a", "app", viewer="session-1")
+    stream.snapshot("session-2")
+
+    reconnected = multiplexer.follow("ns", "pod-a", "app", viewer="session-1")
+
+    assert reconnected is not stream
+    assert reconnected.viewers == {"session-1", "session-2"}
@@ -0,0 +1,141 @@
+from datetime import datetime
+
+import pytest
+
+from release_monitor.polling import MIN_POLLING_INTERVAL, CronSchedule, PollingPolicy, parse_timestamp
+
+DAY = 86400
+
+# 2024-01-08 は月曜日（ローカル時刻で評価する）
+MONDAY_10AM = datetime(2024, 1, 8, 10, 0).timestamp()
+MONDAY_0855 = datetime(2024, 1, 8, 8, 55).timestamp()
+
+
+def policy(base_interval=300, **kwargs):
+    kwargs.setdefault('backoff_after', DAY)
+    kwargs.setdefault('backoff_max', 3600)
+    kwargs.setdefault('boost_duration', 1800)
+    kwargs.setdefault('boost_interval', 30)
+    return PollingPolicy(base_interval, **kwargs)
+
+
+def test_priority_multiplier():
+    assert policy(priority='normal').next_interval(MONDAY_10AM) == (300, "normal priority")
+    assert policy(priority='high').next_interval(MONDAY_10AM) == (150, "high priority")
+    assert policy(priority='low').next_interval(MONDAY_10AM) == (1200, "low priority")
+
+
+def test_unknown_priority_is_rejected():
+    with pytest.raises(ValueError):
+        policy(priority='urgent')
+
+
+def test_backoff_doubles_per_period():
+    interval, reason = policy().next_interval(MONDAY_10AM, last_release_at=MONDAY_10AM - 2.5 * DAY)
+
+    assert interval == 1200
+    assert reason.startswith("backoff")
+
+
+def test_backoff_is_capped():
+    interval, _ = policy().next_interval(MONDAY_10AM, last_release_at=MONDAY_10AM - 365 * DAY)
+
+    assert interval == 3600
+
+
+def test_no_backoff_within_first_period_or_when_disabled():
+    assert policy().next_interval(MONDAY_10AM, last_release_at=MONDAY_10AM - 0.5 * DAY) == (300, "normal priority")
+    assert policy(backoff=False).next_interval(MONDAY_10AM, last_release_at=MONDAY_10AM - 10 * DAY) == (
+        300, "normal priority"
+    )
+
+
+def test_release_window_shortens_interval():
+    window_policy = policy(release_windows=["* 9-17 * * 1-5"], window_interval=60)
+
+    assert window_policy.next_interval(MONDAY_10AM) == (60, "release window")
+
+
+def test_boost_after_detected_release():
+    assert policy().next_interval(MONDAY_10AM, last_change_at=MONDAY_10AM - 60) == (30, "post-release boost")
+    assert policy().next_interval(MONDAY_10AM, last_change_at=MONDAY_10AM - 3600) == (300, "normal priority")
+
+
+def test_wakes_up_when_window_starts():
+    window_policy = policy(3600, release_windows=["* 9-17 * * 1-5"])
+
+    assert window_policy.seconds_until_window(MONDAY_0855, 3600) == 300
+    assert window_policy.next_interval(MONDAY_0855) == (300, "release window starts")
+
+
+def test_window_beyond_horizon_is_ignored():
+    window_policy = policy(release_windows=["0 12 * * *"])
+
+    assert window_policy.seconds_until_window(MONDAY_10AM, 300) is None
+    assert window_policy.next_interval(MONDAY_10AM) == (300, "normal priority")
+
+
+def test_interval_is_clamped_to_minimum():
+    assert policy(1).next_interval(MONDAY_10AM)[0] == MIN_POLLING_INTERVAL
+    window_policy = policy(3600, release_windows=["0 9 * * *"])
+    assert window_policy.next_interval(datetime(2024, 1, 8, 8, 59, 55).timestamp()) == (
+        MIN_POLLING_INTERVAL, "release window starts"
+    )
+
+
+def test_from_target_uses_target_settings():
+    target_policy = PollingPolicy.from_target({
+        'polling_interval': 120, 'priority': 'high', 'release_windows': ["* 9-17 * * 1-5", " "], 'backoff': False
+    })
+
+    assert len(target_policy.windows) == 1
+    assert target_policy.next_interval(MONDAY_10AM) == (30, "release window")
+
+
+@pytest.mark.parametrize("expression", [
+    "* * * *",
+    "60 * * * *",
+    "* 24 * * *",
+    "* * 0 * *",
+    "*/0 * * * *",
+    "5-1 * * * *",
+    "a * * * *",
+])
+def test_invalid_cron_expressions(expression):
+    with pytest.raises(ValueError):
+        CronSchedule(expression)
+
+
+def test_cron_fields():
+    schedule = CronSchedule("0,30 9-17/4 * 1 *")
+
+    assert schedule.minutes == {0, 30}
+    assert schedule.hours == {9, 13, 17}
+    assert schedule.months == {1}
+
+
+def test_sunday_can_be_written_as_seven():
+    assert CronSchedule("* * * * 7").matches(datetime(2024, 1, 7, 12, 0))
+
+
+def test_day_and_weekday_use_or_when_both_are_restricted():
+    schedule = CronSchedule("0 9 1 * 1")
+
+    assert schedule.matches(datetime(2024, 1, 8, 9, 0))
+    assert schedule.matches(datetime(2024, 2, 1, 9, 0))
+    assert not schedule.matches(datetime(2024, 2, 2, 9, 0))
+
+
+def test_stepped_wildcard_day_uses_and():
+    schedule = CronSchedule("0 9 */2 * 1")
+
+    # 奇数日かつ月曜日のみ
+    assert schedule.matches(datetime(2024, 1, 15, 9, 0))
+    assert not schedule.matches(datetime(2024, 1, 8, 9, 0))
+    assert not schedule.matches(datetime(2024, 1, 3, 9, 0))
+
+
+def test_parse_timestamp():
+    assert parse_timestamp("2024-01-01T00:00:00Z") == 1704067200
+    assert parse_timestamp("not a date") is None
+    assert parse_timestamp(None) is None
@@ -0,0 +1,57 @@
+import cProfile
+
+import pytest
+
+from release_monitor import profiling
+from release_monitor.profiling import RerunProfiler
+
+
+def test_capture_is_exclusive_within_process():
+    first, second = RerunProfiler(enabled=True), RerunProfiler(enabled=True)
+    first.capture_next = second.capture_next = True
+
+    first.start_rerun()
+    second.start_rerun()
+    assert second.capture_error and second.capture_next
+
+    first.end_rerun()
+    assert first.last_capture is not None
+
+    # 記録が終われば次の再実行で記録できる
+    second.start_rerun()
+    assert not second.capture_next and second.capture_error is None
+    second.end_rerun()
+    assert second.last_capture is not None
+
+
+def test_abort_stops_profile_and_discards_rerun():
+    profiler = RerunProfiler(enabled=True)
+    profiler.capture_next = True
+    profiler.start_rerun()
+
+    profiler.abort_rerun()
+
+    assert profiler.reruns == 0
+    assert profiler.last_capture is None
+    assert not profiling._capture_lock.locked()
+
+
+def test_enable_failure_is_reported(monkeypatch):
+    def enable(self):
+        raise ValueError("Another profiling tool is already active")
+
+    monkeypatch.setattr(profiling.cProfile, "Profile", type("FailingProfile", (cProfile.Profile,), {"enable": enable}))
+    profiler = RerunProfiler(enabled=True)
+    profiler.capture_next = True
+
+    profiler.start_rerun()
+    profiler.end_rerun()
+
+    assert profiler.capture_error == "Another profiling tool is already active"
+    assert profiler.reruns == 1
+    assert not profiling._capture_lock.locked()
+
+
+@pytest.mark.parametrize("values, expected", [([], None), ([3, 1, 2], 2), ([5], 5)])
+def test_percentile(values, expected):
+    assert profiling.percentile(values, 50) == expected
@@ -0,0 +1,180 @@
+import base64
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from types import SimpleNamespace
+
+import pytest
+
+from release_monitor.monitor import plan_image_digest_patch
+from release_monitor.registry import resolve_image_digest
+
+OLD_DIGEST = "sha256:" + "1" * 64
+NEW_DIGEST = "sha256:" + "2" * 64
+
+
+# レジストリ v2 API のスタブ（マニフェストは Bearer トークンが必要）
+class RegistryStub(ThreadingHTTPServer):
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), RegistryHandler)
+        self.manifests = {}
+        self.token_requests = []
+        self.realm_host = "127.0.0.1"
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server_port}"
+
+    @property
+    def host(self):
+        return f"127.0.0.1:{self.server_port}"
+
+
+class RegistryHandler(BaseHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+    def _send(self, status, headers=None, body=b""):
+        self.send_response(status)
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if self.command != "HEAD":
+            self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path.startswith("/token"):
+            self.server.token_requests.append(self.headers.get("Authorization"))
+            self._send(200, {"Content-Type": "application/json"}, json.dumps({"token": "stub-token"}).encode())
+            return
+        self.do_HEAD()
+
+    def do_HEAD(self):
+        if self.headers.get("Authorization") != "Bearer stub-token":
+            realm = f"http://{self.server.realm_host}:{self.server.server_port}/token"
+            self._send(401, {"WWW-Authenticate": f'Bearer realm="{realm}",service="stub",scope="repository:org/app:pull"'})
+            return
+        _, _, repository_and_tag = self.path.partition("/v2/")
+        repository, _, tag = repository_and_tag.partition("/manifests/")
+        digest = self.server.manifests.get((repository, tag))
+        if digest is None:
+            self._send(404)
+            return
+        self._send(200, {"Docker-Content-Digest": digest})
+
+
+@pytest.fixture
+def registry():
+    server = RegistryStub()
+    thread = threading.Thread(target=server.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def docker_config_secret(host, username, password):
+    auth = base64.b64encode(f"{username}:{password}".encode()).decode()
+    config = json.dumps({"auths": {host: {"auth": auth}}}).encode()
+    return SimpleNamespace(data={".dockerconfigjson": base64.b64encode(config).decode()})
+
+
+# AppsV1Api / CoreV1Api のうち plan_image_digest_patch が使う部分だけのフェイク
+class FakeKubernetes:
+    def __init__(self, image, running_digest, pull_secret=None):
+        self.pull_secret = pull_secret
+        self.deployment = SimpleNamespace(
+            spec=SimpleNamespace(
+                selector=SimpleNamespace(match_labels={"app": "web"}),
+                template=SimpleNamespace(spec=SimpleNamespace(
+                    containers=[SimpleNamespace(name="web", image=image)],
+                    image_pull_secrets=[SimpleNamespace(name="pull")] if pull_secret else None
+                ))
+            )
+        )
+        self.pods = SimpleNamespace(items=[
+            SimpleNamespace(status=SimpleNamespace(container_statuses=[
+                SimpleNamespace(name="web", image_id=f"ghcr.io/org/app@{running_digest}")
+            ]))
+        ])
+
+    def read_namespaced_deployment(self, name, namespace):
+        return self.deployment
+
+    def list_namespaced_pod(self, namespace, label_selector):
+        return self.pods
+
+    def read_namespaced_secret(self, name, namespace):
+        return self.pull_secret
+
+
+def test_resolves_digest_with_anonymous_bearer_token(registry):
+    registry.manifests[("org/app", "v2")] = NEW_DIGEST
+
+    assert resolve_image_digest("ghcr.io/org/app:v1", "v2", registry.url) == NEW_DIGEST
+    assert registry.token_requests == [None]
+
+
+def test_sends_credentials_only_for_matching_host(registry):
+    registry.manifests[("org/app", "v2")] = NEW_DIGEST
+    credentials = {registry.host: ("user", "secret"), "ghcr.io": ("other", "other-secret")}
+
+    assert resolve_image_digest("ghcr.io/org/app:v1", "v2", registry.url, credentials) == NEW_DIGEST
+    expected = "Basic " + base64.b64encode(b"user:secret").decode()
+    assert registry.token_requests == [expected]
+
+    resolve_image_digest("ghcr.io/org/app:v1", "v2", registry.url, {"ghcr.io": ("other", "other-secret")})
+    assert registry.token_requests[-1] is None
+
+
+def test_does_not_send_credentials_to_foreign_realm(registry):
+    registry.manifests[("org/app", "v2")] = NEW_DIGEST
+    registry.realm_host = "localhost"
+
+    resolve_image_digest("ghcr.io/org/app:v1", "v2", registry.url, {registry.host: ("user", "secret")})
+    assert registry.token_requests == [None]
+
+
+def test_missing_tag_returns_none(registry):
+    assert resolve_image_digest("ghcr.io/org/app:v1", "v2", registry.url) is None
+
+
+def test_plan_skips_unchanged_digest(registry):
+    registry.manifests[("org/app", "v2")] = OLD_DIGEST
+    api = FakeKubernetes("ghcr.io/org/app:v1", OLD_DIGEST)
+
+    assert plan_image_digest_patch(api, api, "default", "web", "v2", registry.url) == []
+
+
+def test_plan_pins_changed_digest(registry):
+    registry.manifests[("org/app", "v2")] = NEW_DIGEST
+    api = FakeKubernetes("ghcr.io/org/app:v1", OLD_DIGEST)
+
+    assert plan_image_digest_patch(api, api, "default", "web", "v2", registry.url) == [
+        (0, f"ghcr.io/org/app:v2@{NEW_DIGEST}")
+    ]
+
+
+def test_plan_falls_back_to_deployment_tag(registry):
+    # リリースタグのイメージが無い場合は、デプロイメントに指定されたタグ（latest など）で解決する
+    registry.manifests[("org/app", "latest")] = NEW_DIGEST
+    api = FakeKubernetes("ghcr.io/org/app:latest", OLD_DIGEST)
+
+    assert plan_image_digest_patch(api, api, "default", "web", "v2", registry.url) == [
+        (0, f"ghcr.io/org/app:latest@{NEW_DIGEST}")
+    ]
+
+
+def test_plan_returns_none_when_unresolvable(registry):
+    api = FakeKubernetes("ghcr.io/org/app:latest", OLD_DIGEST)
+
+    assert plan_image_digest_patch(api, api, "default", "web", "v2", registry.url) is None
+
+
+def test_plan_uses_image_pull_secret(registry):
+    registry.manifests[("org/app", "v2")] = OLD_DIGEST
+    api = FakeKubernetes("ghcr.io/org/app:v1", OLD_DIGEST, docker_config_secret(registry.host, "puller", "pw"))
+
+    assert plan_image_digest_patch(api, api, "default", "web", "v2", registry.url) == []
+    assert registry.token_requests == ["Basic " + base64.b64encode(b"puller:pw").decode()]
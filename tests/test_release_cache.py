@@ -0,0 +1,90 @@
+import json
+import tracemalloc
+
+import pytest
+
+from release_monitor.release_cache import HISTORY, LATEST, ReleaseCache, estimate_size
+
+
+def releases(count, body="notes " * 40):
+    return [
+        {"tag_name": f"v1.{i}.0", "name": f"Release v1.{i}.0", "published_at": "2024-01-02T00:00:00Z",
+         "prerelease": False, "draft": False, "body": body}
+        for i in range(count)
+    ]
+
+
+def test_estimate_tracks_allocated_memory():
+    text = json.dumps(releases(200))
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        value = json.loads(text)
+        allocated = tracemalloc.get_traced_memory()[0] - before
+    finally:
+        tracemalloc.stop()
+
+    assert 0.8 * allocated <= estimate_size(value) <= 1.3 * allocated
+
+
+def test_shared_objects_are_counted_once():
+    release = releases(1)[0]
+
+    assert estimate_size([release, release]) < 2 * estimate_size([release])
+
+
+def test_evicts_least_recently_used_within_budget():
+    history = releases(20)
+    cache = ReleaseCache(max_bytes=int(estimate_size(history) * 2.5), loader=None)
+    cache.put(HISTORY, "target1", releases(20))
+    cache.put(HISTORY, "target2", releases(20))
+    cache.get(HISTORY, "target1")
+    cache.put(HISTORY, "target3", releases(20))
+
+    assert cache.get(HISTORY, "target2") is None
+    assert cache.get(HISTORY, "target1") is not None
+    assert cache.size_bytes <= cache.max_bytes
+    assert cache.evictions == 1
+
+
+def test_pinned_target_is_evicted_last():
+    pinned, latest, other = releases(20), releases(1)[0], releases(10)
+    # 全て入りきらないが、latest を削除すれば予算内に収まる
+    cache = ReleaseCache(max_bytes=estimate_size(pinned) + estimate_size(other) + estimate_size(latest) // 2, loader=None)
+    cache.pin("target1")
+    cache.put(HISTORY, "target1", pinned)
+    cache.put(LATEST, "target2", latest)
+    cache.put(HISTORY, "target3", other)
+
+    assert cache.get(LATEST, "target2") is None
+    assert cache.get(HISTORY, "target1") is not None
+    assert cache.get(HISTORY, "target3") is not None
+
+
+def test_warm_start_loads_persisted_history():
+    cache = ReleaseCache(loader=None)
+    release_state = {"target1": {"releases": [
+        {"tag_name": "v1.1.0-rc.1", "prerelease": True}, {"tag_name": "v1.0.0"}
+    ]}}
+
+    cache.warm_start([{"id": "target1"}], release_state, load_shared_state=lambda: pytest.fail("not needed"))
+
+    assert len(cache.get(HISTORY, "target1")) == 2
+    assert cache.get(LATEST, "target1")["tag_name"] == "v1.0.0"
+
+
+def test_warm_start_falls_back_to_shared_state():
+    # 再デプロイで release_state.json が失われても、共有状態に記録された最新リリースを表示できる
+    cache = ReleaseCache(loader=None)
+    calls = []
+
+    def load_shared_state():
+        calls.append(True)
+        return {"target1": {"latest_release": {"tag_name": "v2.0.0"}, "stored_release_tag": "v2.0.0"}}
+
+    cache.warm_start([{"id": "target1"}, {"id": "target2"}], {}, load_shared_state)
+
+    assert cache.get(LATEST, "target1") == {"tag_name": "v2.0.0"}
+    assert cache.get(LATEST, "target2") is None
+    assert cache.get(HISTORY, "target1") is None
+    assert calls == [True]
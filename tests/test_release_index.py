@@ -0,0 +1,81 @@
+from release_monitor.release_index import ReleaseIndex, parse_semver, release_sort_key
+
+
+def release(tag, published_at="2024-01-01T00:00:00Z", **fields):
+    return dict({"tag_name": tag, "name": tag, "published_at": published_at}, **fields)
+
+
+def tags(releases):
+    return [r["tag_name"] for r in releases]
+
+
+def test_release_precedes_its_prerelease():
+    assert parse_semver("1.10.0") > parse_semver("1.10.0-rc.1") > parse_semver("1.9.0")
+    assert parse_semver("v1.10.0") == parse_semver("1.10.0")
+
+
+def test_prerelease_identifiers():
+    assert parse_semver("1.0.0-alpha") < parse_semver("1.0.0-alpha.1") < parse_semver("1.0.0-beta")
+    # 数値の識別子は数値として比較し、英数字の識別子より小さい
+    assert parse_semver("1.0.0-rc.2") < parse_semver("1.0.0-rc.10") < parse_semver("1.0.0-rc.a")
+
+
+def test_build_metadata_and_partial_versions():
+    assert parse_semver("1.2.3+build.5") == parse_semver("1.2.3")
+    assert parse_semver("1.2") == parse_semver("1.2.0")
+    assert parse_semver("release-2024") is None
+
+
+def test_non_semver_tags_sort_below_semver_tags():
+    releases = [
+        release("nightly", "2024-06-01T00:00:00Z"),
+        release("v0.1.0", "2023-01-01T00:00:00Z"),
+        release("build-42", "2024-05-01T00:00:00Z"),
+    ]
+
+    assert tags(sorted(releases, key=release_sort_key, reverse=True)) == ["v0.1.0", "nightly", "build-42"]
+
+
+def test_sorts_by_version_not_publish_date():
+    # 古いバージョンへのパッチリリースが後から公開されても最新にはならない
+    index = ReleaseIndex([
+        release("v1.9.0", "2024-01-01T00:00:00Z"),
+        release("v1.10.0", "2024-02-01T00:00:00Z"),
+        release("v1.9.1", "2024-03-01T00:00:00Z"),
+    ])
+
+    assert tags(index.releases) == ["v1.10.0", "v1.9.1", "v1.9.0"]
+    assert index.latest()["tag_name"] == "v1.10.0"
+
+
+def test_latest_excludes_drafts_and_prereleases():
+    index = ReleaseIndex([
+        release("v2.0.0", draft=True),
+        release("v1.10.0-rc.1", prerelease=True),
+        release("v1.9.0"),
+    ])
+
+    assert index.latest()["tag_name"] == "v1.9.0"
+    assert index.latest(include_prereleases=True)["tag_name"] == "v1.10.0-rc.1"
+
+
+def test_latest_without_published_releases():
+    index = ReleaseIndex([release("v1.0.0", draft=True)])
+
+    assert index.latest() is None
+    assert index.latest(include_prereleases=True) is None
+    assert ReleaseIndex(None).latest() is None
+
+
+def test_filtered_and_lookup():
+    index = ReleaseIndex([
+        release("v2.0.0", draft=True),
+        release("v1.1.0-beta", prerelease=True),
+        release("v1.0.0"),
+    ])
+
+    assert tags(index.filtered(include_prereleases=False, include_drafts=False)) == ["v1.0.0"]
+    assert tags(index.filtered(include_drafts=False)) == ["v1.1.0-beta", "v1.0.0"]
+    assert "v1.0.0" in index and "v3.0.0" not in index
+    assert index.label("v1.0.0") == "v1.0.0 (v1.0.0)"
+    assert index.label("v3.0.0") == "v3.0.0 (v3.0.0)"
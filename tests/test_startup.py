@@ -0,0 +1,46 @@
+import random
+
+from release_monitor.startup import measure_startup_imports, staggered_delays, startup_imports
+
+
+def test_imports_are_read_from_app(tmp_path):
+    script = tmp_path / "app.py"
+    script.write_text(
+        "import json\n"
+        "from release_monitor import targets\n"
+        "\n"
+        "def load():\n"
+        "    import kubernetes.client\n"
+    )
+
+    # 関数内の遅延インポートは起動時に実行されないため含まれない
+    assert startup_imports(str(script)) == ["import json", "from release_monitor import targets"]
+
+
+def test_app_imports_include_release_monitor_modules():
+    imports = startup_imports()
+
+    assert "import streamlit as st" in imports
+    assert "from release_monitor import monitor" in imports
+
+
+def test_app_startup_does_not_import_kubernetes_client():
+    _, loaded = measure_startup_imports()
+
+    assert loaded == []
+
+
+def test_detects_eager_kubernetes_import(tmp_path):
+    script = tmp_path / "app.py"
+    script.write_text("import kubernetes.client\n")
+
+    _, loaded = measure_startup_imports(str(script))
+
+    assert loaded == ["kubernetes.client"]
+
+
+def test_staggered_delays_stay_within_interval():
+    delays = staggered_delays([60, 60, 60], random.Random(0))
+
+    assert all(0 <= delay < 60 for delay in delays)
+    assert delays == sorted(delays)
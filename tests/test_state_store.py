@@ -0,0 +1,95 @@
+import copy
+import threading
+import time
+from types import SimpleNamespace
+
+from release_monitor import state_store
+from release_monitor.state_store import ConfigMapStateStore
+
+# アプリと同じ遅延インポート経由で参照する
+ApiException = state_store.k8s.client.rest.ApiException
+
+
+# CoreV1Api の ConfigMap 操作だけを実装したフェイク（resourceVersion による楽観的排他制御あり）
+class FakeCoreApi:
+    def __init__(self, read_delay=0):
+        self.config_map = None
+        self.read_delay = read_delay
+        self.conflicts = 0
+
+    def read_namespaced_config_map(self, name, namespace):
+        if self.config_map is None:
+            raise ApiException(status=404)
+        config_map = copy.deepcopy(self.config_map)
+        # 読み込みから書き込みまでの間に他のスレッドが割り込めるようにする
+        time.sleep(self.read_delay)
+        return config_map
+
+    def create_namespaced_config_map(self, namespace, body):
+        if self.config_map is not None:
+            raise ApiException(status=409)
+        self.config_map = SimpleNamespace(data=dict(body.data), metadata=SimpleNamespace(resource_version="1"))
+
+    def patch_namespaced_config_map(self, name, namespace, body):
+        current = self.config_map.metadata.resource_version
+        if body["metadata"]["resourceVersion"] != current:
+            self.conflicts += 1
+            raise ApiException(status=409)
+        self.config_map = SimpleNamespace(
+            data=dict(body["data"]), metadata=SimpleNamespace(resource_version=str(int(current) + 1))
+        )
+
+
+def test_concurrent_updates_keep_every_target():
+    api = FakeCoreApi(read_delay=0.01)
+    store = ConfigMapStateStore("state", "ns", api=api)
+    threads = [
+        threading.Thread(target=store.update_target, args=(f"target{i}", None, f"v{i}"))
+        for i in range(1, 6)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    state = store.load(use_cache=False)
+    assert {target_id: entry["stored_release_tag"] for target_id, entry in state.items()} == {
+        f"target{i}": f"v{i}" for i in range(1, 6)
+    }
+
+
+def test_retries_when_another_process_wrote_in_between():
+    api = FakeCoreApi()
+    store = ConfigMapStateStore("state", "ns", api=api)
+    other = ConfigMapStateStore("state", "ns", api=api)
+    store.update_target("target1", stored_release_tag="v1")
+
+    # 読み込みと書き込みの間に、他のレプリカ（前のリーダー）が target2 を書き込んだ
+    read = api.read_namespaced_config_map
+
+    def stale_read(name, namespace):
+        config_map = read(name, namespace)
+        if not api.conflicts:
+            api.read_namespaced_config_map = read
+            other.update_target("target2", stored_release_tag="v2")
+        return config_map
+
+    api.read_namespaced_config_map = stale_read
+    store.update_target("target1", stored_release_tag="v1.1")
+
+    state = store.load(use_cache=False)
+    assert api.conflicts == 1
+    assert state["target1"]["stored_release_tag"] == "v1.1"
+    assert state["target2"]["stored_release_tag"] == "v2"
+
+
+def test_remove_missing_target_does_not_write():
+    api = FakeCoreApi()
+    store = ConfigMapStateStore("state", "ns", api=api)
+    store.update_target("target1", stored_release_tag="v1")
+
+    store.remove_target("target2")
+    assert api.config_map.metadata.resource_version == "1"
+
+    store.remove_target("target1")
+    assert store.load(use_cache=False) == {}
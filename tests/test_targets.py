@@ -0,0 +1,26 @@
+import pytest
+
+from release_monitor.targets import merge_targets, parse_targets
+
+
+def test_rejects_intervals_below_minimum():
+    with pytest.raises(ValueError, match="polling_interval must be at least 10"):
+        parse_targets("targets: [{name: a, polling_interval: 0}]")
+    with pytest.raises(ValueError, match="window_interval must be at least 10"):
+        parse_targets("name,window_interval\na,-5\n", "csv")
+
+
+def test_invalid_csv_raises_value_error():
+    with pytest.raises(ValueError, match="invalid CSV"):
+        parse_targets('name\n"' + "a" * 200000 + '"\n', "csv")
+
+
+def test_merge_updates_by_id_and_name_and_adds_new():
+    targets = [{'id': 'target1', 'name': 'api', 'polling_interval': 60}]
+    imported = parse_targets("targets: [{name: api, polling_interval: 120}, {name: web, github_repo: org/web}]")
+
+    added, updated, next_id = merge_targets(targets, imported, 2)
+
+    assert (added, updated, next_id) == (1, 1, 3)
+    assert targets[0]['polling_interval'] == 120
+    assert targets[1]['id'] == 'target2' and targets[1]['github_repo'] == 'org/web'